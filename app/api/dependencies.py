@@ -1,15 +1,41 @@
-from fastapi import Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.services.model_registry import model_registry
 from app.services.ocr_service import OCRService
+from app.services.ocr_executor import OCRExecutor, ocr_executor
 from app.services.extraction_service import ExtractionService
-from app.services.database_service import DatabaseService
+from app.services.database_service import AsyncDatabaseService
+from app.services.job_worker import OCRJobWorker, ocr_job_worker
+from app.services.thumbnail_service import ThumbnailService, thumbnail_service
+from app.services.export_service import ExportService, export_service
+
+# One OCRService per process, backed by the warm model registry
+_ocr_service = OCRService(model_registry)
 
 def get_ocr_service() -> OCRService:
-    return OCRService()
+    if not model_registry.is_ready:
+        raise HTTPException(
+            status_code=503,
+            detail=f"OCR models are not ready (state: {model_registry.state})",
+            headers={"Retry-After": "10"}
+        )
+    return _ocr_service
+
+def get_ocr_executor() -> OCRExecutor:
+    return ocr_executor
+
+def get_job_worker() -> OCRJobWorker:
+    return ocr_job_worker
+
+def get_thumbnail_service() -> ThumbnailService:
+    return thumbnail_service
+
+def get_export_service() -> ExportService:
+    return export_service
 
 def get_extraction_service() -> ExtractionService:
     return ExtractionService()
 
-def get_database_service(db: Session = Depends(get_db)) -> DatabaseService:
-    return DatabaseService(db)
\ No newline at end of file
+def get_database_service(db: AsyncSession = Depends(get_async_db)) -> AsyncDatabaseService:
+    return AsyncDatabaseService(db)
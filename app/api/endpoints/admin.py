@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Query, HTTPException
+from typing import Optional
+import asyncio
+from app.core.database import engine
+from app.services.reextraction_service import ReextractionService
+
+router = APIRouter()
+
+@router.post("/reextract")
+async def reextract_invoices(
+    dry_run: bool = Query(True, description="Chỉ báo cáo thay đổi, không ghi vào database"),
+    limit: Optional[int] = Query(None, ge=1, description="Giới hạn số hóa đơn xử lý"),
+    batch_size: int = Query(500, ge=1, le=10000, description="Số hóa đơn mỗi batch"),
+    workers: Optional[int] = Query(None, ge=1, description="Số process trích xuất"),
+    max_diffs: int = Query(100, ge=0, le=10000, description="Số diff tối đa trả về")
+):
+    """
+    ## 🔁 Trích xuất lại toàn bộ hóa đơn
+    
+    **Chạy lại `ExtractionService` trên `raw_text` đã lưu sau khi thay đổi patterns.**
+    
+    - Đọc hóa đơn bằng server-side cursor, trích xuất song song trên process pool
+    - Ghi lại các trường và danh sách hàng hóa thay đổi theo từng batch transaction
+    - `dry_run=true` (mặc định): chỉ trả về báo cáo diff
+    """
+    service = ReextractionService(
+        engine, workers=workers, batch_size=batch_size, dry_run=dry_run, max_diffs=max_diffs
+    )
+    try:
+        return await asyncio.to_thread(service.run, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Re-extraction failed: {str(e)}")
@@ -0,0 +1,70 @@
+from datetime import datetime, time
+from typing import Literal, Optional, Tuple
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from app.services.export_service import COLUMNAR_FORMATS, ExportService
+from app.api.dependencies import get_export_service
+from app.utils.streaming import stream_from_thread
+
+router = APIRouter()
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def _day_bounds(start_date: Optional[datetime], end_date: Optional[datetime]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    # Same whole-day bounds as the daily summary
+    start = datetime.combine(start_date.date(), time.min) if start_date else None
+    end = datetime.combine(end_date.date(), time.max) if end_date else None
+    return start, end
+
+@router.get("/export")
+async def export_invoices(
+    format: Literal["parquet", "csv", "arrow"] = Query("parquet", description="Định dạng: parquet (zstd), arrow (IPC stream, zstd) hoặc csv"),
+    table: Literal["items", "invoices"] = Query("items", description="items: mỗi dòng một mặt hàng kèm thông tin hóa đơn; invoices: mỗi dòng một hóa đơn"),
+    start_date: Optional[datetime] = Query(None, description="Ngày bắt đầu (YYYY-MM-DD)"),
+    end_date: Optional[datetime] = Query(None, description="Ngày kết thúc (YYYY-MM-DD), tính cả ngày"),
+    export_service: ExportService = Depends(get_export_service)
+):
+    """
+    ## 📦 Xuất dữ liệu cho phân tích (Parquet / Arrow / CSV)
+    
+    **Xuất hóa đơn dạng cột để nạp vào công cụ phân tích (pandas, DuckDB, Spark, Power BI...).**
+    
+    - `table=items`: bảng phẳng, mỗi dòng một mặt hàng (hóa đơn không có mặt hàng vẫn có một dòng)
+    - `table=invoices`: mỗi dòng một hóa đơn; ghép với `items` qua `invoice_id`
+    - Đọc trực tiếp từ database theo từng batch, không tạo ORM object, bộ nhớ không đổi
+    - Parquet/Arrow nén zstd, giữ kiểu dữ liệu (decimal, timestamp)
+    """
+    start, end = _day_bounds(start_date, end_date)
+    media_type, extension = COLUMNAR_FORMATS[format]
+    filename = f"{table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    
+    return StreamingResponse(
+        stream_from_thread(lambda output: export_service.write_columnar(output, format, table, start, end)),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+@router.get("/export/excel")
+async def export_invoices_excel(
+    start_date: Optional[datetime] = Query(None, description="Ngày bắt đầu (YYYY-MM-DD)"),
+    end_date: Optional[datetime] = Query(None, description="Ngày kết thúc (YYYY-MM-DD), tính cả ngày"),
+    export_service: ExportService = Depends(get_export_service)
+):
+    """
+    ## 📁 Xuất Excel chi tiết hóa đơn
+    
+    **Sheet "Detailed Invoices": mỗi dòng một mặt hàng, kèm ngày, mã và tổng tiền hóa đơn.**
+    
+    - Đọc hóa đơn theo batch bằng server-side cursor, hàng hóa được nạp kèm theo từng batch
+    - Ghi workbook ở chế độ write-only (bộ nhớ không đổi) trên worker thread, không chặn event loop
+    - Các dòng được ghi tạm ra file trên server; xlsx là file zip nên byte đầu tiên chỉ được gửi khi
+      workbook đã ghi xong mọi dòng, rồi file được stream về client (cần stream ngay thì dùng `/export?format=csv`)
+    """
+    start, end = _day_bounds(start_date, end_date)
+    filename = f"invoices_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    
+    return StreamingResponse(
+        stream_from_thread(lambda output: export_service.write_excel(output, start, end)),
+        media_type=XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
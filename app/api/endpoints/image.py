@@ -1,13 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
-from app.services.database_service import DatabaseService
-from app.api.dependencies import get_database_service
+import asyncio
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from app.services.database_service import AsyncDatabaseService
+from app.services.thumbnail_service import ThumbnailService
+from app.api.dependencies import get_database_service, get_thumbnail_service
+from app.utils.http_cache import IMMUTABLE_CACHE_CONTROL, etag_matches, parse_range, strong_etag
 
 router = APIRouter()
 
+def _image_hash(db_image) -> Optional[str]:
+    # Blob keys end with the content hash, which covers duplicates stored without one
+    if db_image.content_hash:
+        return db_image.content_hash
+    if db_image.storage_path:
+        return os.path.basename(db_image.storage_path)
+    return None
+
 @router.get("/{image_id}")
 async def get_image(
     image_id: int,
-    db_service: DatabaseService = Depends(get_database_service)
+    if_none_match: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+    db_service: AsyncDatabaseService = Depends(get_database_service)
 ):
     """
     ## 🖼️ Lấy ảnh hóa đơn
@@ -16,25 +33,127 @@ async def get_image(
     
     ### Đầu vào:
     - **image_id**: ID của ảnh trong database
+    - Header `If-None-Match`: ETag đã lưu ở client, trả về `304` nếu ảnh không đổi
+    - Header `Range`: tải một phần ảnh (`bytes=0-1023`), trả về `206`
     
     ### Đầu ra:
-    - Trả về file ảnh với content-type phù hợp
+    - Trả về file ảnh với content-type phù hợp, stream trực tiếp từ blob store
+    - `ETag` lấy từ SHA-256 của ảnh, `Cache-Control` dài hạn vì ảnh không bao giờ thay đổi
     """
     try:
-        # Get image from database
-        db_image = db_service.get_image(image_id)
+        # Metadata only: image_data is deferred and the bytes live in the blob store
+        db_image = await db_service.get_image(image_id)
         
         if not db_image:
             raise HTTPException(status_code=404, detail="Image not found")
         
-        # Return image with proper content type
-        return Response(
-            content=db_image.image_data,
+        etag = strong_etag(_image_hash(db_image))
+        
+        headers = {
+            "Content-Disposition": f"inline; filename={db_image.filename}",
+            "Accept-Ranges": "bytes",
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        }
+        if etag:
+            headers["ETag"] = etag
+        
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        
+        size = db_image.file_size
+        # A Range for some other version of the image falls back to the full body
+        if if_range and if_range.strip() != etag:
+            range_header = None
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            raise HTTPException(
+                status_code=416,
+                detail="Requested range not satisfiable",
+                headers={"Content-Range": f"bytes */{size}"}
+            )
+        
+        status_code = 200
+        start, end = 0, size - 1
+        if byte_range:
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        
+        if not db_image.storage_path:
+            # Row not yet moved out of Postgres by scripts/migrate_image_blobs.py
+            image_data = await db_service.read_image_data(db_image)
+            return Response(
+                content=image_data[start:end + 1],
+                status_code=status_code,
+                media_type=db_image.content_type,
+                headers=headers
+            )
+        
+        local_path = db_service.blobs.local_path(db_image.storage_path)
+        if local_path and not os.path.exists(local_path):
+            raise HTTPException(status_code=404, detail="Image file missing from blob store")
+        return StreamingResponse(
+            db_service.blobs.iter_chunks(db_image.storage_path, start, end),
+            status_code=status_code,
             media_type=db_image.content_type,
-            headers={
-                "Content-Disposition": f"inline; filename={db_image.filename}"
-            }
+            headers=headers
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve image: {str(e)}")
+
+@router.get("/{image_id}/thumbnail")
+async def get_image_thumbnail(
+    image_id: int,
+    width: Optional[int] = Query(None, ge=1, description="Chiều rộng mong muốn (px), làm tròn lên kích thước có sẵn"),
+    if_none_match: Optional[str] = Header(None),
+    db_service: AsyncDatabaseService = Depends(get_database_service),
+    thumbnail_service: ThumbnailService = Depends(get_thumbnail_service)
+):
+    """
+    ## 🖼️ Ảnh thu nhỏ hóa đơn
+    
+    **Trả về ảnh WebP thu nhỏ để hiển thị danh sách, nhẹ hơn nhiều so với ảnh gốc:**
+    
+    ### Đầu vào:
+    - **image_id**: ID của ảnh trong database
+    - **width**: chiều rộng mong muốn; được làm tròn lên một trong các kích thước `THUMBNAIL_WIDTHS`
+    
+    ### Đầu ra:
+    - Ảnh `image/webp`, được tạo ở lần yêu cầu đầu tiên và lưu cạnh ảnh gốc trong blob store
+    - PDF dùng trang đầu tiên
+    """
+    try:
+        db_image = await db_service.get_image(image_id)
+        if not db_image:
+            raise HTTPException(status_code=404, detail="Image not found")
+        
+        width = thumbnail_service.pick_width(width)
+        content_hash = _image_hash(db_image)
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        if content_hash:
+            headers["ETag"] = strong_etag(f"{content_hash}-w{width}")
+            if etag_matches(if_none_match, headers["ETag"]):
+                return Response(status_code=304, headers=headers)
+        
+        # The original is only loaded when the thumbnail has not been rendered yet; legacy rows keep
+        # it in a deferred column that can only be loaded on the event loop, so fetch that up front
+        if db_image.storage_path:
+            load_original = lambda: db_service.blobs.get(db_image.storage_path)
+        else:
+            legacy_data = await db_service.read_image_data(db_image)
+            load_original = lambda: legacy_data
+        thumbnail, content_hash = await asyncio.to_thread(
+            thumbnail_service.get_or_create, content_hash, width, load_original
         )
+        headers["ETag"] = strong_etag(f"{content_hash}-w{width}")
+        return Response(content=thumbnail, media_type="image/webp", headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve image: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to create thumbnail: {str(e)}")
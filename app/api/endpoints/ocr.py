@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Response
-from app.schemas.invoice import Invoice, OCRResponse
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Response, Query
+from fastapi.responses import StreamingResponse
+from app.schemas.invoice import Invoice, OCRResponse, OCRJob, BatchExtractResponse, BatchExtractResult
 from app.services.ocr_service import OCRService
 from app.services.extraction_service import ExtractionService
-from app.services.database_service import DatabaseService
-from app.api.dependencies import get_ocr_service, get_extraction_service, get_database_service
+from app.services.database_service import AsyncDatabaseService
+from app.services.ocr_executor import OCRExecutor, OCRQueueFullError
+from app.services.ocr_cache import ocr_cache
+from app.services.job_worker import OCRJobWorker
+from app.api.dependencies import (
+    get_ocr_service, get_extraction_service, get_database_service, get_ocr_executor, get_job_worker
+)
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
 from app.utils.file_handler import validate_file
+from typing import List
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import json
+import os
 import time
 
 router = APIRouter()
@@ -16,7 +26,8 @@ async def process_invoice(
     file: UploadFile = File(..., description="Hình ảnh hóa đơn (JPG, PNG, TIFF, BMP)"),
     ocr_service: OCRService = Depends(get_ocr_service),
     extraction_service: ExtractionService = Depends(get_extraction_service),
-    db_service: DatabaseService = Depends(get_database_service)
+    db_service: AsyncDatabaseService = Depends(get_database_service),
+    ocr_executor: OCRExecutor = Depends(get_ocr_executor)
 ):
     """
     ## 📸 Xử lý OCR Hóa đơn tiếng Việt
@@ -54,6 +65,8 @@ async def process_invoice(
     2. 🔍 **OCR**: Trích xuất text từ hình ảnh bằng Tesseract (Vietnamese)
     3. 📊 **Extract**: Phân tích và trích xuất thông tin có cấu trúc
     4. 💾 **Save**: Lưu vào database PostgreSQL
+    
+    Nếu ảnh đã được upload trước đó (trùng nội dung), hóa đơn cũ được trả về ngay với `"deduplicated": true`.
     """
     try:
         # Validate uploaded file
@@ -65,9 +78,16 @@ async def process_invoice(
         # Process image data
         image_info = ocr_service.process_image_bytes(file_content, file.filename, file.content_type)
         
-        # Save image to database FIRST to avoid connection timeout
+        # Identical uploads are served from the earlier result without running OCR
+        existing_invoices = await db_service.get_invoices_by_content_hash(image_info["content_hash"])
+        if existing_invoices:
+            print(f"Dedup hit for {file.filename}: invoice {existing_invoices[0].id}")
+            return Invoice.model_validate(existing_invoices[0]).model_copy(update={"deduplicated": True})
+        
+        # Save image to database FIRST; each write is its own short transaction, so no pool
+        # connection is held while OCR runs and OCR concurrency is not bounded by the pool
         print(f"Saving image to database: {file.filename}")
-        db_image = db_service.create_image(image_info)
+        db_image = await db_service.create_image(image_info)
         print(f"Image saved with ID: {db_image.id}")
         
         # Perform OCR with timeout and async processing
@@ -75,41 +95,350 @@ async def process_invoice(
         start_time = time.time()
         
         try:
-            # Run OCR in thread pool with timeout  
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                try:
-                    # Set timeout to 300 seconds (5 minutes) for Marker processing
-                    raw_text = await asyncio.wait_for(
-                        loop.run_in_executor(executor, ocr_service.extract_text, file_content),
-                        timeout=300.0
-                    )
-                    processing_time = time.time() - start_time
-                    print(f"OCR completed in {processing_time:.2f} seconds")
-                    
-                except asyncio.TimeoutError:
-                    processing_time = time.time() - start_time
-                    print(f"OCR timeout after {processing_time:.2f} seconds")
-                    raise HTTPException(status_code=408, detail="OCR processing timeout (300s)")
-                except Exception as e:
-                    processing_time = time.time() - start_time
-                    print(f"OCR failed after {processing_time:.2f} seconds: {str(e)}")
-                    raise
+            # Run OCR on the shared, bounded OCR executor
+            ocr_document = await ocr_executor.run(
+                ocr_service.extract_document, file_content, timeout=settings.OCR_TIMEOUT
+            )
+            raw_text = ocr_document.text
+            processing_time = time.time() - start_time
+            print(f"OCR completed in {processing_time:.2f} seconds")
+        except OCRQueueFullError as e:
+            print(f"OCR queue full, rejecting {file.filename}")
+            raise HTTPException(
+                status_code=503,
+                detail="OCR queue is full, please retry later",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        except asyncio.TimeoutError:
+            processing_time = time.time() - start_time
+            print(f"OCR timeout after {processing_time:.2f} seconds")
+            raise HTTPException(status_code=408, detail=f"OCR processing timeout ({settings.OCR_TIMEOUT:.0f}s)")
         except Exception as e:
-            # If OCR fails, we still have the image saved, so return partial result
-            print(f"OCR processing failed, but image is saved: {str(e)}")
+            # If OCR fails, we still have the image saved
+            processing_time = time.time() - start_time
+            print(f"OCR failed after {processing_time:.2f} seconds, but image is saved: {str(e)}")
             raise
         
         if not raw_text.strip():
             raise HTTPException(status_code=400, detail="No text found in image")
         
-        # Extract structured information
-        ocr_response = extraction_service.extract_all(raw_text)
+        # Extract structured information, items from Marker table blocks when present
+        ocr_response = extraction_service.extract_all(raw_text, tables=ocr_document.tables)
         
         # Save to database
-        db_invoice = db_service.create_invoice_from_ocr(ocr_response, db_image.id)
+        db_invoice = await db_service.create_invoice_from_ocr(ocr_response, db_image.id)
         
         return db_invoice
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+
+@router.post("/extract/batch", response_model=BatchExtractResponse)
+async def process_invoice_batch(
+    files: List[UploadFile] = File(..., description="Nhiều hình ảnh hóa đơn (JPG, PNG, TIFF, BMP)"),
+    ocr_service: OCRService = Depends(get_ocr_service),
+    extraction_service: ExtractionService = Depends(get_extraction_service),
+    db_service: AsyncDatabaseService = Depends(get_database_service),
+    ocr_executor: OCRExecutor = Depends(get_ocr_executor)
+):
+    """
+    ## 📚 Xử lý OCR hàng loạt
+    
+    **Upload nhiều hóa đơn cùng lúc, Marker xử lý tất cả trong một lần chạy:**
+    
+    ### Đầu ra JSON:
+    ```json
+    {
+        "total": 2,
+        "succeeded": 1,
+        "failed": 1,
+        "ocr_seconds": 42.5,
+        "results": [
+            {"filename": "a.png", "success": true, "invoice": {"id": 1, "...": "..."}, "error": null},
+            {"filename": "b.txt", "success": false, "invoice": null, "error": "File type not supported"}
+        ]
+    }
+    ```
+    """
+    if len(files) > settings.MAX_BATCH_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files. Maximum per batch: {settings.MAX_BATCH_FILES}"
+        )
+    
+    results = [BatchExtractResult(filename=file.filename, success=False) for file in files]
+    pending = []  # (result index, image id, file content, content hash)
+    duplicates = {}  # content hash -> result indexes sharing one OCR run
+    
+    # Validate and store every file; failures are reported per file
+    for index, file in enumerate(files):
+        try:
+            validate_file(file)
+            file_content = await file.read()
+            if ocr_service.is_pdf(file_content):
+                raise ValueError("PDF files are not supported in batches, use /invoice/extract/pdf")
+            if not ocr_service.is_readable_image(file_content):
+                raise ValueError("File is not a readable image")
+            
+            image_info = ocr_service.process_image_bytes(file_content, file.filename, file.content_type)
+            content_hash = image_info["content_hash"]
+            if content_hash in duplicates:
+                duplicates[content_hash].append(index)
+                continue
+            
+            existing_invoices = await db_service.get_invoices_by_content_hash(content_hash)
+            if existing_invoices:
+                results[index].invoice = Invoice.model_validate(existing_invoices[0]).model_copy(update={"deduplicated": True})
+                results[index].success = True
+                continue
+            
+            db_image = await db_service.create_image(image_info)
+            duplicates[content_hash] = [index]
+            pending.append((index, db_image.id, file_content, content_hash))
+        except HTTPException as e:
+            results[index].error = str(e.detail)
+        except Exception as e:
+            results[index].error = str(e)
+    
+    ocr_seconds = None
+    if pending:
+        print(f"Starting batch OCR processing for {len(pending)} files...")
+        start_time = time.time()
+        try:
+            documents = await ocr_executor.run(
+                ocr_service.extract_document_batch,
+                [file_content for _, _, file_content, _ in pending],
+                timeout=settings.OCR_BATCH_TIMEOUT
+            )
+        except OCRQueueFullError as e:
+            raise HTTPException(
+                status_code=503,
+                detail="OCR queue is full, please retry later",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=408, detail=f"OCR processing timeout ({settings.OCR_BATCH_TIMEOUT:.0f}s)")
+        except Exception as e:
+            # One bad page fails the combined PDF; redo the images one by one so only that file reports it
+            print(f"Batch OCR failed, retrying {len(pending)} files one at a time: {str(e)}")
+            documents = []
+            for index, _, file_content, _ in pending:
+                ocr_document = None
+                try:
+                    ocr_document = await ocr_executor.run(
+                        ocr_service.extract_document, file_content, timeout=settings.OCR_TIMEOUT
+                    )
+                except OCRQueueFullError:
+                    results[index].error = "OCR queue is full, please retry later"
+                except asyncio.TimeoutError:
+                    results[index].error = f"OCR processing timeout ({settings.OCR_TIMEOUT:.0f}s)"
+                except Exception as e:
+                    results[index].error = str(e)
+                documents.append(ocr_document)
+        ocr_seconds = round(time.time() - start_time, 2)
+        print(f"Batch OCR completed in {ocr_seconds:.2f} seconds")
+        
+        extracted = []
+        for (index, image_id, _, _), ocr_document in zip(pending, documents):
+            if ocr_document is None:
+                continue
+            try:
+                ocr_response = extraction_service.extract_all(ocr_document.text, tables=ocr_document.tables)
+                extracted.append((index, ocr_response, image_id))
+            except Exception as e:
+                results[index].error = str(e)
+        
+        # All invoices of the batch go in with one transaction and a handful of multi-row INSERTs
+        if extracted:
+            try:
+                invoice_ids = await db_service.bulk_create_invoices(
+                    [(ocr_response, image_id) for _, ocr_response, image_id in extracted]
+                )
+                db_invoices = await db_service.get_invoices(invoice_ids)
+                for (index, _, _), db_invoice in zip(extracted, db_invoices):
+                    results[index].invoice = Invoice.model_validate(db_invoice)
+                    results[index].success = True
+            except Exception as e:
+                for index, _, _ in extracted:
+                    results[index].error = str(e)
+        
+        for index, _, _, content_hash in pending:
+            # Repeated files in the same batch share the first file's result
+            for duplicate_index in duplicates[content_hash][1:]:
+                results[duplicate_index].success = results[index].success
+                results[duplicate_index].error = results[index].error
+                if results[index].invoice:
+                    results[duplicate_index].invoice = results[index].invoice.model_copy(update={"deduplicated": True})
+    
+    succeeded = sum(1 for result in results if result.success)
+    return BatchExtractResponse(
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        ocr_seconds=ocr_seconds,
+        results=results
+    )
+
+@router.post("/extract/pdf")
+async def process_invoice_pdf(
+    file: UploadFile = File(..., description="File PDF nhiều trang (mỗi trang hoặc nhóm trang là một hóa đơn)"),
+    pages_per_invoice: int = Query(1, ge=1, description="Số trang cho mỗi hóa đơn"),
+    ocr_service: OCRService = Depends(get_ocr_service),
+    extraction_service: ExtractionService = Depends(get_extraction_service),
+    db_service: AsyncDatabaseService = Depends(get_database_service),
+    ocr_executor: OCRExecutor = Depends(get_ocr_executor)
+):
+    """
+    ## 📑 Xử lý PDF nhiều trang
+    
+    **PDF được đưa thẳng vào Marker (không qua PIL), mỗi nhóm `pages_per_invoice` trang thành một hóa đơn.**
+    
+    PDF đã được upload trước đó sẽ trả lại các hóa đơn cũ với `"deduplicated": true`.
+    
+    Kết quả được stream dạng NDJSON, mỗi dòng một nhóm trang ngay khi xử lý xong:
+    ```json
+    {"first_page": 0, "last_page": 0, "success": true, "invoice": {"id": 1, "...": "..."}, "error": null}
+    ```
+    """
+    validate_file(file)
+    file_content = await file.read()
+    if not ocr_service.is_pdf(file_content):
+        raise HTTPException(status_code=400, detail="File is not a PDF document")
+    
+    try:
+        page_count = ocr_service.count_pdf_pages(file_content)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid PDF: {str(e)}")
+    if page_count == 0:
+        raise HTTPException(status_code=400, detail="PDF has no pages")
+    
+    image_info = ocr_service.process_image_bytes(file_content, file.filename, file.content_type)
+    existing_invoices = await db_service.get_invoices_by_content_hash(image_info["content_hash"])
+    if existing_invoices:
+        # Identical PDF already processed: replay its invoices without OCR
+        print(f"Dedup hit for {file.filename}: {len(existing_invoices)} invoices")
+        lines = [
+            json.dumps({
+                "first_page": None,
+                "last_page": None,
+                "success": True,
+                "invoice": Invoice.model_validate(invoice).model_copy(update={"deduplicated": True}).model_dump(mode="json"),
+                "error": None
+            }, ensure_ascii=False) + "\n"
+            for invoice in existing_invoices
+        ]
+        return StreamingResponse(iter(lines), media_type="application/x-ndjson")
+    
+    db_image = await db_service.create_image(image_info)
+    image_id = db_image.id
+    page_ranges = ocr_service.pdf_page_ranges(page_count, pages_per_invoice)
+    print(f"Processing {file.filename}: {page_count} pages in {len(page_ranges)} invoices")
+    
+    async def stream_pages():
+        # Written here rather than before returning, so a response that never starts streaming leaves no file behind
+        pdf_path = None
+        try:
+            pdf_path = await asyncio.to_thread(ocr_service.write_temp_pdf, file_content)
+            for first_page, last_page in page_ranges:
+                result = {"first_page": first_page, "last_page": last_page, "success": False, "invoice": None, "error": None}
+                try:
+                    ocr_document = await ocr_executor.run(
+                        ocr_service.extract_pdf_range, pdf_path, first_page, last_page,
+                        image_info["content_hash"], timeout=settings.OCR_TIMEOUT
+                    )
+                    ocr_response = extraction_service.extract_all(ocr_document.text, tables=ocr_document.tables)
+                    # The request's session is closed once the response starts streaming
+                    async with AsyncSessionLocal() as db:
+                        db_invoice = await AsyncDatabaseService(db).create_invoice_from_ocr(ocr_response, image_id)
+                        result["invoice"] = Invoice.model_validate(db_invoice).model_dump(mode="json")
+                    result["success"] = True
+                except OCRQueueFullError:
+                    result["error"] = "OCR queue is full, please retry later"
+                except asyncio.TimeoutError:
+                    result["error"] = f"OCR processing timeout ({settings.OCR_TIMEOUT:.0f}s)"
+                except Exception as e:
+                    result["error"] = str(e)
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        finally:
+            if pdf_path and os.path.exists(pdf_path):
+                os.unlink(pdf_path)
+    
+    return StreamingResponse(stream_pages(), media_type="application/x-ndjson")
+
+@router.post("/jobs", response_model=OCRJob, status_code=202)
+async def create_ocr_job(
+    file: UploadFile = File(..., description="Hình ảnh hóa đơn (JPG, PNG, TIFF, BMP)"),
+    db_service: AsyncDatabaseService = Depends(get_database_service),
+    job_worker: OCRJobWorker = Depends(get_job_worker)
+):
+    """
+    ## ⏳ Tạo job OCR bất đồng bộ
+    
+    **Lưu ảnh hóa đơn và trả về job id ngay lập tức, OCR chạy nền.**
+    
+    ### Đầu ra JSON:
+    ```json
+    {
+        "id": 12,
+        "status": "queued",
+        "filename": "invoice.png",
+        "image_id": 7,
+        "invoice_id": null
+    }
+    ```
+    
+    Dùng `GET /invoice/jobs/{job_id}` để theo dõi trạng thái (`queued`, `running`, `succeeded`, `failed`).
+    """
+    try:
+        validate_file(file)
+        file_content = await file.read()
+        # Reject undecodable uploads here rather than storing them and failing the job in the worker
+        if not (OCRService.is_pdf(file_content) or OCRService.is_readable_image(file_content)):
+            raise HTTPException(status_code=400, detail="File is not a readable image")
+        
+        image_info = OCRService.process_image_bytes(file_content, file.filename, file.content_type)
+        db_image = await db_service.create_image(image_info)
+        
+        # Identical uploads complete immediately with the earlier invoice
+        existing_invoices = await db_service.get_invoices_by_content_hash(image_info["content_hash"])
+        if existing_invoices:
+            db_job = await db_service.create_job(db_image.id, file.filename, invoice_id=existing_invoices[0].id)
+            print(f"Dedup hit for OCR job {db_job.id}: invoice {existing_invoices[0].id}")
+            return OCRJob.from_db(db_job)
+        
+        db_job = await db_service.create_job(db_image.id, file.filename)
+        print(f"Queued OCR job {db_job.id} for image {db_image.id}")
+        
+        job_worker.notify()
+        return OCRJob.from_db(db_job)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue OCR job: {str(e)}")
+
+@router.get("/jobs/{job_id}", response_model=OCRJob)
+async def get_ocr_job(
+    job_id: int,
+    db_service: AsyncDatabaseService = Depends(get_database_service)
+):
+    """
+    ## 🔎 Trạng thái job OCR
+    
+    **Trả về trạng thái, thời gian từng bước và invoice id khi job hoàn tất.**
+    """
+    db_job = await db_service.get_job(job_id)
+    if not db_job:
+        raise HTTPException(status_code=404, detail="OCR job not found")
+    return OCRJob.from_db(db_job)
+
+@router.get("/ocr/stats")
+async def get_ocr_stats(ocr_executor: OCRExecutor = Depends(get_ocr_executor)):
+    """
+    ## 📈 Thống kê hàng đợi OCR
+    
+    **Trả về số job đang chạy, độ sâu hàng đợi, thời gian chờ trung bình của OCR executor và thống kê OCR cache.**
+    """
+    return {**ocr_executor.stats(), "cache": ocr_cache.stats()}
@@ -1,20 +1,99 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from fastapi.responses import FileResponse
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, time
+import asyncio
 import pandas as pd
 import os
-from app.schemas.invoice import Invoice, InvoiceSearchRequest
-from app.services.database_service import DatabaseService
+from app.schemas.invoice import Invoice, InvoiceListEntry, InvoicePage, InvoiceSearchPage, InvoiceSearchRequest
+from app.services.database_service import DEFAULT_LIST_FIELDS, LIST_FIELDS, AsyncDatabaseService
 from app.api.dependencies import get_database_service
+from app.utils.pagination import decode_cursor, encode_cursor
 
 router = APIRouter()
 
+@router.get("", response_model=InvoicePage, response_model_exclude_unset=True)
+async def list_invoices(
+    limit: int = Query(50, ge=1, le=500, description="Số hóa đơn mỗi trang"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` của trang trước"),
+    start_date: Optional[datetime] = Query(None, description="Ngày thanh toán từ (YYYY-MM-DD)"),
+    end_date: Optional[datetime] = Query(None, description="Ngày thanh toán đến (YYYY-MM-DD), tính cả ngày"),
+    fields: Optional[str] = Query(None, description=f"Các trường cần lấy, cách nhau bởi dấu phẩy: {','.join(LIST_FIELDS)}"),
+    db_service: AsyncDatabaseService = Depends(get_database_service)
+):
+    """
+    ## 📋 Danh sách hóa đơn (phân trang)
+    
+    **Hóa đơn mới nhất trước, phân trang bằng cursor trên `(created_at, id)`: trang thứ N nhanh như trang đầu.**
+    
+    - `next_cursor` trong kết quả dùng làm `cursor` cho trang kế tiếp (`null` ở trang cuối)
+    - Mặc định không trả `raw_text` và `items`; thêm vào `fields` nếu cần, ví dụ `fields=id,invoice_code,items`
+    - `id` luôn có trong kết quả
+    """
+    selected = DEFAULT_LIST_FIELDS
+    if fields:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = sorted(set(selected) - set(LIST_FIELDS))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # One extra row tells whether another page exists
+    rows = await db_service.list_invoices(
+        limit + 1,
+        after=after,
+        start_date=datetime.combine(start_date.date(), time.min) if start_date else None,
+        end_date=datetime.combine(end_date.date(), time.max) if end_date else None,
+        fields=selected
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    
+    invoices = [
+        InvoiceListEntry.model_validate({key: value for key, value in row.items() if key == "id" or key in selected})
+        for row in rows
+    ]
+    return InvoicePage(invoices=invoices, next_cursor=next_cursor)
+
+@router.get("/search", response_model=InvoiceSearchPage)
+async def search_invoices(
+    q: str = Query(..., min_length=1, max_length=200, description="Từ khóa: mã hóa đơn, nội dung hoặc tên hàng hóa (không phân biệt dấu)"),
+    limit: int = Query(20, ge=1, le=100, description="Số kết quả mỗi trang"),
+    offset: int = Query(0, ge=0, le=10000, description="`next_offset` của trang trước"),
+    db_service: AsyncDatabaseService = Depends(get_database_service)
+):
+    """
+    ## 🔎 Tìm kiếm hóa đơn
+    
+    **Tìm theo mã hóa đơn, nội dung OCR (`raw_text`) và tên hàng hóa, xếp hạng theo mức độ phù hợp.**
+    
+    - Không phân biệt dấu: `phi dich vu` tìm được `Phí dịch vụ`
+    - Cú pháp tìm kiếm web: `"cụm từ"`, `-loại trừ`, `or`
+    - Mã hóa đơn gần đúng (sai 1-2 ký tự) vẫn tìm được và được xếp lên đầu
+    - Dùng index GIN (`tsvector`, `pg_trgm`), không quét toàn bộ bảng
+    """
+    query = q.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Empty search query")
+    
+    # One extra row tells whether another page exists
+    rows = await db_service.search_invoices(query, limit=limit + 1, offset=offset)
+    next_offset = offset + limit if len(rows) > limit else None
+    return InvoiceSearchPage(results=rows[:limit], next_offset=next_offset)
+
 @router.get("/summary")
 async def get_daily_summary(
     start_date: Optional[datetime] = Query(None, description="Ngày bắt đầu (YYYY-MM-DD)"),
     end_date: Optional[datetime] = Query(None, description="Ngày kết thúc (YYYY-MM-DD)"),
-    db_service: DatabaseService = Depends(get_database_service)
+    db_service: AsyncDatabaseService = Depends(get_database_service)
 ):
     """
     ## 📊 Tổng hợp doanh thu theo ngày + Tự động xuất Excel
@@ -40,50 +119,33 @@ async def get_daily_summary(
     ```
     
     ### Tính năng:
-    - 📈 **Tổng hợp theo ngày**: Số lượng hóa đơn, tổng tiền, trung bình
+    - 📈 **Tổng hợp theo ngày**: Số lượng hóa đơn, tổng tiền, trung bình (đọc từ bảng `daily_revenue`, không quét toàn bộ hóa đơn)
     - 📋 **Bảng thống kê**: Hiển thị dữ liệu dễ đọc
     - 📁 **Auto Excel**: Tự động tạo và lưu file Excel
+    - 🧾 **Chi tiết**: chi tiết từng mặt hàng xuất qua `GET /invoice/export/excel` (stream, bộ nhớ không đổi)
     - 💾 **Download link**: Đường dẫn tải file Excel
     """
     try:
-        # Get invoices
-        if start_date or end_date:
-            invoices = db_service.get_invoices_by_date_range(start_date, end_date)
-        else:
-            invoices = db_service.get_all_invoices()
+        # Daily totals come from the rollup maintained on every invoice write,
+        # so this stays one small indexed read however many invoices exist
+        daily_rows = await db_service.get_daily_revenue(
+            start_date.date() if start_date else None,
+            end_date.date() if end_date else None
+        )
         
-        if not invoices:
+        if not daily_rows:
             raise HTTPException(status_code=404, detail="No invoices found")
         
-        # Create daily summary
-        daily_summary = {}
-        for invoice in invoices:
-            if invoice.payment_date:
-                date_key = invoice.payment_date.strftime('%Y-%m-%d')
-                if date_key not in daily_summary:
-                    daily_summary[date_key] = {
-                        'date': date_key,
-                        'invoice_count': 0,
-                        'total_amount': 0.0,
-                        'invoices': []
-                    }
-                daily_summary[date_key]['invoice_count'] += 1
-                daily_summary[date_key]['total_amount'] += float(invoice.total_amount or 0)
-                daily_summary[date_key]['invoices'].append(invoice)
-        
-        # Calculate averages
         summary_table = []
-        for date_data in daily_summary.values():
+        for row in daily_rows:
+            total_amount = float(row.total_amount)
             summary_table.append({
-                'date': date_data['date'],
-                'invoice_count': date_data['invoice_count'],
-                'total_amount': round(date_data['total_amount'], 2),
-                'avg_amount': round(date_data['total_amount'] / date_data['invoice_count'], 2)
+                'date': row.day.strftime('%Y-%m-%d'),
+                'invoice_count': row.invoice_count,
+                'total_amount': round(total_amount, 2),
+                'avg_amount': round(total_amount / row.invoice_count, 2)
             })
         
-        # Sort by date
-        summary_table.sort(key=lambda x: x['date'])
-        
         # Calculate totals
         total_revenue = sum(item['total_amount'] for item in summary_table)
         total_invoices = sum(item['invoice_count'] for item in summary_table)
@@ -96,29 +158,15 @@ async def get_daily_summary(
         filename = f"summary_{timestamp}.xlsx"
         filepath = os.path.join(export_dir, filename)
         
-        # Create Excel with multiple sheets
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-            # Summary sheet
-            summary_df = pd.DataFrame(summary_table)
-            summary_df.to_excel(writer, sheet_name='Daily Summary', index=False)
-            
-            # Detailed invoices sheet
-            detailed_data = []
-            for invoice in invoices:
-                for item in invoice.items:
-                    detailed_data.append({
-                        'Date': invoice.payment_date.strftime('%Y-%m-%d') if invoice.payment_date else '',
-                        'Invoice Code': invoice.invoice_code,
-                        'Item Name': item.item_name,
-                        'Quantity': item.quantity,
-                        'Unit Price': float(item.unit_price) if item.unit_price else 0,
-                        'Total Price': float(item.total_price) if item.total_price else 0,
-                        'Invoice Total': float(invoice.total_amount) if invoice.total_amount else 0,
-                        'Created At': invoice.created_at.strftime('%Y-%m-%d %H:%M:%S')
-                    })
-            
-            detailed_df = pd.DataFrame(detailed_data)
-            detailed_df.to_excel(writer, sheet_name='Detailed Invoices', index=False)
+        # Item-level details are served by the streaming /export/excel endpoint
+        def write_summary():
+            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+                # Summary sheet
+                summary_df = pd.DataFrame(summary_table)
+                summary_df.to_excel(writer, sheet_name='Daily Summary', index=False)
+        
+        # openpyxl is CPU-bound, keep it off the event loop
+        await asyncio.to_thread(write_summary)
         
         # Determine period
         period = "All time"
@@ -138,18 +186,20 @@ async def get_daily_summary(
             "message": f"✅ Tạo báo cáo thành công! File Excel: {filename}"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Summary failed: {str(e)}")
 
 @router.get("/{invoice_id}", response_model=Invoice)
 async def get_invoice(
     invoice_id: int,
-    db_service: DatabaseService = Depends(get_database_service)
+    db_service: AsyncDatabaseService = Depends(get_database_service)
 ):
     """
     Get specific invoice by ID
     """
-    invoice = db_service.get_invoice(invoice_id)
+    invoice = await db_service.get_invoice(invoice_id)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     return invoice
\ No newline at end of file
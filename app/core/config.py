@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     # Database settings
@@ -11,11 +11,52 @@ class Settings(BaseSettings):
     
     # OCR settings
     TESSERACT_CMD: Optional[str] = None  # Path to tesseract executable if needed
+    OCR_MAX_CONCURRENCY: int = 2  # Marker conversions running at once
+    OCR_MAX_QUEUE: int = 8  # Requests allowed to wait for a free OCR slot
+    OCR_TIMEOUT: float = 300.0  # Seconds before an OCR request gives up
+    OCR_RETRY_AFTER: int = 30  # Retry-After seconds sent when the queue is full
+    OCR_TEMP_DIR: Optional[str] = None  # Where Marker inputs are written; defaults to /dev/shm when available
+    # Image preprocessing before OCR: any of crop, deskew, downscale, grayscale, denoise
+    OCR_PREPROCESS_STEPS: List[str] = ["downscale"]
+    OCR_TARGET_DPI: int = 200  # Downscale photos to the size of a page scanned at this DPI
+    OCR_PAGE_LONG_SIDE_INCHES: float = 11.69  # A4 long side
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_DIR: str = "cache/ocr"  # On-disk OCR result cache
+    OCR_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # LRU eviction above this size
+    OCR_BATCH_TIMEOUT: float = 1800.0  # Seconds before a batch OCR request gives up
+    MAX_BATCH_FILES: int = 50  # Files accepted by one batch upload
+    
+    # Line item parsing (keywords and header words match accent-insensitively)
+    ITEM_NAME_KEYWORDS: List[str] = ["phí"]  # Item names must contain one of these; empty accepts any name
+    ITEM_HEADER_WORDS: List[str] = ["stt", "description", "unit", "quantity", "price", "amount", "tên hàng", "đvt"]
+    ITEM_MIN_NAME_LENGTH: int = 5
+    
+    # OCR job settings
+    JOB_WORKER_CONCURRENCY: int = 1  # Jobs processed at once by the background worker
+    JOB_POLL_INTERVAL: float = 5.0  # Seconds between polls when the queue is empty
+    JOB_STALE_SECONDS: float = 900.0  # Running jobs older than this are requeued
+    JOB_MAX_ATTEMPTS: int = 3  # Stale jobs that already ran this many times are failed instead of requeued
     
     # File upload settings
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     
+    # Image blob storage: uploaded bytes live here, the images table keeps only metadata
+    BLOB_STORE_BACKEND: str = "local"  # local or s3
+    BLOB_STORE_DIR: str = "uploads/images"  # Root of the local content-addressed store
+    BLOB_S3_BUCKET: Optional[str] = None
+    BLOB_S3_PREFIX: str = "images/"
+    BLOB_S3_ENDPOINT_URL: Optional[str] = None  # For S3-compatible stores such as MinIO
+    THUMBNAIL_WIDTHS: List[int] = [160, 320, 640]  # WebP preview widths, rendered on first request
+    THUMBNAIL_QUALITY: int = 75
+    
+    # Bulk persistence (DatabaseService.bulk_create_invoices)
+    BULK_COPY_MIN_ROWS: int = 5000  # Item rows from which items are written with COPY instead of multi-row INSERTs (psycopg2)
+    
+    # Invoice search (GET /invoice/search)
+    SEARCH_MAX_CANDIDATES: int = 1000  # Most recent matches ranked per source, bounds broad queries
+    SEARCH_CODE_SIMILARITY: float = 0.6  # pg_trgm threshold for fuzzy invoice codes; lower is fuzzier but slower
+    
     class Config:
         env_file = ".env"
 
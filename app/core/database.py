@@ -1,12 +1,18 @@
+from contextlib import contextmanager
+from typing import Any, Dict
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .pool_stats import TimedAsyncQueuePool, TimedQueuePool
 
 # Create engine with better connection pool settings
 engine = create_engine(
     settings.DATABASE_URL,
     # Connection pool settings
+    poolclass=TimedQueuePool,
     pool_size=10,
     max_overflow=20,
     pool_timeout=30,
@@ -18,8 +24,32 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Request handlers use asyncpg, so a slow query waits on the socket instead of holding the event loop.
+# Background workers, scripts and exports keep the psycopg2 engine above (COPY needs it).
+async_engine = create_async_engine(
+    make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg"),
+    poolclass=TimedAsyncQueuePool,
+    pool_size=10,
+    max_overflow=20,
+    pool_timeout=30,
+    pool_recycle=3600,
+    pool_pre_ping=True,
+    connect_args={
+        "server_settings": {"statement_timeout": "600000"}  # 10 minutes timeout
+    }
+)
+# Objects are read after commit (response serialization), where an async session cannot reload them
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+def pool_stats() -> Dict[str, Any]:
+    """Checked-out connections and checkout waits of both pools"""
+    return {
+        "async": TimedAsyncQueuePool.stats.snapshot(async_engine.pool),
+        "sync": TimedQueuePool.stats.snapshot(engine.pool),
+    }
+
 def get_db():
     db = SessionLocal()
     try:
@@ -32,4 +62,22 @@ def get_db():
         try:
             db.close()
         except Exception as e:
-            print(f"Error closing database session: {str(e)}")
\ No newline at end of file
+            print(f"Error closing database session: {str(e)}")
+
+@contextmanager
+def session_scope():
+    """Short-lived session for work outside a request's dependency scope"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            print(f"Database session error: {str(e)}")
+            await db.rollback()
+            raise
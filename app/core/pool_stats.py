@@ -0,0 +1,62 @@
+import threading
+import time
+from typing import Any, Dict
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class PoolStats:
+    """Checkout counts and wait times of one connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self._timeouts += 1
+            else:
+                self._checkouts += 1
+                self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "avg_wait_seconds": round(self._total_wait / self._checkouts, 4) if self._checkouts else 0.0,
+                "max_wait_seconds": round(self._max_wait, 4),
+            }
+
+
+class _TimedCheckout:
+    """Times every checkout, including waiting for a free slot and opening a new connection"""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        start_time = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - start_time, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start_time)
+        return connection
+
+
+# Stats live on the class so they survive pool.recreate() (dispose, invalidation)
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    stats = PoolStats()
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    stats = PoolStats()
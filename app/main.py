@@ -1,14 +1,40 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
-from app.core.database import engine
+from app.core.database import async_engine, engine, pool_stats
 from app.models.invoice import Base
-from app.api.endpoints import ocr, search, image
+from app.services.model_registry import model_registry
+from app.services.ocr_executor import ocr_executor
+from app.services.job_worker import ocr_job_worker
+from app.api.endpoints import ocr, search, image, admin, export
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+async def _warm_up_models():
+    """Load the Marker models once per process, off the event loop"""
+    try:
+        await asyncio.to_thread(model_registry.load)
+    except Exception as e:
+        print(f"❌ OCR model warm-up failed: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start warm-up in the background so /health can report progress
+    warmup_task = asyncio.create_task(_warm_up_models())
+    ocr_job_worker.start()
+    yield
+    await ocr_job_worker.stop()
+    if not warmup_task.done():
+        warmup_task.cancel()
+    ocr_executor.shutdown()
+    await async_engine.dispose()
+
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.PROJECT_NAME,
     description="""
     ## Vietnamese Invoice OCR API
@@ -58,6 +84,13 @@ app.include_router(
     tags=["📸 OCR Processing"],
     responses={404: {"description": "Not found"}}
 )
+# Before search: its /{invoice_id} route would otherwise shadow /export
+app.include_router(
+    export.router,
+    prefix=f"{settings.API_V1_STR}",
+    tags=["📊 Invoice Management"],
+    responses={404: {"description": "Not found"}}
+)
 app.include_router(
     search.router, 
     prefix=f"{settings.API_V1_STR}",
@@ -71,10 +104,21 @@ app.include_router(
     responses={404: {"description": "Not found"}}
 )
 
+app.include_router(
+    admin.router,
+    prefix=f"{settings.API_V1_STR}/admin",
+    tags=["🛠️ Admin"],
+    responses={404: {"description": "Not found"}}
+)
+
 @app.get("/")
 async def root():
     return {"message": "Vietnamese Invoice OCR API", "version": "1.0.0"}
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    models = model_registry.status()
+    if not model_registry.is_ready:
+        status = "unhealthy" if model_registry.state == model_registry.FAILED else "loading"
+        return JSONResponse(status_code=503, content={"status": status, "models": models})
+    return {"status": "healthy", "models": models, "ocr": ocr_executor.stats(), "database": pool_stats()}
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, Text, ForeignKey, LargeBinary
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, Text, ForeignKey, LargeBinary, Float, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -9,8 +10,12 @@ class Image(Base):
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String(255), nullable=False)
     content_type = Column(String(100), nullable=False)
-    image_data = Column(LargeBinary, nullable=False)
+    # Bytes live in the blob store under storage_path; image_data only holds rows
+    # not yet moved by scripts/migrate_image_blobs.py and is never loaded by default
+    image_data = deferred(Column(LargeBinary, nullable=True))
+    storage_path = Column(String(255))
     file_size = Column(Integer, nullable=False)
+    content_hash = Column(String(64), unique=True, index=True)  # SHA-256 of the image bytes
     created_at = Column(DateTime, server_default=func.now())
     
     # Relationship with invoices
@@ -26,10 +31,17 @@ class Invoice(Base):
     created_at = Column(DateTime, server_default=func.now())
     image_id = Column(Integer, ForeignKey("images.id"))
     raw_text = Column(Text)
+    # Rows of cell text per Marker table block; re-extraction needs them to reproduce table-sourced items
+    item_tables = deferred(Column(JSONB))
     
     # Relationships
     image = relationship("Image", back_populates="invoices")
     items = relationship("InvoiceItem", back_populates="invoice", cascade="all, delete-orphan")
+    
+    # Keyset pagination of GET /invoice walks this index newest first
+    __table_args__ = (
+        Index("idx_invoices_created_at_id", created_at.desc(), id.desc()),
+    )
 
 class InvoiceItem(Base):
     __tablename__ = "invoice_items"
@@ -42,4 +54,33 @@ class InvoiceItem(Base):
     total_price = Column(Numeric(10, 2))
     
     # Relationship back to invoice
-    invoice = relationship("Invoice", back_populates="items")
\ No newline at end of file
+    invoice = relationship("Invoice", back_populates="items")
+
+class DailyRevenue(Base):
+    __tablename__ = "daily_revenue"
+    
+    # One row per payment day, kept in step with invoices by DatabaseService
+    day = Column(Date, primary_key=True)
+    invoice_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class OCRJob(Base):
+    __tablename__ = "ocr_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    filename = Column(String(255))
+    image_id = Column(Integer, ForeignKey("images.id", ondelete="SET NULL"))
+    invoice_id = Column(Integer, ForeignKey("invoices.id", ondelete="SET NULL"))
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, server_default=func.now())
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    
+    # Per-stage timings in seconds
+    queue_seconds = Column(Float)
+    ocr_seconds = Column(Float)
+    extraction_seconds = Column(Float)
+    save_seconds = Column(Float)
@@ -35,17 +35,102 @@ class Invoice(InvoiceBase):
     image_id: Optional[int] = None
     raw_text: str
     items: List[InvoiceItem] = []
+    deduplicated: bool = False  # True when served from an identical earlier upload
     
     class Config:
         from_attributes = True
 
+class InvoiceListEntry(BaseModel):
+    # Only the fields asked for with GET /invoice?fields= are set (and serialized)
+    id: int
+    invoice_code: Optional[str] = None
+    payment_date: Optional[datetime] = None
+    total_amount: Optional[Decimal] = None
+    created_at: Optional[datetime] = None
+    image_id: Optional[int] = None
+    raw_text: Optional[str] = None
+    items: Optional[List[InvoiceItem]] = None
+
+class InvoicePage(BaseModel):
+    invoices: List[InvoiceListEntry]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page; null on the last page
+
+class InvoiceSearchHit(InvoiceListEntry):
+    score: float  # Higher is better; above 1 for fuzzy invoice-code matches
+
+class InvoiceSearchPage(BaseModel):
+    results: List[InvoiceSearchHit]
+    next_offset: Optional[int] = None  # Pass back as ?offset= for the next page; null on the last page
+
 class InvoiceSearchRequest(BaseModel):
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
 
+class OCRTable(BaseModel):
+    rows: List[List[str]]  # Cell text per row, spans expanded so every row has every column
+    bbox: Optional[List[float]] = None
+
 class OCRResponse(BaseModel):
     invoice_code: Optional[str]
     payment_date: Optional[datetime]
     total_amount: Optional[Decimal]
     items: List[InvoiceItemCreate]
-    raw_text: str
\ No newline at end of file
+    raw_text: str
+    tables: List[OCRTable] = []  # Stored with the invoice so re-extraction sees the same input
+
+class OCRDocument(BaseModel):
+    text: str
+    tables: List[OCRTable] = []
+
+class BatchExtractResult(BaseModel):
+    filename: Optional[str] = None
+    success: bool
+    invoice: Optional[Invoice] = None
+    error: Optional[str] = None
+
+class BatchExtractResponse(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    ocr_seconds: Optional[float] = None
+    results: List[BatchExtractResult] = []
+
+class OCRJobTimings(BaseModel):
+    queue_seconds: Optional[float] = None
+    ocr_seconds: Optional[float] = None
+    extraction_seconds: Optional[float] = None
+    save_seconds: Optional[float] = None
+
+class OCRJob(BaseModel):
+    id: int
+    status: str
+    filename: Optional[str] = None
+    image_id: Optional[int] = None
+    invoice_id: Optional[int] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    timings: OCRJobTimings = OCRJobTimings()
+
+    @classmethod
+    def from_db(cls, job) -> "OCRJob":
+        return cls(
+            id=job.id,
+            status=job.status,
+            filename=job.filename,
+            image_id=job.image_id,
+            invoice_id=job.invoice_id,
+            error=job.error,
+            attempts=job.attempts or 0,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            timings=OCRJobTimings(
+                queue_seconds=job.queue_seconds,
+                ocr_seconds=job.ocr_seconds,
+                extraction_seconds=job.extraction_seconds,
+                save_seconds=job.save_seconds
+            )
+        )
@@ -0,0 +1,170 @@
+import os
+import tempfile
+from typing import BinaryIO, Iterator, Optional
+from app.core.config import settings
+
+
+class BlobStore:
+    """Content-addressed storage for uploaded image bytes; keys are derived from the SHA-256"""
+
+    @staticmethod
+    def key_for(content_hash: str) -> str:
+        # Two levels of 256-way sharding keep directories (and S3 listings) small
+        return f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}"
+
+    @classmethod
+    def derived_key(cls, content_hash: str, suffix: str) -> str:
+        """Key for a derivative (thumbnail, ...) stored alongside its original"""
+        return f"{cls.key_for(content_hash)}.{suffix}"
+
+    def put(self, content_hash: str, data: bytes) -> str:
+        """Store data under its content hash and return the storage key"""
+        return self.put_at(self.key_for(content_hash), data)
+
+    def put_at(self, key: str, data: bytes) -> str:
+        """Store data under an explicit key (idempotent) and return the key"""
+        raise NotImplementedError
+
+    def get(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def open(self, key: str) -> BinaryIO:
+        """Open a blob for streaming reads"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of a blob when the backend has one, for zero-copy file responses"""
+        return None
+
+    def iter_chunks(
+        self, key: str, start: int = 0, end: Optional[int] = None, chunk_size: int = 64 * 1024
+    ) -> Iterator[bytes]:
+        """Stream a blob, or its inclusive byte range start..end"""
+        with self.open(key) as blob:
+            if start:
+                blob.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = blob.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files under root/ab/cd/<sha256>"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def put_at(self, key: str, data: bytes) -> str:
+        path = self.local_path(key)
+        if os.path.exists(path):
+            return key  # Same key, same bytes: identical uploads share one file
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers never see a partial blob
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return key
+
+    def get(self, key: str) -> bytes:
+        with self.open(key) as blob:
+            return blob.read()
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.local_path(key), "rb")
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.local_path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3BlobStore(BlobStore):
+    """Blobs as objects in an S3-compatible bucket (AWS, MinIO, ...)"""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None):
+        try:
+            import boto3  # Optional dependency, only needed for this backend
+        except ImportError:
+            raise RuntimeError("BLOB_STORE_BACKEND=s3 requires boto3 (pip install boto3)")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def put_at(self, key: str, data: bytes) -> str:
+        if not self.exists(key):
+            self.client.put_object(Bucket=self.bucket, Key=self._object_key(key), Body=data)
+        return key
+
+    def get(self, key: str) -> bytes:
+        body = self.open(key)
+        try:
+            return body.read()
+        finally:
+            body.close()
+
+    def open(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))["Body"]
+
+    def iter_chunks(
+        self, key: str, start: int = 0, end: Optional[int] = None, chunk_size: int = 64 * 1024
+    ) -> Iterator[bytes]:
+        # Ranges are served by S3 itself, only the requested bytes are transferred
+        extra = {}
+        if start or end is not None:
+            extra["Range"] = f"bytes={start}-{'' if end is None else end}"
+        body = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key), **extra)["Body"]
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError:
+            return False
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+
+def create_blob_store() -> BlobStore:
+    if settings.BLOB_STORE_BACKEND == "local":
+        return LocalBlobStore(settings.BLOB_STORE_DIR)
+    if settings.BLOB_STORE_BACKEND == "s3":
+        if not settings.BLOB_S3_BUCKET:
+            raise ValueError("BLOB_S3_BUCKET must be set when BLOB_STORE_BACKEND=s3")
+        return S3BlobStore(settings.BLOB_S3_BUCKET, settings.BLOB_S3_PREFIX, settings.BLOB_S3_ENDPOINT_URL)
+    raise ValueError(f"Unknown BLOB_STORE_BACKEND: {settings.BLOB_STORE_BACKEND}")
+
+
+blob_store = create_blob_store()
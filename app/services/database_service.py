@@ -1,69 +1,232 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
-from app.models.invoice import Invoice, InvoiceItem, Image
+import asyncio
+import csv
+import hashlib
+import io
+from decimal import Decimal
+from sqlalchemy import delete, insert, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.sql import func
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+from datetime import date, datetime, timedelta
+from app.core.config import settings
+from app.models.invoice import DailyRevenue, Invoice, InvoiceItem, Image, OCRJob
 from app.schemas.invoice import InvoiceCreate, OCRResponse
+from app.services.blob_store import BlobStore, blob_store
+
+RevenueDeltas = Dict[date, Tuple[int, Decimal]]
+T = TypeVar("T")
+
+# Fields selectable in the invoice listing; raw_text and items are opt-in because they dominate row size
+LIST_FIELDS = ("id", "invoice_code", "payment_date", "total_amount", "created_at", "image_id", "raw_text", "items")
+DEFAULT_LIST_FIELDS = ("id", "invoice_code", "payment_date", "total_amount", "created_at", "image_id")
+ITEM_COLUMNS = ("invoice_id", "item_name", "quantity", "unit_price", "total_price")
+
+def add_revenue_delta(
+    deltas: RevenueDeltas, payment_date: Optional[datetime], total_amount: Optional[Decimal], sign: int = 1
+) -> None:
+    """Accumulate one invoice's contribution (sign=-1 to remove it) to the daily rollup"""
+    if payment_date is None:
+        return  # Undated invoices never appear in the daily summary
+    day = payment_date.date() if isinstance(payment_date, datetime) else payment_date
+    count, amount = deltas.get(day, (0, Decimal(0)))
+    deltas[day] = (count + sign, amount + sign * Decimal(total_amount or 0))
+
+# Ranked search over the generated search_vector columns and the invoice_code trigram index
+# (database/migrations/007_add_invoice_search.sql). Each source contributes at most :candidates
+# of its most recent matches, ranked only after that cut, so broad terms stay as cheap as rare ones.
+# The tsquery is written inline rather than in a CTE: it is then folded to a constant at plan time
+# and the planner picks, per query, between a backward id scan (common terms) and a GIN bitmap (rare).
+# Full-text ranks are normalized into [0, 1); invoice-code hits (fuzzy or substring) score
+# 1 + similarity and come first.
+SEARCH_SQL = text("""
+WITH hits AS (
+    SELECT c.invoice_id, ts_rank_cd(c.search_vector, websearch_to_tsquery('simple', f_unaccent(:q)), 32) AS score
+    FROM (
+        SELECT i.id AS invoice_id, i.search_vector
+        FROM invoices i
+        WHERE i.search_vector @@ websearch_to_tsquery('simple', f_unaccent(:q))
+        ORDER BY i.id DESC
+        LIMIT :candidates
+    ) c
+    UNION ALL
+    SELECT c.invoice_id, ts_rank_cd(c.search_vector, websearch_to_tsquery('simple', f_unaccent(:q)), 32)
+    FROM (
+        SELECT it.invoice_id, it.search_vector
+        FROM invoice_items it
+        WHERE it.search_vector @@ websearch_to_tsquery('simple', f_unaccent(:q))
+        ORDER BY it.invoice_id DESC
+        LIMIT :candidates
+    ) c
+    UNION ALL
+    SELECT c.invoice_id, 1 + c.similarity
+    FROM (
+        SELECT i.id AS invoice_id, similarity(lower(i.invoice_code), lower(:q)) AS similarity
+        FROM invoices i
+        WHERE lower(i.invoice_code) % lower(:q)
+            -- similarity >= t needs a trigram count within [t * n, n / t] of the query's n (exact
+            -- numeric bounds). Short queries made of trigrams every code shares (a serial like
+            -- 1C23TDM) would otherwise recheck the whole table; this range is a BitmapAnd away
+            AND array_length(show_trgm(lower(i.invoice_code)), 1)
+                BETWEEN ceil(array_length(show_trgm(lower(:q)), 1) * CAST(:threshold AS numeric))::int
+                AND floor(array_length(show_trgm(lower(:q)), 1) / CAST(:threshold AS numeric))::int
+        ORDER BY similarity DESC, i.id DESC
+        LIMIT :candidates
+    ) c
+    UNION ALL
+    SELECT c.invoice_id, 1 + similarity(lower(c.invoice_code), lower(:q))
+    FROM (
+        SELECT i.id AS invoice_id, i.invoice_code
+        FROM invoices i
+        WHERE lower(i.invoice_code) LIKE :code_pattern
+        ORDER BY i.id DESC
+        LIMIT :candidates
+    ) c
+), ranked AS (
+    SELECT invoice_id, max(score) AS score
+    FROM hits
+    WHERE invoice_id IS NOT NULL
+    GROUP BY invoice_id
+    ORDER BY score DESC, invoice_id DESC
+    LIMIT :limit OFFSET :offset
+)
+SELECT i.id, i.invoice_code, i.payment_date, i.total_amount, i.created_at, i.image_id, r.score
+FROM ranked r
+JOIN invoices i ON i.id = r.invoice_id
+ORDER BY r.score DESC, i.id DESC
+""")
 
 class DatabaseService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, blobs: BlobStore = blob_store):
         self.db = db
+        self.blobs = blobs
     
     def create_image(self, image_info: dict) -> Image:
-        """Create image record in database"""
+        """Create image record in database, reusing the row of an identical upload"""
+        # Blobs are content-addressed, so every stored image needs its hash
+        content_hash = image_info.get("content_hash") or hashlib.sha256(image_info["image_data"]).hexdigest()
+        existing = self.get_image_by_hash(content_hash)
+        if existing:
+            return existing
+        
         try:
+            # Bytes go to the blob store first; the row only records where they are
+            storage_path = image_info.get("storage_path") or self.blobs.put(content_hash, image_info["image_data"])
             db_image = Image(
                 filename=image_info["filename"],
                 content_type=image_info["content_type"],
-                image_data=image_info["image_data"],
-                file_size=image_info["file_size"]
+                storage_path=storage_path,
+                file_size=image_info["file_size"],
+                content_hash=content_hash
             )
             
             self.db.add(db_image)
             self.db.commit()
             self.db.refresh(db_image)
             return db_image
+        except IntegrityError:
+            # A concurrent upload of the same content won the unique index
+            self.db.rollback()
+            existing = self.get_image_by_hash(content_hash)
+            if existing:
+                return existing
+            raise
         except Exception as e:
             self.db.rollback()
             print(f"Database error creating image: {str(e)}")
             raise
     
-    def create_invoice_from_ocr(self, ocr_response: OCRResponse, image_id: int) -> Invoice:
+    def get_image_by_hash(self, content_hash: str) -> Optional[Image]:
+        """Get image by SHA-256 content hash"""
+        return self.db.query(Image).filter(Image.content_hash == content_hash).first()
+    
+    def get_invoices_by_content_hash(self, content_hash: str) -> List[Invoice]:
+        """Get invoices already extracted from an identical upload"""
+        return (
+            self.db.query(Invoice)
+            .options(selectinload(Invoice.items))  # Returned to the client with their items
+            .join(Image, Invoice.image_id == Image.id)
+            .filter(Image.content_hash == content_hash)
+            .order_by(Invoice.id)
+            .all()
+        )
+    
+    def create_invoice_from_ocr(self, ocr_response: OCRResponse, image_id: Optional[int]) -> Invoice:
         """Create invoice from OCR response"""
+        invoice_id = self.bulk_create_invoices([(ocr_response, image_id)])[0]
+        return self.get_invoice(invoice_id)
+    
+    def bulk_create_invoices(self, invoices: Sequence[Tuple[OCRResponse, Optional[int]]]) -> List[int]:
+        """Insert invoices (OCR response, image id) with their items in one transaction, ids in input order
+        
+        Invoices go in as multi-row INSERT ... RETURNING, items as multi-row INSERTs, or as one
+        COPY when there are at least BULK_COPY_MIN_ROWS of them and the driver is psycopg2.
+        """
+        if not invoices:
+            return []
         try:
-            # Create invoice
-            db_invoice = Invoice(
-                invoice_code=ocr_response.invoice_code,
-                payment_date=ocr_response.payment_date,
-                total_amount=ocr_response.total_amount,
-                image_id=image_id,
-                raw_text=ocr_response.raw_text
-            )
+            invoice_table = Invoice.__table__
+            invoice_ids = self.db.execute(
+                insert(invoice_table).returning(invoice_table.c.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "invoice_code": ocr_response.invoice_code,
+                        "payment_date": ocr_response.payment_date,
+                        "total_amount": ocr_response.total_amount,
+                        "image_id": image_id,
+                        "raw_text": ocr_response.raw_text,
+                        "item_tables": [table.rows for table in ocr_response.tables],
+                    }
+                    for ocr_response, image_id in invoices
+                ]
+            ).scalars().all()
             
-            self.db.add(db_invoice)
-            self.db.flush()  # Get the ID
+            item_rows = [
+                (invoice_id, item.item_name, item.quantity, item.unit_price, item.total_price)
+                for invoice_id, (ocr_response, _) in zip(invoice_ids, invoices)
+                for item in ocr_response.items
+            ]
+            if len(item_rows) >= settings.BULK_COPY_MIN_ROWS and self.db.get_bind().dialect.driver == "psycopg2":
+                self._copy_items(item_rows)
+            elif item_rows:
+                self.db.execute(insert(InvoiceItem.__table__), [dict(zip(ITEM_COLUMNS, row)) for row in item_rows])
             
-            # Create invoice items
-            for item in ocr_response.items:
-                db_item = InvoiceItem(
-                    invoice_id=db_invoice.id,
-                    item_name=item.item_name,
-                    quantity=item.quantity,
-                    unit_price=item.unit_price,
-                    total_price=item.total_price
-                )
-                self.db.add(db_item)
+            # The rollup rows are bumped in the same transaction, so they never drift from invoices
+            deltas = {}
+            for ocr_response, _ in invoices:
+                add_revenue_delta(deltas, ocr_response.payment_date, ocr_response.total_amount)
+            self.adjust_daily_revenue(deltas)
             
             self.db.commit()
-            self.db.refresh(db_invoice)
-            return db_invoice
+            return list(invoice_ids)
         except Exception as e:
             self.db.rollback()
-            print(f"Database error creating invoice: {str(e)}")
+            print(f"Database error creating invoices: {str(e)}")
             raise
     
+    def _copy_items(self, item_rows: List[tuple]) -> None:
+        """COPY item rows (ITEM_COLUMNS order) into invoice_items (psycopg2)"""
+        buffer = io.StringIO()
+        # Strings quoted, so '' stays an empty string and only None becomes NULL
+        csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(item_rows)
+        buffer.seek(0)
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY invoice_items ({', '.join(ITEM_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+    
+    def get_invoices(self, invoice_ids: Sequence[int]) -> List[Invoice]:
+        """Invoices by ID with their items, in the order given"""
+        invoices = self.db.query(Invoice).options(selectinload(Invoice.items)).filter(Invoice.id.in_(invoice_ids)).all()
+        by_id = {invoice.id: invoice for invoice in invoices}
+        return [by_id[invoice_id] for invoice_id in invoice_ids if invoice_id in by_id]
+    
     def get_invoice(self, invoice_id: int) -> Optional[Invoice]:
-        """Get invoice by ID"""
-        return self.db.query(Invoice).filter(Invoice.id == invoice_id).first()
+        """Get invoice by ID, with its items"""
+        return self.db.query(Invoice).options(selectinload(Invoice.items)).filter(Invoice.id == invoice_id).first()
     
     def get_invoices_by_date_range(
         self, 
@@ -80,6 +243,74 @@ class DatabaseService:
         
         return query.order_by(Invoice.payment_date.desc()).all()
     
+    def list_invoices(
+        self,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        fields: Sequence[str] = DEFAULT_LIST_FIELDS
+    ) -> List[Dict[str, Any]]:
+        """One page of invoices, newest first, as dicts holding only the requested fields
+        
+        Keyset pagination: after is the (created_at, id) of the previous page's last row,
+        so every page is an index range scan on (created_at, id) instead of an OFFSET.
+        """
+        column_names = [name for name in LIST_FIELDS if name in fields and name != "items"]
+        # created_at and id are always read, the next cursor is built from them
+        selected = list(dict.fromkeys(["id", "created_at", *column_names]))
+        query = select(*[getattr(Invoice, name) for name in selected])
+        
+        if after:
+            query = query.where(tuple_(Invoice.created_at, Invoice.id) < tuple_(*after))
+        if start_date:
+            query = query.where(Invoice.payment_date >= start_date)
+        if end_date:
+            query = query.where(Invoice.payment_date <= end_date)
+        query = query.order_by(Invoice.created_at.desc(), Invoice.id.desc()).limit(limit)
+        
+        rows = [dict(row._mapping) for row in self.db.execute(query)]
+        if "items" in fields and rows:
+            items_by_invoice = {row["id"]: [] for row in rows}
+            item_rows = self.db.execute(
+                select(InvoiceItem.__table__)
+                .where(InvoiceItem.invoice_id.in_(list(items_by_invoice)))
+                .order_by(InvoiceItem.invoice_id, InvoiceItem.id)
+            )
+            for item in item_rows:
+                items_by_invoice[item.invoice_id].append(dict(item._mapping))
+            for row in rows:
+                row["items"] = items_by_invoice[row["id"]]
+        return rows
+    
+    def search_invoices(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """Invoices matching query in their code, raw text or item names, best match first
+        
+        Accent-insensitive ("phi dich vu" finds "phí dịch vụ"), supports websearch syntax
+        ("quoted phrases", -excluded, or) and fuzzy invoice codes. Served from GIN indexes only.
+        """
+        # Invoice codes share most trigrams (same serial, zero-padded numbers), so the default
+        # 0.3 threshold lets almost every code through the index. Server-side prepared statements
+        # (asyncpg) would also switch to a generic plan that cannot see the tsquery; both settings
+        # are scoped to this transaction
+        self.db.execute(
+            text(
+                "SELECT set_config('pg_trgm.similarity_threshold', :threshold, true), "
+                "set_config('plan_cache_mode', 'force_custom_plan', true)"
+            ),
+            {"threshold": str(settings.SEARCH_CODE_SIMILARITY)}
+        )
+        escaped = query.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        rows = self.db.execute(SEARCH_SQL, {
+            "q": query,
+            "code_pattern": f"%{escaped}%",
+            "threshold": Decimal(str(settings.SEARCH_CODE_SIMILARITY)),
+            "candidates": settings.SEARCH_MAX_CANDIDATES,
+            "limit": limit,
+            "offset": offset,
+        })
+        return [dict(row._mapping) for row in rows]
+    
     def get_all_invoices(self) -> List[Invoice]:
         """Get all invoices"""
         return self.db.query(Invoice).order_by(Invoice.created_at.desc()).all()
@@ -88,11 +319,261 @@ class DatabaseService:
         """Get image by ID"""
         return self.db.query(Image).filter(Image.id == image_id).first()
     
+    def read_image_data(self, db_image: Image) -> bytes:
+        """Image bytes from the blob store, or from the legacy BYTEA column for unmigrated rows"""
+        if db_image.storage_path:
+            return self.blobs.get(db_image.storage_path)
+        return db_image.image_data
+    
+    def get_image_data(self, image_id: int) -> Optional[bytes]:
+        """Get image bytes by image ID"""
+        db_image = self.get_image(image_id)
+        return self.read_image_data(db_image) if db_image else None
+    
     def delete_invoice(self, invoice_id: int) -> bool:
         """Delete invoice by ID"""
         invoice = self.get_invoice(invoice_id)
         if invoice:
-            self.db.delete(invoice)
-            self.db.commit()
+            try:
+                deltas = {}
+                add_revenue_delta(deltas, invoice.payment_date, invoice.total_amount, sign=-1)
+                self.adjust_daily_revenue(deltas)
+                self.db.delete(invoice)
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                print(f"Database error deleting invoice: {str(e)}")
+                raise
             return True
-        return False
\ No newline at end of file
+        return False
+    
+    def adjust_daily_revenue(self, deltas: RevenueDeltas) -> None:
+        """Apply per-day count/amount deltas to the daily_revenue rollup, inside the caller's transaction"""
+        rows = [
+            {"day": day, "invoice_count": count, "total_amount": amount}
+            for day, (count, amount) in sorted(deltas.items())  # Fixed lock order across writers
+            if count or amount
+        ]
+        if not rows:
+            return
+        stmt = pg_insert(DailyRevenue).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyRevenue.day],
+            set_={
+                "invoice_count": DailyRevenue.invoice_count + stmt.excluded.invoice_count,
+                "total_amount": DailyRevenue.total_amount + stmt.excluded.total_amount,
+                "updated_at": func.now(),
+            },
+        )
+        self.db.execute(stmt)
+    
+    def get_daily_revenue(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[DailyRevenue]:
+        """Per-day invoice count and total from the rollup, both bounds inclusive"""
+        query = self.db.query(DailyRevenue).filter(DailyRevenue.invoice_count > 0)
+        if start_date:
+            query = query.filter(DailyRevenue.day >= start_date)
+        if end_date:
+            query = query.filter(DailyRevenue.day <= end_date)
+        return query.order_by(DailyRevenue.day).all()
+    
+    def compute_daily_revenue(self) -> List[Tuple[date, int, Decimal]]:
+        """Per-day count and total aggregated straight from invoices with GROUP BY"""
+        day = func.date(Invoice.payment_date)
+        return self.db.execute(
+            select(day, func.count(), func.coalesce(func.sum(Invoice.total_amount), 0))
+            .where(Invoice.payment_date.isnot(None))
+            .group_by(day)
+            .order_by(day)
+        ).all()
+    
+    def rebuild_daily_revenue(self) -> int:
+        """Recompute the whole rollup from invoices; returns the number of days"""
+        try:
+            # Block invoice writes for the duration so no delta is lost between delete and insert
+            self.db.execute(text("LOCK TABLE invoices IN SHARE MODE"))
+            self.db.execute(delete(DailyRevenue))
+            day = func.date(Invoice.payment_date)
+            self.db.execute(
+                insert(DailyRevenue).from_select(
+                    ["day", "invoice_count", "total_amount"],
+                    select(day, func.count(), func.coalesce(func.sum(Invoice.total_amount), 0))
+                    .where(Invoice.payment_date.isnot(None))
+                    .group_by(day),
+                )
+            )
+            days = self.db.query(func.count()).select_from(DailyRevenue).scalar()
+            self.db.commit()
+            return days
+        except Exception as e:
+            self.db.rollback()
+            print(f"Database error rebuilding daily revenue: {str(e)}")
+            raise
+    
+    def create_job(self, image_id: int, filename: str, invoice_id: Optional[int] = None) -> OCRJob:
+        """Create a queued OCR job for a stored image, or a finished one when the invoice is known"""
+        try:
+            db_job = OCRJob(status="queued", image_id=image_id, filename=filename)
+            if invoice_id is not None:
+                db_job.status = "succeeded"
+                db_job.invoice_id = invoice_id
+                db_job.finished_at = func.now()
+            self.db.add(db_job)
+            self.db.commit()
+            self.db.refresh(db_job)
+            return db_job
+        except Exception as e:
+            self.db.rollback()
+            print(f"Database error creating OCR job: {str(e)}")
+            raise
+    
+    def get_job(self, job_id: int) -> Optional[OCRJob]:
+        """Get OCR job by ID"""
+        return self.db.query(OCRJob).filter(OCRJob.id == job_id).first()
+    
+    def claim_next_job(self) -> Optional[OCRJob]:
+        """Atomically move the oldest queued job to running"""
+        try:
+            job = (
+                self.db.query(OCRJob)
+                .filter(OCRJob.status == "queued")
+                .order_by(OCRJob.id)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if not job:
+                self.db.rollback()
+                return None
+            
+            job.status = "running"
+            job.attempts = (job.attempts or 0) + 1
+            job.started_at = func.now()
+            job.error = None
+            # Flush and read back the server timestamps, so queue_seconds goes in with the claim
+            self.db.flush()
+            self.db.refresh(job, ["created_at", "started_at"])
+            if job.created_at and job.started_at:
+                job.queue_seconds = (job.started_at - job.created_at).total_seconds()
+            self.db.commit()
+            # The commit expired the job; load it again so callers can use it after the session closes
+            self.db.refresh(job)
+            return job
+        except Exception as e:
+            self.db.rollback()
+            print(f"Database error claiming OCR job: {str(e)}")
+            raise
+    
+    def update_job(self, job_id: int, finished: bool = False, **fields) -> Optional[OCRJob]:
+        """Update status, timings or result of an OCR job"""
+        try:
+            job = self.get_job(job_id)
+            if not job:
+                return None
+            for key, value in fields.items():
+                setattr(job, key, value)
+            if finished:
+                job.finished_at = func.now()
+            self.db.commit()
+            self.db.refresh(job)
+            return job
+        except Exception as e:
+            self.db.rollback()
+            print(f"Database error updating OCR job: {str(e)}")
+            raise
+    
+    def requeue_stale_jobs(self, stale_seconds: float, max_attempts: int) -> int:
+        """Put jobs left running by a crashed worker back into the queue, failing those out of attempts"""
+        try:
+            cutoff = func.now() - timedelta(seconds=stale_seconds)
+            stale = self.db.query(OCRJob).filter(OCRJob.status == "running", OCRJob.started_at < cutoff)
+            # A job that kills or hangs its worker every time would otherwise hold a slot forever
+            failed = stale.filter(OCRJob.attempts >= max_attempts).update(
+                {
+                    OCRJob.status: "failed",
+                    OCRJob.finished_at: func.now(),
+                    OCRJob.error: f"Worker stopped responding on each of {max_attempts} attempts",
+                },
+                synchronize_session=False,
+            )
+            count = stale.filter(OCRJob.attempts < max_attempts).update(
+                {OCRJob.status: "queued", OCRJob.started_at: None}, synchronize_session=False
+            )
+            self.db.commit()
+            if failed:
+                print(f"⚠️ Failed {failed} stale OCR jobs after {max_attempts} attempts")
+            return count
+        except Exception as e:
+            self.db.rollback()
+            print(f"Database error requeuing OCR jobs: {str(e)}")
+            raise
+
+
+class AsyncDatabaseService:
+    """DatabaseService for request handlers: the same queries over an asyncpg AsyncSession
+
+    Each call runs the sync implementation through AsyncSession.run_sync, so every round trip
+    awaits the socket and other requests keep being served while a query is slow. Each call is
+    also its own transaction, so a connection is only checked out while a call runs. Returned
+    objects are fully loaded; a lazy load after run_sync returns would raise.
+    """
+    
+    def __init__(self, session: AsyncSession, blobs: BlobStore = blob_store):
+        self.session = session
+        self.blobs = blobs
+    
+    async def _run(self, call: Callable[[DatabaseService], T]) -> T:
+        # One transaction per call: the connection goes back to the pool as soon as the call
+        # returns, never held across OCR or other awaits. expire_on_commit=False keeps results loaded
+        try:
+            result = await self.session.run_sync(lambda db: call(DatabaseService(db, self.blobs)))
+        except Exception:
+            await self.session.rollback()
+            raise
+        await self.session.commit()
+        return result
+    
+    async def create_image(self, image_info: dict) -> Image:
+        """Create image record, writing the blob on a worker thread first"""
+        content_hash = image_info.get("content_hash") or hashlib.sha256(image_info["image_data"]).hexdigest()
+        # Hand the stored path on so DatabaseService.create_image doesn't write the blob again on the loop
+        storage_path = await asyncio.to_thread(self.blobs.put, content_hash, image_info["image_data"])
+        image_info = {**image_info, "content_hash": content_hash, "storage_path": storage_path}
+        return await self._run(lambda service: service.create_image(image_info))
+    
+    async def get_invoices_by_content_hash(self, content_hash: str) -> List[Invoice]:
+        return await self._run(lambda service: service.get_invoices_by_content_hash(content_hash))
+    
+    async def create_invoice_from_ocr(self, ocr_response: OCRResponse, image_id: Optional[int]) -> Invoice:
+        return await self._run(lambda service: service.create_invoice_from_ocr(ocr_response, image_id))
+    
+    async def bulk_create_invoices(self, invoices: Sequence[Tuple[OCRResponse, Optional[int]]]) -> List[int]:
+        return await self._run(lambda service: service.bulk_create_invoices(invoices))
+    
+    async def get_invoices(self, invoice_ids: Sequence[int]) -> List[Invoice]:
+        return await self._run(lambda service: service.get_invoices(invoice_ids))
+    
+    async def get_invoice(self, invoice_id: int) -> Optional[Invoice]:
+        return await self._run(lambda service: service.get_invoice(invoice_id))
+    
+    async def list_invoices(self, limit: int, **kwargs) -> List[Dict[str, Any]]:
+        return await self._run(lambda service: service.list_invoices(limit, **kwargs))
+    
+    async def search_invoices(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        return await self._run(lambda service: service.search_invoices(query, limit=limit, offset=offset))
+    
+    async def get_daily_revenue(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[DailyRevenue]:
+        return await self._run(lambda service: service.get_daily_revenue(start_date, end_date))
+    
+    async def get_image(self, image_id: int) -> Optional[Image]:
+        return await self._run(lambda service: service.get_image(image_id))
+    
+    async def read_image_data(self, db_image: Image) -> bytes:
+        """Image bytes from the blob store (worker thread), or the deferred legacy column"""
+        if db_image.storage_path:
+            return await asyncio.to_thread(self.blobs.get, db_image.storage_path)
+        return await self._run(lambda service: service.read_image_data(db_image))
+    
+    async def create_job(self, image_id: int, filename: str, invoice_id: Optional[int] = None) -> OCRJob:
+        return await self._run(lambda service: service.create_job(image_id, filename, invoice_id=invoice_id))
+    
+    async def get_job(self, job_id: int) -> Optional[OCRJob]:
+        return await self._run(lambda service: service.get_job(job_id))
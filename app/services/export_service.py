@@ -0,0 +1,226 @@
+import os
+import threading
+from datetime import datetime
+from typing import BinaryIO, Iterator, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import defer, selectinload, sessionmaker
+from app.core.database import SessionLocal
+from app.models.invoice import Invoice, InvoiceItem
+
+DETAIL_COLUMNS = [
+    'Date', 'Invoice Code', 'Item Name', 'Quantity', 'Unit Price', 'Total Price', 'Invoice Total', 'Created At'
+]
+
+# Columnar exports: (column, arrow type name) per table; "items" is flattened, one row per item
+COLUMNAR_TABLES = {
+    "items": [
+        (Invoice.id.label("invoice_id"), "int64"),
+        (Invoice.invoice_code, "string"),
+        (Invoice.payment_date, "timestamp"),
+        (Invoice.total_amount.label("invoice_total"), "decimal_12_2"),
+        (Invoice.created_at, "timestamp"),
+        (InvoiceItem.id.label("item_id"), "int64"),
+        (InvoiceItem.item_name, "string"),
+        (InvoiceItem.quantity, "int32"),
+        (InvoiceItem.unit_price, "decimal_10_2"),
+        (InvoiceItem.total_price, "decimal_10_2"),
+    ],
+    "invoices": [
+        (Invoice.id, "int64"),
+        (Invoice.invoice_code, "string"),
+        (Invoice.payment_date, "timestamp"),
+        (Invoice.total_amount, "decimal_12_2"),
+        (Invoice.created_at, "timestamp"),
+        (Invoice.image_id, "int64"),
+    ],
+}
+
+# format -> (media type, file extension)
+COLUMNAR_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+
+
+def _arrow_type(pa, name: str):
+    if name.startswith("decimal_"):
+        _, precision, scale = name.split("_")
+        return pa.decimal128(int(precision), int(scale))
+    if name == "timestamp":
+        return pa.timestamp("us")
+    return getattr(pa, name)()
+
+
+def detail_rows(invoice: Invoice) -> Iterator[list]:
+    """One row per invoice item, in DETAIL_COLUMNS order"""
+    for item in invoice.items:
+        yield [
+            invoice.payment_date.strftime('%Y-%m-%d') if invoice.payment_date else '',
+            invoice.invoice_code,
+            item.item_name,
+            item.quantity,
+            float(item.unit_price) if item.unit_price else 0,
+            float(item.total_price) if item.total_price else 0,
+            float(invoice.total_amount) if invoice.total_amount else 0,
+            invoice.created_at.strftime('%Y-%m-%d %H:%M:%S') if invoice.created_at else '',
+        ]
+
+
+class ExportService:
+    """Stream invoices with their items out of the database without holding them all in memory"""
+
+    def __init__(self, session_factory: sessionmaker, batch_size: int = 500, csv_block_size: int = 8 * 1024 * 1024):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        # CSV bytes parsed per record batch; each batch becomes one Parquet row group, which should not be tiny
+        self.csv_block_size = csv_block_size
+
+    def iter_invoices(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Iterator[Invoice]:
+        """Invoices in range, newest payment first, read through a server-side cursor"""
+        query = (
+            select(Invoice)
+            # Items arrive with one IN query per batch, raw_text is never needed here
+            .options(selectinload(Invoice.items), defer(Invoice.raw_text))
+            .order_by(Invoice.payment_date.desc(), Invoice.id.desc())
+            .execution_options(yield_per=self.batch_size)
+        )
+        if start_date:
+            query = query.where(Invoice.payment_date >= start_date)
+        if end_date:
+            query = query.where(Invoice.payment_date <= end_date)
+
+        # Own session: the export outlives the request and runs on a worker thread.
+        # The identity map holds clean objects weakly, so finished batches are freed as we go
+        with self.session_factory() as db:
+            yield from db.execute(query).scalars()
+
+    def iter_detail_rows(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Iterator[list]:
+        for invoice in self.iter_invoices(start_date, end_date):
+            yield from detail_rows(invoice)
+
+    def write_excel(self, output: BinaryIO, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> int:
+        """Write the Detailed Invoices workbook to output and return the number of item rows"""
+        from openpyxl import Workbook
+
+        # Write-only mode spools rows to a temp file instead of keeping cell objects in memory
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Detailed Invoices')
+        sheet.append(DETAIL_COLUMNS)
+        rows = 0
+        for row in self.iter_detail_rows(start_date, end_date):
+            sheet.append(row)
+            rows += 1
+        # Nothing reaches output before this: save() assembles the zip from the spooled sheet
+        workbook.save(output)
+        print(f"📁 Exported {rows} invoice item rows to Excel")
+        return rows
+
+    def _columnar_query(self, table: str, start_date: Optional[datetime], end_date: Optional[datetime]):
+        columns = [column for column, _ in COLUMNAR_TABLES[table]]
+        query = select(*columns)
+        if table == "items":
+            # Outer join keeps invoices without items, so invoice totals stay complete
+            query = query.select_from(Invoice).outerjoin(InvoiceItem, InvoiceItem.invoice_id == Invoice.id)
+            query = query.order_by(Invoice.id, InvoiceItem.id)
+        else:
+            query = query.order_by(Invoice.id)
+        if start_date:
+            query = query.where(Invoice.payment_date >= start_date)
+        if end_date:
+            query = query.where(Invoice.payment_date <= end_date)
+        return query
+
+    @staticmethod
+    def _copy_csv(conn, query, sink: BinaryIO) -> None:
+        """Run query as COPY ... TO STDOUT (CSV with header) into sink (psycopg2)"""
+        compiled = query.compile(dialect=conn.dialect)
+        cursor = conn.connection.cursor()
+        try:
+            statement = cursor.mogrify(str(compiled), compiled.params).decode()
+            cursor.copy_expert(f"COPY ({statement}) TO STDOUT WITH (FORMAT csv, HEADER)", sink)
+        finally:
+            cursor.close()
+
+    def iter_record_batches(
+        self, table: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None
+    ):
+        """Arrow record batches parsed from a COPY stream, so rows never become Python objects"""
+        import pyarrow.csv as pa_csv  # Only needed for columnar exports
+
+        schema = self.arrow_schema(table)
+        query = self._columnar_query(table, start_date, end_date)
+        with self.session_factory() as db:
+            conn = db.connection()
+            # COPY pushes into a pipe on its own thread while Arrow parses the other end block by block
+            read_fd, write_fd = os.pipe()
+            copy_errors = []
+
+            def copy():
+                try:
+                    with os.fdopen(write_fd, "wb") as pipe:
+                        self._copy_csv(conn, query, pipe)
+                except BaseException as e:
+                    copy_errors.append(e)
+
+            copier = threading.Thread(target=copy, name="export-copy", daemon=True)
+            copier.start()
+            try:
+                # Closing the read end early (client gone) makes COPY fail with a broken pipe and stop
+                with os.fdopen(read_fd, "rb") as pipe:
+                    reader = pa_csv.open_csv(
+                        pipe,
+                        read_options=pa_csv.ReadOptions(block_size=self.csv_block_size),
+                        convert_options=pa_csv.ConvertOptions(
+                            column_types=schema,
+                            strings_can_be_null=True,  # COPY writes NULL unquoted, '' as ""
+                            quoted_strings_can_be_null=False,
+                        ),
+                    )
+                    yield from reader
+            finally:
+                copier.join()
+                if copy_errors:
+                    # An interrupted COPY leaves the connection mid-protocol
+                    conn.invalidate()
+            if copy_errors:
+                raise copy_errors[0]
+
+    @staticmethod
+    def arrow_schema(table: str):
+        import pyarrow as pa
+
+        return pa.schema([
+            pa.field(column.key, _arrow_type(pa, type_name)) for column, type_name in COLUMNAR_TABLES[table]
+        ])
+
+    def write_columnar(
+        self, output: BinaryIO, file_format: str, table: str = "items",
+        start_date: Optional[datetime] = None, end_date: Optional[datetime] = None
+    ) -> int:
+        """Write table as parquet, arrow (IPC stream) or csv to output, one record batch at a time"""
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+        import pyarrow.parquet as pq
+
+        schema = self.arrow_schema(table)
+        sink = pa.PythonFile(output, mode="w")
+        if file_format == "parquet":
+            writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        elif file_format == "arrow":
+            writer = pa.ipc.new_stream(sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+        elif file_format == "csv":
+            writer = pa_csv.CSVWriter(sink, schema)
+        else:
+            raise ValueError(f"Unknown export format: {file_format}")
+
+        rows = 0
+        with writer:
+            for batch in self.iter_record_batches(table, start_date, end_date):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        print(f"📁 Exported {rows} {table} rows as {file_format}")
+        return rows
+
+
+export_service = ExportService(SessionLocal)
@@ -0,0 +1,227 @@
+import re
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.schemas.invoice import InvoiceItemCreate
+from app.utils.text import fold
+
+# Row index as Marker emits it: plain digits, or a misread digit like \mathfrak{D}
+MATH_INDEX_RE = re.compile(r'\\math.*[a-zA-Z]')
+THOUSANDS_SEPARATOR_RE = re.compile(r'[,.](?=\d{3})')
+NON_PRICE_CHARS_RE = re.compile(r'[^\d.,]')
+PRICE_CELL_RE = re.compile(r'[0-9.,]+')
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+# Header words (folded: lowercase, no accents) -> item field. A cell goes to the field
+# with the longest matching keyword, so "unit price" is unit_price rather than unit and
+# "thanh tien (total price)" is total_price; ties go to the field listed first
+COLUMN_HEADERS = [
+    ('total_price', ('thanh tien', 'amount', 'total')),
+    ('unit_price', ('don gia', 'unit price')),
+    ('quantity', ('so luong', 'sl', 'quantity', 'qty')),
+    ('unit', ('don vi tinh', 'dvt', 'unit')),
+    ('item_name', ('ten hang', 'hang hoa', 'dich vu', 'noi dung', 'dien giai', 'description', 'name')),
+    ('index', ('stt', 'no')),
+]
+COLUMN_HEADER_RES = [
+    (field, re.compile(r'\b(?:' + '|'.join(keywords) + r')\b'))
+    for field, keywords in COLUMN_HEADERS
+]
+
+
+def parse_price(price_str: str) -> Optional[Decimal]:
+    """Clean and convert price string to Decimal"""
+    try:
+        # Remove non-numeric characters except dots and commas
+        clean_price = NON_PRICE_CHARS_RE.sub('', price_str)
+        # Handle thousand separators
+        clean_price = THOUSANDS_SEPARATOR_RE.sub('', clean_price)
+        clean_price = clean_price.replace(',', '.')
+        return Decimal(clean_price) if clean_price else None
+    except Exception:
+        return None
+
+
+class LineTokens:
+    """Stripped OCR lines with per-line classification; each price is parsed at most once"""
+
+    def __init__(self, text: str):
+        self.texts = [line.strip() for line in text.split('\n')]
+        self.count = len(self.texts)
+        self._prices = {}
+
+    def is_integer(self, position: int) -> bool:
+        return self.texts[position].isdecimal()
+
+    def is_index(self, position: int) -> bool:
+        line = self.texts[position]
+        return line.isdecimal() or (line.startswith('\\math') and MATH_INDEX_RE.match(line) is not None)
+
+    def price(self, position: int) -> Optional[Decimal]:
+        if position not in self._prices:
+            self._prices[position] = parse_price(self.texts[position])
+        return self._prices[position]
+
+
+class ItemTableParser:
+    """Single-pass line item parser for Marker table output
+
+    Lines are stripped once and rows are assembled by a small state machine:
+    INDEX -> NAME -> UNIT -> [QUANTITY] -> UNIT_PRICE -> TOTAL. A row never looks more
+    than six lines ahead and prices are memoized, so the work stays linear in the
+    number of lines. Pipe-separated rows are split on "|" instead of regex-matched.
+    """
+
+    def __init__(
+        self,
+        name_keywords: Iterable[str] = ("phí",),
+        header_words: Iterable[str] = (),
+        min_name_length: int = 5,
+    ):
+        # Keywords are compared accent-insensitively, so "phí" also accepts OCR'd "Phi"
+        self.name_keywords = [fold(keyword) for keyword in name_keywords]
+        self.header_words = [fold(word) for word in header_words]
+        self.min_name_length = min_name_length
+
+    def is_item_name(self, name: str) -> bool:
+        """Whether a cell looks like an item name rather than a header or noise"""
+        if len(name) < self.min_name_length:
+            return False
+        folded = fold(name)
+        if any(word in folded for word in self.header_words):
+            return False
+        return not self.name_keywords or any(keyword in folded for keyword in self.name_keywords)
+
+    def _row_at(self, lines: LineTokens, start: int) -> Tuple[Optional[InvoiceItemCreate], int]:
+        """Try to assemble a row starting at an INDEX line; returns the item and lines consumed"""
+        remaining = lines.count - start
+        # INDEX, plus at least NAME, UNIT, UNIT_PRICE and TOTAL after it
+        if remaining < 5 or not lines.is_index(start):
+            return None, 0
+
+        name = lines.texts[start + 1]
+        if not self.is_item_name(name):
+            return None, 0
+        # start + 2 is the UNIT column, which is not stored
+
+        # Prefer the QUANTITY layout when the next three lines fit it
+        if (remaining >= 6 and lines.is_integer(start + 3)
+                and lines.price(start + 4) and lines.price(start + 5)):
+            quantity, unit_price, total_price, width = (
+                int(lines.texts[start + 3]), lines.price(start + 4), lines.price(start + 5), 6
+            )
+        else:
+            quantity, unit_price, total_price, width = 1, lines.price(start + 3), lines.price(start + 4), 5
+
+        if not (unit_price and total_price and unit_price > 0 and total_price > 0):
+            return None, 0
+        return InvoiceItemCreate(
+            item_name=name,
+            quantity=quantity,
+            unit_price=unit_price,
+            total_price=total_price,
+        ), width
+
+    def parse_lines(self, text: str) -> List[InvoiceItemCreate]:
+        """Items from Marker output that puts each table cell on its own line"""
+        lines = LineTokens(text)
+        items = []
+        position = 0
+        while position < lines.count:
+            item, width = self._row_at(lines, position)
+            if item:
+                items.append(item)
+                position += width
+            else:
+                position += 1
+        return items
+
+    def parse_pipe_rows(self, text: str) -> List[InvoiceItemCreate]:
+        """Items from markdown table rows like "1 | Phí dịch vụ | | Chiếc | | 450,000 | 450,000" """
+        items = []
+        for line in text.split('\n'):
+            if line.count('|') < 6:
+                continue
+            cells = [cell.strip() for cell in line.split('|')]
+            # STT | name | (blank) | unit | (blank) | unit price | total
+            for start in range(len(cells) - 6):
+                if not cells[start].isdecimal():
+                    continue
+                # The total only needs a leading amount, so "450,000 VND" still reads as 450,000
+                unit_price_cell = cells[start + 5]
+                total_match = PRICE_CELL_RE.match(cells[start + 6])
+                if not (PRICE_CELL_RE.fullmatch(unit_price_cell) and total_match):
+                    continue
+                name = HTML_TAG_RE.sub('', cells[start + 1]).strip()
+                unit_price, total_price = parse_price(unit_price_cell), parse_price(total_match.group())
+                if self.is_item_name(name) and unit_price and total_price:
+                    items.append(InvoiceItemCreate(
+                        item_name=name,
+                        quantity=1,
+                        unit_price=unit_price,
+                        total_price=total_price,
+                    ))
+                    break
+        return items
+
+    @staticmethod
+    def map_columns(header: List[str]) -> Dict[str, int]:
+        """Map item fields to column positions from one header row; first matching column wins"""
+        columns = {}
+        for position, cell in enumerate(header):
+            folded = fold(cell)
+            best_field, best_length = None, 0
+            for field, header_re in COLUMN_HEADER_RES:
+                for match in header_re.finditer(folded):
+                    if len(match.group()) > best_length:
+                        best_field, best_length = field, len(match.group())
+            if best_field:
+                columns.setdefault(best_field, position)
+        return columns
+
+    def _table_columns(self, rows: List[List[str]]) -> Tuple[Dict[str, int], int]:
+        """Find the header in the first rows, merging header rows split by spans or languages"""
+        merged: List[str] = []
+        for row_index, row in enumerate(rows[:3]):
+            merged = [' '.join(pair) for pair in zip(merged, row)] if merged else list(row)
+            columns = self.map_columns(merged)
+            if 'item_name' in columns and ('total_price' in columns or 'unit_price' in columns):
+                # Later header rows ("Name | Unit | ...", "A | B | 1 | 2") fail the item checks like noise
+                return columns, row_index + 1
+        return {}, 0
+
+    def _row_item(self, row: List[str], columns: Dict[str, int]) -> Optional[InvoiceItemCreate]:
+        name = row[columns['item_name']]
+        if not self.is_item_name(name):
+            return None
+
+        def price(field: str) -> Optional[Decimal]:
+            return parse_price(row[columns[field]]) if field in columns else None
+
+        quantity = price('quantity')
+        quantity = int(quantity) if quantity and quantity >= 1 else 1
+        unit_price, total_price = price('unit_price'), price('total_price')
+        if unit_price is None and total_price:
+            unit_price = total_price / quantity
+        elif total_price is None and unit_price:
+            total_price = unit_price * quantity
+        if not (unit_price and total_price and unit_price > 0 and total_price > 0):
+            return None
+        return InvoiceItemCreate(
+            item_name=name,
+            quantity=quantity,
+            unit_price=unit_price,
+            total_price=total_price,
+        )
+
+    def parse_tables(self, tables: Iterable[List[List[str]]]) -> List[InvoiceItemCreate]:
+        """Items from table grids (rows of cell text), columns mapped by their header"""
+        items = []
+        for rows in tables:
+            columns, first_data_row = self._table_columns(rows)
+            if not columns:
+                continue
+            for row in rows[first_data_row:]:
+                item = self._row_item(row, columns)
+                if item:
+                    items.append(item)
+        return items
@@ -0,0 +1,155 @@
+import asyncio
+import time
+from typing import Callable, List, Optional
+from app.core.config import settings
+from app.core.database import session_scope
+from app.models.invoice import OCRJob
+from app.services.database_service import DatabaseService
+from app.services.extraction_service import ExtractionService
+from app.services.model_registry import ModelRegistry, model_registry
+from app.services.ocr_executor import OCRExecutor, OCRQueueFullError, ocr_executor
+from app.services.ocr_service import OCRService
+
+
+def _with_db(func: Callable[[DatabaseService], object]):
+    """Run func with a short-lived session of its own"""
+    with session_scope() as db:
+        return func(DatabaseService(db))
+
+
+class OCRJobWorker:
+    """Background consumer of the ocr_jobs table"""
+
+    def __init__(
+        self,
+        executor: OCRExecutor,
+        registry: ModelRegistry,
+        concurrency: int,
+        poll_interval: float,
+        stale_seconds: float,
+        max_attempts: int,
+    ):
+        self.executor = executor
+        self.registry = registry
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max_attempts
+        self.ocr_service = OCRService(registry)
+        self.extraction_service = ExtractionService()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+        print(f"🧵 OCR job worker started with {self.concurrency} consumer(s)")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake idle consumers after a job was enqueued"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if not self.registry.is_ready:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+
+                await asyncio.to_thread(_with_db, lambda db: db.requeue_stale_jobs(self.stale_seconds, self.max_attempts))
+                job = await asyncio.to_thread(_with_db, lambda db: db.claim_next_job())
+                if job is None:
+                    await self._sleep(self.poll_interval)
+                    continue
+
+                await self._process(job.id, job.image_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ OCR job worker error: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _process(self, job_id: int, image_id: Optional[int]) -> None:
+        print(f"🧾 Processing OCR job {job_id}")
+        try:
+            image_data = await asyncio.to_thread(_with_db, lambda db: db.get_image_data(image_id))
+            if image_data is None:
+                raise ValueError(f"Image {image_id} not found")
+
+            start_time = time.time()
+            try:
+                ocr_document = await self.executor.run(
+                    self.ocr_service.extract_document, image_data, timeout=settings.OCR_TIMEOUT
+                )
+            except OCRQueueFullError as e:
+                # Interactive requests hold the slots; hand the job back and wait. It never ran,
+                # so the claim does not count against JOB_MAX_ATTEMPTS
+                await asyncio.to_thread(
+                    _with_db,
+                    lambda db: db.update_job(job_id, status="queued", started_at=None, attempts=OCRJob.attempts - 1)
+                )
+                await asyncio.sleep(e.retry_after)
+                return
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"OCR processing timeout ({settings.OCR_TIMEOUT:.0f}s)")
+            ocr_seconds = time.time() - start_time
+
+            if not ocr_document.text.strip():
+                raise ValueError("No text found in image")
+
+            start_time = time.time()
+            ocr_response = await asyncio.to_thread(
+                self.extraction_service.extract_all, ocr_document.text, tables=ocr_document.tables
+            )
+            extraction_seconds = time.time() - start_time
+
+            start_time = time.time()
+            db_invoice = await asyncio.to_thread(
+                _with_db, lambda db: db.create_invoice_from_ocr(ocr_response, image_id)
+            )
+            save_seconds = time.time() - start_time
+
+            await asyncio.to_thread(
+                _with_db,
+                lambda db: db.update_job(
+                    job_id,
+                    finished=True,
+                    status="succeeded",
+                    invoice_id=db_invoice.id,
+                    ocr_seconds=ocr_seconds,
+                    extraction_seconds=extraction_seconds,
+                    save_seconds=save_seconds,
+                ),
+            )
+            print(f"✅ OCR job {job_id} finished, invoice {db_invoice.id}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ OCR job {job_id} failed: {str(e)}")
+            await asyncio.to_thread(
+                _with_db, lambda db: db.update_job(job_id, finished=True, status="failed", error=str(e))
+            )
+
+
+ocr_job_worker = OCRJobWorker(
+    executor=ocr_executor,
+    registry=model_registry,
+    concurrency=settings.JOB_WORKER_CONCURRENCY,
+    poll_interval=settings.JOB_POLL_INTERVAL,
+    stale_seconds=settings.JOB_STALE_SECONDS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+)
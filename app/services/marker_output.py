@@ -0,0 +1,46 @@
+import re
+from typing import Iterator, List, NamedTuple, Optional
+
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+
+class TextChunk(NamedTuple):
+    """Text of one leaf block, with the metadata Marker attached to it"""
+    text: str
+    block_type: str
+    bbox: Optional[List[float]]
+    block_id: Optional[str]
+
+
+def block_type_name(block) -> str:
+    """Marker block type name, whether it is a BlockTypes member or already a string"""
+    block_type = getattr(block, 'block_type', '')
+    return getattr(block_type, 'name', None) or str(block_type)
+
+
+def html_to_text(html: str) -> str:
+    """Drop tags and collapse whitespace (str.split uses the same whitespace set as re's \\s)"""
+    return ' '.join(HTML_TAG_RE.sub(' ', html).split())
+
+
+def iter_text_chunks(document) -> Iterator[TextChunk]:
+    """Yield the text of every leaf block of a Marker JSONOutput in document order
+
+    Blocks with children contribute only through their children, matching how Marker
+    assembles parent HTML from content references. Uses an explicit stack, so deep
+    trees cost no recursion and nothing is buffered.
+    """
+    stack = [document]
+    while stack:
+        block = stack.pop()
+        children = getattr(block, 'children', None)
+        if children:
+            # Reversed so the first child is popped first
+            stack.extend(reversed(children))
+            continue
+        html = getattr(block, 'html', None)
+        if not html:
+            continue
+        text = html_to_text(html)
+        if text:
+            yield TextChunk(text, block_type_name(block), getattr(block, 'bbox', None), getattr(block, 'id', None))
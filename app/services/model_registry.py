@@ -0,0 +1,158 @@
+import copy
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from marker.converters.pdf import PdfConverter
+from marker.config.parser import ConfigParser
+from marker.models import create_model_dict
+
+# Configuration for Vietnamese invoice processing
+MARKER_CONFIG = {
+    # Enable LLM for better accuracy
+    "use_llm": False,
+
+    # OCR and formatting options
+    "force_ocr": True,  # Force OCR on entire document
+    "format_lines": True,  # Reformat lines for better quality
+    "redo_inline_math": False,  # High quality inline math conversion
+
+    # Output format
+    "output_format": "json",  # JSON format to easily extract tables
+
+    # Performance settings
+    "paginate_output": False,
+    "disable_image_extraction": True,
+}
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """Return the resident set size of the current process, or None where /proc is unavailable"""
+    # getrusage() only has the peak (ru_maxrss), in units that differ per platform
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _model_parameter_bytes(model_dict: Dict[str, Any]) -> Optional[int]:
+    """Sum the size of the torch parameters held by the Marker predictors"""
+    total = 0
+    found = False
+    for predictor in model_dict.values():
+        model = getattr(predictor, "model", predictor)
+        if not hasattr(model, "parameters"):
+            continue
+        try:
+            for param in model.parameters():
+                total += param.numel() * param.element_size()
+            found = True
+        except Exception:
+            continue
+    return total if found else None
+
+
+class ModelRegistry:
+    """Process-wide holder of the Marker models and the shared PdfConverter"""
+
+    NOT_LOADED = "not_loaded"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = dict(config or MARKER_CONFIG)
+        self.state = self.NOT_LOADED
+        self.error: Optional[str] = None
+        self.model_dict: Optional[Dict[str, Any]] = None
+        self.converter: Optional[PdfConverter] = None
+        self.load_seconds: Optional[float] = None
+        self.model_memory_bytes: Optional[int] = None
+        self.rss_delta_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == self.READY
+
+    def build_converter(self, overrides: Optional[Dict[str, Any]] = None) -> PdfConverter:
+        """Build a PdfConverter on top of the already loaded models"""
+        if self.model_dict is None:
+            raise RuntimeError("Marker models are not loaded")
+
+        config = dict(self.config)
+        if overrides:
+            config.update(overrides)
+        config_parser = ConfigParser(config)
+
+        return PdfConverter(
+            config=config_parser.generate_config_dict(),
+            artifact_dict=self.model_dict,
+            processor_list=config_parser.get_processors(),
+            renderer=config_parser.get_renderer(),
+        )
+
+    def load(self) -> PdfConverter:
+        """Load the Marker models once; later calls return the warm converter"""
+        with self._lock:
+            if self.state == self.READY:
+                return self.converter
+
+            print("🔄 Loading Marker models into the shared registry...")
+            self.state = self.LOADING
+            self.error = None
+            rss_before = _current_rss_bytes()
+            start_time = time.time()
+
+            try:
+                self.model_dict = create_model_dict()
+                self.converter = self.build_converter()
+            except Exception as e:
+                self.state = self.FAILED
+                self.error = str(e)
+                self.model_dict = None
+                self.converter = None
+                print(f"❌ Failed to load Marker models: {str(e)}")
+                raise
+
+            self.load_seconds = time.time() - start_time
+            rss_after = _current_rss_bytes()
+            if rss_before is not None and rss_after is not None:
+                self.rss_delta_bytes = max(rss_after - rss_before, 0)
+            self.model_memory_bytes = _model_parameter_bytes(self.model_dict)
+            self.state = self.READY
+
+            print(f"✅ Marker models loaded in {self.load_seconds:.2f} seconds")
+            return self.converter
+
+    def get_converter(self) -> PdfConverter:
+        """Return the shared converter, loading the models on first use"""
+        if self.state == self.READY:
+            return self.converter
+        return self.load()
+
+    def converter_for_pages(self, pages: List[int]) -> PdfConverter:
+        """The shared converter limited to some zero-based pages, without rebuilding its processors"""
+        # Only the provider reads page_range, from converter.config when a document is built, so a
+        # shallow copy with its own config is enough and the shared converter is never mutated
+        converter = copy.copy(self.get_converter())
+        converter.config = {**(converter.config or {}), "page_range": pages}
+        return converter
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness and resource numbers for health checks"""
+        return {
+            "state": self.state,
+            "ready": self.is_ready,
+            "error": self.error,
+            "models": sorted(self.model_dict.keys()) if self.model_dict else [],
+            "load_seconds": round(self.load_seconds, 2) if self.load_seconds is not None else None,
+            "model_memory_bytes": self.model_memory_bytes,
+            "rss_delta_bytes": self.rss_delta_bytes,
+            "process_rss_bytes": _current_rss_bytes(),
+        }
+
+
+model_registry = ModelRegistry()
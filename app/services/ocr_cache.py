@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
+
+def marker_version() -> str:
+    """Installed marker-pdf version, part of every cache fingerprint"""
+    try:
+        from importlib.metadata import version
+        return version("marker-pdf")
+    except Exception:
+        return "unknown"
+
+
+def ocr_fingerprint(config: Dict[str, Any], extra: Optional[Dict[str, Any]] = None) -> str:
+    """Stable hash of everything that changes OCR output for the same image"""
+    payload = {"marker": marker_version(), "config": config, "extra": extra or {}}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class OCRCache:
+    """On-disk OCR result cache keyed by content hash + OCR fingerprint, with size-based LRU eviction"""
+
+    def __init__(self, root: str, max_bytes: int, enabled: bool = True):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: Optional[OrderedDict] = None  # path -> size, least recently used first
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, fingerprint: str, content_hash: str, variant: str) -> str:
+        # A config or Marker change yields a new fingerprint directory; old ones age out via LRU
+        return os.path.join(self.root, fingerprint[:16], content_hash[:2], f"{content_hash}{variant}.json")
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU order from file modification times"""
+        if self._entries is not None:
+            return
+        files = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if not filename.endswith(".json"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, path, stat.st_size))
+        files.sort()
+        self._entries = OrderedDict((path, size) for _, path, size in files)
+        self._total_bytes = sum(size for _, _, size in files)
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and self._entries:
+            path, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def get(self, fingerprint: str, content_hash: str, variant: str = "") -> Optional[Dict[str, Any]]:
+        """Return the cached OCR payload or None"""
+        if not self.enabled:
+            return None
+        path = self._path(fingerprint, content_hash, variant)
+        try:
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+            os.utime(path)  # Persist recency across restarts
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+                if self._entries is not None and path in self._entries:
+                    self._total_bytes -= self._entries.pop(path)
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self._load_index()
+            if path in self._entries:
+                self._entries.move_to_end(path)
+        return payload
+
+    def put(self, fingerprint: str, content_hash: str, payload: Dict[str, Any], variant: str = "") -> None:
+        """Store an OCR payload, evicting least recently used entries over max_bytes"""
+        if not self.enabled:
+            return
+        path = self._path(fingerprint, content_hash, variant)
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial entry
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"⚠️ Failed to write OCR cache entry: {str(e)}")
+            return
+
+        with self._lock:
+            self._load_index()
+            if path in self._entries:
+                self._total_bytes -= self._entries.pop(path)
+            self._entries[path] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries) if self._entries is not None else None,
+                "bytes": self._total_bytes if self._entries is not None else None,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+ocr_cache = OCRCache(
+    root=settings.OCR_CACHE_DIR,
+    max_bytes=settings.OCR_CACHE_MAX_BYTES,
+    enabled=settings.OCR_CACHE_ENABLED,
+)
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from app.core.config import settings
+
+
+class OCRQueueFullError(Exception):
+    """Raised when the OCR executor cannot admit another job"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("OCR queue is full")
+        self.retry_after = retry_after
+
+
+class OCRExecutor:
+    """Application-wide bounded executor for Marker conversions"""
+
+    def __init__(self, max_workers: int, max_queue: int, retry_after: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr")
+        self._lock = threading.Lock()
+
+        # Live counters
+        self._queued = 0
+        self._running = 0
+
+        # Cumulative counters
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._queued + self._running >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise OCRQueueFullError(self.retry_after)
+            self._queued += 1
+            self._submitted += 1
+
+    def _wrap(self, func: Callable, submitted_at: float) -> Callable:
+        def run(*args, **kwargs):
+            started_at = time.time()
+            wait = started_at - submitted_at
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            ok = False
+            try:
+                result = func(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._total_run += time.time() - started_at
+                    if ok:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+        return run
+
+    def _on_done(self, future: Future) -> None:
+        # A job cancelled before it started never ran the wrapper
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Submit a job or raise OCRQueueFullError when the queue is full"""
+        self._admit()
+        try:
+            future = self._executor.submit(self._wrap(func, time.time()), *args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._queued -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a job on the shared pool and await its result"""
+        future = self.submit(func, *args, **kwargs)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and wait/run times for capacity planning"""
+        with self._lock:
+            started = self._completed + self._failed + self._running
+            finished = self._completed + self._failed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queue_depth": self._queued,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_wait_seconds": round(self._total_wait / started, 3) if started else 0.0,
+                "max_wait_seconds": round(self._max_wait, 3),
+                "avg_run_seconds": round(self._total_run / finished, 3) if finished else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+ocr_executor = OCRExecutor(
+    max_workers=settings.OCR_MAX_CONCURRENCY,
+    max_queue=settings.OCR_MAX_QUEUE,
+    retry_after=settings.OCR_RETRY_AFTER,
+)
@@ -1,145 +1,359 @@
-import cv2
-import numpy as np
 from PIL import Image
+import hashlib
 import io
 import tempfile
 import os
-import re
+from typing import List, Optional
 from marker.converters.pdf import PdfConverter
-from marker.config.parser import ConfigParser
-from marker.models import create_model_dict
+from app.core.config import settings
+from app.schemas.invoice import OCRDocument, OCRTable
+from app.services.marker_output import block_type_name, html_to_text, iter_text_chunks
+from app.services.model_registry import ModelRegistry, model_registry
+from app.services.ocr_cache import OCRCache, ocr_cache, ocr_fingerprint
+from app.services.preprocessing_service import ImagePreprocessor, image_preprocessor
+from app.utils.html_table import parse_html_table
 
+# Image formats Marker's ImageProvider can open directly, by PIL format name
+IMAGE_SUFFIXES = {'JPEG': '.jpg', 'PNG': '.png', 'TIFF': '.tiff', 'BMP': '.bmp'}
 
-class OCRService:
-    def __init__(self):
-        # Configuration for Vietnamese invoice processing
-        self.config = {
-            # Enable LLM for better accuracy
-            "use_llm": False,
 
-            # OCR and formatting options
-            "force_ocr": True,  # Force OCR on entire document
-            "format_lines": True,  # Reformat lines for better quality
-            "redo_inline_math": False,  # High quality inline math conversion
+def _temp_dir() -> Optional[str]:
+    """Directory for files handed to Marker, preferring tmpfs over disk"""
+    if settings.OCR_TEMP_DIR:
+        return settings.OCR_TEMP_DIR
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return None
 
-            # Output format
-            "output_format": "json",  # JSON format to easily extract tables
 
-            # Performance settings
-            "paginate_output": False,
-            "disable_image_extraction": True,
-        }
-        
-        # Models are pre-loaded during startup, so we can initialize immediately
-        print("🔄 Initializing OCR Service with pre-loaded models...")
-        self.model_dict = create_model_dict()
-        
-        config_parser = ConfigParser(self.config)
-        
-        # Initialize PdfConverter with pre-loaded models
-        self.converter = PdfConverter(
-            config=config_parser.generate_config_dict(),
-            artifact_dict=self.model_dict,
-            processor_list=config_parser.get_processors(),
-            renderer=config_parser.get_renderer(),
-        )
-        print("✅ OCR Service initialized with pre-loaded models")
+class OCRService:
+    def __init__(
+        self,
+        registry: ModelRegistry = model_registry,
+        cache: OCRCache = ocr_cache,
+        preprocessor: ImagePreprocessor = image_preprocessor
+    ):
+        # Models live in the process-wide registry and are warmed up at startup,
+        # so every OCRService shares the same PdfConverter
+        self.registry = registry
+        self.config = registry.config
+        self.cache = cache
+        self.preprocessor = preprocessor
+        self.fingerprint = ocr_fingerprint(self.config, {"preprocess": preprocessor.config()})
+    
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @property
+    def converter(self) -> PdfConverter:
+        return self.registry.get_converter()
     
     def _extract_text_from_json_output(self, document) -> str:
         """Extract text content from Marker JSONOutput structure"""
-        text_content = []
+        # One line per leaf block, in document order
+        return '\n'.join(chunk.text for chunk in iter_text_chunks(document))
+    
+    def _extract_tables_from_json_output(self, document) -> List[OCRTable]:
+        """Collect Marker Table blocks as row/column grids of cell text"""
+        tables = []
+        stack = [document]
+        while stack:
+            block = stack.pop()
+            if block_type_name(block) != 'Table':
+                stack.extend(reversed(getattr(block, 'children', None) or []))
+                continue
+            
+            html = getattr(block, 'html', None) or ''
+            # Table html is normally the assembled <table>; fall back to cell bboxes otherwise
+            rows = parse_html_table(html) if '<tr' in html.lower() else []
+            if not rows:
+                rows = self._table_rows_from_cells(getattr(block, 'children', None) or [])
+            if rows:
+                bbox = getattr(block, 'bbox', None)
+                tables.append(OCRTable(rows=rows, bbox=list(bbox) if bbox else None))
+        return tables
+    
+    @staticmethod
+    def _table_rows_from_cells(cells) -> List[List[str]]:
+        """Rebuild rows from TableCell bboxes: cells whose vertical centers are close share a row"""
+        positioned = []
+        for cell in cells:
+            bbox = getattr(cell, 'bbox', None)
+            if block_type_name(cell) != 'TableCell' or not bbox:
+                continue
+            text = html_to_text(getattr(cell, 'html', None) or '')
+            positioned.append(((bbox[1] + bbox[3]) / 2, bbox[0], bbox[3] - bbox[1], text))
+        if not positioned:
+            return []
         
-        def extract_from_block(block):
-            """Recursively extract text from JSONBlockOutput"""
-            # Process children recursively
-            if hasattr(block, 'children') and block.children:
-                for child in block.children:
-                    extract_from_block(child)
-            elif hasattr(block, 'html') and block.html:
-                # Clean HTML and extract text
-                html_text = block.html
-                # Remove HTML tags and get clean text
-                clean_text = re.sub(r'<[^>]+>', ' ', html_text)
-                # Clean up whitespace and special characters
-                clean_text = re.sub(r'\s+', ' ', clean_text).strip()
-                if clean_text:
-                    text_content.append(clean_text)
-        # Extract from document and all children
-        extract_from_block(document)
+        positioned.sort()
+        heights = sorted(height for _, _, height, _ in positioned)
+        tolerance = heights[len(heights) // 2] / 2
+        rows, row_center = [], None
+        for center, left, _, text in positioned:
+            if row_center is None or center - row_center > tolerance:
+                rows.append([])
+                row_center = center
+            rows[-1].append((left, text))
         
-        # Join all text content with newlines
-        full_text = '\n'.join(text_content)
-        return full_text
+        grid = [[text for _, text in sorted(row)] for row in rows]
+        width = max(len(row) for row in grid)
+        return [row + [''] * (width - len(row)) for row in grid]
+    
+    def _document_from_blocks(self, block) -> OCRDocument:
+        """Plain text plus table grids from a Marker JSON block tree (a document or one page)"""
+        full_text = self._extract_text_from_json_output(block)
+        return OCRDocument(
+            text=full_text if full_text.strip() else "No text detected",
+            tables=self._extract_tables_from_json_output(block)
+        )
+    
+    def _document_from_output(self, document) -> OCRDocument:
+        """Text and tables from whatever Marker returned for a whole conversion"""
+        if hasattr(document, 'children') and document.children:
+            # This is a JSONOutput object, extract HTML content from table cells
+            ocr_document = self._document_from_blocks(document)
+            print(f"Extracted clean text: {ocr_document.text[:500]}...")  # Debug: show first 500 chars
+            return ocr_document
         
-    def _image_to_pdf(self, image_data: bytes) -> str:
-        """Convert image to temporary PDF file for Marker processing"""
-        # Convert bytes to PIL Image
-        image = Image.open(io.BytesIO(image_data))
+        if hasattr(document, 'markdown'):
+            # Fallback to markdown if available
+            full_text = document.markdown
+            print(f"Using markdown: {full_text[:500]}...")
+        else:
+            # Last resort - convert to string
+            full_text = str(document)
+            print(f"Using string conversion: {full_text[:500]}...")
+        return OCRDocument(text=full_text if full_text.strip() else "No text detected")
+    
+    def _preprocess(self, image_data: bytes) -> bytes:
+        """Run the OpenCV preprocessing pipeline when any step is enabled"""
+        if not self.preprocessor.enabled:
+            return image_data
+        processed, report = self.preprocessor.process_bytes(image_data)
+        if report["changed"]:
+            print(f"Preprocessed {report['input_size']} -> {report['output_size']} in {report['steps_ms']} ms")
+        return processed
+    
+    def _load_image(self, image_data: bytes) -> Image.Image:
+        """Decode image bytes into an RGB PIL Image"""
+        image = Image.open(io.BytesIO(self._preprocess(image_data)))
         
         # Convert to RGB if necessary
         if image.mode != 'RGB':
             image = image.convert('RGB')
+        return image
+    
+    def _image_to_file(self, image_data: bytes) -> str:
+        """Write an image for Marker's ImageProvider, skipping the PDF encode"""
+        image_data = self._preprocess(image_data)
+        
+        # Only the header is parsed here, pixels are not decoded
+        image = Image.open(io.BytesIO(image_data))
+        suffix = IMAGE_SUFFIXES.get(image.format)
+        
+        with tempfile.NamedTemporaryFile(suffix=suffix or '.png', delete=False, dir=_temp_dir()) as temp_image:
+            if suffix and image.mode in ('RGB', 'L'):
+                # Hand over the original encoded bytes untouched
+                temp_image.write(image_data)
+            else:
+                # Palette/alpha images are flattened once, losslessly and fast
+                image.convert('RGB').save(temp_image, format='PNG', compress_level=1)
+            return temp_image.name
+    
+    def _images_to_pdf(self, images: List[bytes]) -> str:
+        """Combine images into one temporary multi-page PDF, one page per image"""
+        pages = [self._load_image(image_data) for image_data in images]
         
         # Create temporary PDF file
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_pdf:
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False, dir=_temp_dir()) as temp_pdf:
             # Save image as PDF with high quality for better OCR
-            image.save(temp_pdf.name, format='PDF', quality=95, optimize=True)
+            pages[0].save(
+                temp_pdf.name, format='PDF', quality=95, optimize=True,
+                save_all=True, append_images=pages[1:]
+            )
             return temp_pdf.name
     
+    @staticmethod
+    def is_pdf(data: bytes) -> bool:
+        """Detect PDF documents by their magic bytes"""
+        return data[:1024].lstrip().startswith(b'%PDF-')
+    
+    @staticmethod
+    def pdf_page_ranges(page_count: int, pages_per_chunk: int) -> List[tuple]:
+        """Split a document into zero-based, inclusive (first, last) page ranges"""
+        return [
+            (first_page, min(first_page + pages_per_chunk, page_count) - 1)
+            for first_page in range(0, page_count, pages_per_chunk)
+        ]
+    
+    @staticmethod
+    def count_pdf_pages(pdf_data: bytes) -> int:
+        """Count pages of a PDF without rendering it"""
+        import pypdfium2 as pdfium  # Installed with marker-pdf
+        
+        pdf = pdfium.PdfDocument(pdf_data)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    
+    def write_temp_pdf(self, pdf_data: bytes) -> str:
+        """Write PDF bytes untouched to a temporary file for Marker"""
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False, dir=_temp_dir()) as temp_pdf:
+            temp_pdf.write(pdf_data)
+            return temp_pdf.name
+    
+    def _prepare_document(self, data: bytes) -> str:
+        """Hand PDFs and images to Marker as-is, without an intermediate PDF encode"""
+        if self.is_pdf(data):
+            return self.write_temp_pdf(data)
+        return self._image_to_file(data)
+    
+    @staticmethod
+    def is_readable_image(image_data: bytes) -> bool:
+        """Check that PIL can parse the image header without decoding pixels"""
+        try:
+            with Image.open(io.BytesIO(image_data)) as image:
+                image.verify()
+            return True
+        except Exception:
+            return False
+    
     def extract_text(self, image_data: bytes) -> str:
+        """Extract text from image, reusing cached OCR output for identical content"""
+        return self.extract_document(image_data).text
+    
+    def _cached_document(self, content_hash: str, variant: str = "") -> Optional[OCRDocument]:
+        cached = self.cache.get(self.fingerprint, content_hash, variant)
+        # Entries written before table extraction carry text only; redo those for their tables
+        if cached is None or "tables" not in cached:
+            return None
+        return OCRDocument.model_validate(cached)
+    
+    def extract_document(self, image_data: bytes) -> OCRDocument:
+        """Extract text and table blocks from image, reusing cached OCR output for identical content"""
+        content_hash = self.content_hash(image_data)
+        cached = self._cached_document(content_hash)
+        if cached is not None:
+            print(f"OCR cache hit for {content_hash[:12]}")
+            return cached
+        
+        document = self._run_marker(image_data)
+        self.cache.put(self.fingerprint, content_hash, document.model_dump())
+        return document
+    
+    def _run_marker(self, image_data: bytes) -> OCRDocument:
         """Extract text from image using Marker with optimizations"""
-        temp_pdf_path = None
+        temp_path = None
         try:
             print("Starting Marker OCR processing...")
             
-            # Convert image to temporary PDF
-            temp_pdf_path = self._image_to_pdf(image_data)
-            print(f"Created temporary PDF: {temp_pdf_path}")
+            # Images go to Marker's ImageProvider directly, PDF uploads are passed through
+            temp_path = self._prepare_document(image_data)
+            print(f"Created temporary input: {temp_path}")
             
             # Process with Marker - optimized for speed
-            print("Processing PDF with Marker...")
-
-            # Convert PDF using PdfConverter
-            document = self.converter(temp_pdf_path)
+            document = self.converter(temp_path)
             print(f"Document type: {type(document)}")
             
-            # Extract text from Marker JSONOutput
-            if hasattr(document, 'children') and document.children:
-                # This is a JSONOutput object, extract HTML content from table cells
-                full_text = self._extract_text_from_json_output(document)
-                print(f"Extracted clean text: {full_text[:500]}...")  # Debug: show first 500 chars
-            elif hasattr(document, 'markdown'):
-                # Fallback to markdown if available
-                full_text = document.markdown
-                print(f"Using markdown: {full_text[:500]}...")
-            else:
-                # Last resort - convert to string
-                full_text = str(document)
-                print(f"Using string conversion: {full_text[:500]}...")
-
-            print(f"Extracted {len(full_text)} characters")
-
-            return full_text if full_text.strip() else "No text detected"
+            ocr_document = self._document_from_output(document)
+            print(f"Extracted {len(ocr_document.text)} characters and {len(ocr_document.tables)} tables")
+            return ocr_document
             
         except Exception as e:
             print(f"Marker OCR error: {str(e)}")
             raise Exception(f"Marker OCR failed: {str(e)}")
         finally:
             # Clean up temporary file
+            if temp_path and os.path.exists(temp_path):
+                try:
+                    os.unlink(temp_path)
+                    print(f"Cleaned up temporary file: {temp_path}")
+                except:
+                    pass  # Ignore cleanup errors
+    
+    def extract_text_batch(self, images: List[bytes]) -> List[str]:
+        """Extract text from many images with a single Marker pass, one text per image"""
+        return [document.text for document in self.extract_document_batch(images)]
+    
+    def extract_document_batch(self, images: List[bytes]) -> List[OCRDocument]:
+        """Extract text and tables from many images with a single Marker pass, one document per image"""
+        hashes = [self.content_hash(image_data) for image_data in images]
+        documents = [self._cached_document(content_hash) for content_hash in hashes]
+        misses = [index for index, document in enumerate(documents) if document is None]
+        
+        if misses:
+            print(f"OCR cache: {len(images) - len(misses)} hits, {len(misses)} misses")
+            miss_documents = self._run_marker_batch([images[index] for index in misses])
+            for index, document in zip(misses, miss_documents):
+                documents[index] = document
+                self.cache.put(self.fingerprint, hashes[index], document.model_dump())
+        return documents
+    
+    def _run_marker_batch(self, images: List[bytes]) -> List[OCRDocument]:
+        """Run Marker once over all images combined into one multi-page PDF"""
+        if not images:
+            return []
+        
+        temp_pdf_path = None
+        try:
+            print(f"Starting batch Marker OCR processing for {len(images)} images...")
+            
+            # One page per image so layout/recognition models batch over all pages
+            temp_pdf_path = self._images_to_pdf(images)
+            document = self.converter(temp_pdf_path)
+            
+            pages = getattr(document, 'children', None) or []
+            if len(pages) != len(images):
+                raise ValueError(f"Expected {len(images)} pages from Marker, got {len(pages)}")
+            
+            documents = [self._document_from_blocks(page) for page in pages]
+            
+            print(f"Batch OCR extracted {sum(len(document.text) for document in documents)} characters")
+            return documents
+            
+        except Exception as e:
+            print(f"Marker batch OCR error: {str(e)}")
+            raise Exception(f"Marker batch OCR failed: {str(e)}")
+        finally:
             if temp_pdf_path and os.path.exists(temp_pdf_path):
                 try:
                     os.unlink(temp_pdf_path)
-                    print(f"Cleaned up temporary file: {temp_pdf_path}")
                 except:
                     pass  # Ignore cleanup errors
     
-    def process_image_bytes(self, image_data: bytes, filename: str, content_type: str) -> dict:
+    def extract_pdf_range(self, pdf_path: str, first_page: int, last_page: int, content_hash: Optional[str] = None) -> OCRDocument:
+        """Run Marker over a zero-based, inclusive page range of a PDF file"""
+        page_range = f"{first_page}-{last_page}" if last_page > first_page else str(first_page)
+        variant = f"-p{page_range}"
+        if content_hash:
+            cached = self._cached_document(content_hash, variant)
+            if cached is not None:
+                return cached
+        
+        try:
+            converter = self.registry.converter_for_pages(list(range(first_page, last_page + 1)))
+            document = self._document_from_blocks(converter(pdf_path))
+            print(f"Extracted {len(document.text)} characters from pages {page_range}")
+        except Exception as e:
+            print(f"Marker OCR error on pages {first_page}-{last_page}: {str(e)}")
+            raise Exception(f"Marker OCR failed: {str(e)}")
+        
+        if content_hash:
+            self.cache.put(self.fingerprint, content_hash, document.model_dump(), variant)
+        return document
+    
+    @staticmethod
+    def process_image_bytes(image_data: bytes, filename: str, content_type: str) -> dict:
         """Process image bytes and return image info"""
         return {
             "filename": filename,
             "content_type": content_type,
             "image_data": image_data,
-            "file_size": len(image_data)
+            "file_size": len(image_data),
+            "content_hash": OCRService.content_hash(image_data)
         }
 
 
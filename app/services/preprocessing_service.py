@@ -0,0 +1,167 @@
+import io
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+from PIL import Image
+from app.core.config import settings
+
+
+class ImagePreprocessor:
+    """Configurable OpenCV pipeline that shrinks and normalizes photos before OCR"""
+
+    # Pipeline order: geometry is estimated first, then pixels are reduced
+    AVAILABLE_STEPS = ("crop", "deskew", "downscale", "grayscale", "denoise")
+
+    def __init__(
+        self,
+        steps: Optional[List[str]] = None,
+        target_dpi: int = 200,
+        page_long_side_inches: float = 11.69,
+        analysis_size: int = 1000,
+    ):
+        steps = list(steps or [])
+        unknown = [step for step in steps if step not in self.AVAILABLE_STEPS]
+        if unknown:
+            raise ValueError(f"Unknown preprocessing steps: {', '.join(unknown)}")
+        self.steps = [step for step in self.AVAILABLE_STEPS if step in steps]
+        self.target_dpi = target_dpi
+        self.page_long_side_inches = page_long_side_inches
+        self.analysis_size = analysis_size
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.steps)
+
+    def config(self) -> Dict[str, Any]:
+        """Settings that change the pixels sent to Marker, used in cache fingerprints"""
+        return {
+            "steps": self.steps,
+            "target_dpi": self.target_dpi,
+            "page_long_side_inches": self.page_long_side_inches,
+        }
+
+    def _analysis_copy(self, image: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Small grayscale copy for geometry estimation, plus its scale factor"""
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        scale = min(1.0, self.analysis_size / max(gray.shape[:2]))
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return gray, scale
+
+    def crop(self, image: np.ndarray) -> np.ndarray:
+        """Crop and flatten the largest four-cornered contour (the paper)"""
+        gray, scale = self._analysis_copy(image)
+        edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150)
+        edges = cv2.dilate(edges, np.ones((3, 3), np.uint8), iterations=2)
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return image
+
+        contour = max(contours, key=cv2.contourArea)
+        if cv2.contourArea(contour) < 0.2 * gray.shape[0] * gray.shape[1]:
+            return image  # Document already fills the frame or was not found
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) != 4:
+            return image
+
+        corners = approx.reshape(4, 2).astype(np.float32) / scale
+        # Order corners: top-left, top-right, bottom-right, bottom-left
+        sums = corners.sum(axis=1)
+        diffs = np.diff(corners, axis=1).ravel()
+        ordered = np.array([
+            corners[np.argmin(sums)], corners[np.argmin(diffs)],
+            corners[np.argmax(sums)], corners[np.argmax(diffs)],
+        ], dtype=np.float32)
+
+        width = int(max(np.linalg.norm(ordered[0] - ordered[1]), np.linalg.norm(ordered[3] - ordered[2])))
+        height = int(max(np.linalg.norm(ordered[0] - ordered[3]), np.linalg.norm(ordered[1] - ordered[2])))
+        if width < 100 or height < 100:
+            return image
+
+        target = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], dtype=np.float32)
+        matrix = cv2.getPerspectiveTransform(ordered, target)
+        return cv2.warpPerspective(image, matrix, (width, height), flags=cv2.INTER_LINEAR)
+
+    def deskew(self, image: np.ndarray) -> np.ndarray:
+        """Rotate so text lines are horizontal"""
+        gray, _ = self._analysis_copy(image)
+        binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)[1]
+        coords = np.column_stack(np.nonzero(binary)[::-1]).astype(np.float32)
+        if len(coords) < 100:
+            return image
+
+        angle = cv2.minAreaRect(coords)[-1]
+        # OpenCV reports angles in [0, 90) or (-90, 0] depending on version
+        if angle > 45:
+            angle -= 90
+        elif angle < -45:
+            angle += 90
+        if abs(angle) < 0.5 or abs(angle) > 15:
+            return image  # Negligible, or more likely a misdetection than real skew
+
+        height, width = image.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+        return cv2.warpAffine(image, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+    @property
+    def max_side(self) -> int:
+        """Long side in pixels of a page scanned at target_dpi"""
+        return int(self.target_dpi * self.page_long_side_inches)
+
+    def downscale(self, image: np.ndarray) -> np.ndarray:
+        """Shrink to the pixel size of a page scanned at target_dpi"""
+        scale = self.max_side / max(image.shape[:2])
+        if scale >= 1.0:
+            return image
+        return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    def grayscale(self, image: np.ndarray) -> np.ndarray:
+        if image.ndim == 2:
+            return image
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    def denoise(self, image: np.ndarray) -> np.ndarray:
+        if image.ndim == 2:
+            return cv2.fastNlMeansDenoising(image, None, h=7, templateWindowSize=7, searchWindowSize=15)
+        return cv2.fastNlMeansDenoisingColored(image, None, 7, 7, 7, 15)
+
+    def process(self, image: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Run the enabled steps in order, timing each one; report["changed"] is False if every step was a no-op"""
+        report = {"input_size": [image.shape[1], image.shape[0]], "steps_ms": {}, "changed": False}
+        for step in self.steps:
+            start_time = time.perf_counter()
+            result = getattr(self, step)(image)
+            report["steps_ms"][step] = round((time.perf_counter() - start_time) * 1000, 1)
+            # Steps return their input object when there is nothing to do
+            report["changed"] = report["changed"] or result is not image
+            image = result
+        report["output_size"] = [image.shape[1], image.shape[0]]
+        return image, report
+
+    def process_bytes(self, image_data: bytes) -> Tuple[bytes, Dict[str, Any]]:
+        """Decode, preprocess and re-encode as a fast lossless PNG; unchanged images come back as the original bytes"""
+        if self.steps == ["downscale"]:
+            # Only the header is parsed: an image already within max_side is never decoded
+            size = list(Image.open(io.BytesIO(image_data)).size)
+            if max(size) <= self.max_side:
+                return image_data, {"input_size": size, "steps_ms": {}, "changed": False, "output_size": size}
+
+        image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("Unable to decode image for preprocessing")
+        image, report = self.process(image)
+        if not report["changed"]:
+            # Re-encoding would only turn the upload into a larger PNG
+            return image_data, report
+        ok, encoded = cv2.imencode(".png", image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        if not ok:
+            raise ValueError("Unable to encode preprocessed image")
+        return encoded.tobytes(), report
+
+
+image_preprocessor = ImagePreprocessor(
+    steps=settings.OCR_PREPROCESS_STEPS,
+    target_dpi=settings.OCR_TARGET_DPI,
+    page_long_side_inches=settings.OCR_PAGE_LONG_SIDE_INCHES,
+)
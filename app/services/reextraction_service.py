@@ -0,0 +1,209 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import selectinload, sessionmaker
+from app.models.invoice import Invoice, InvoiceItem
+from app.schemas.invoice import OCRTable
+from app.services.database_service import DatabaseService, add_revenue_delta
+from app.services.extraction_service import ExtractionService
+
+FIELDS = ("invoice_code", "payment_date", "total_amount")
+
+_worker_service: Optional[ExtractionService] = None
+
+
+def _extract_chunk(
+    rows: List[Tuple[int, str, Optional[List[List[List[str]]]]]]
+) -> List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """Process-pool entry point: run the current extraction over (id, raw_text, item_tables) rows"""
+    global _worker_service
+    if _worker_service is None:
+        _worker_service = ExtractionService()
+
+    results = []
+    for invoice_id, raw_text, item_tables in rows:
+        try:
+            # Same input as at upload time: items found in table blocks are parsed from them again
+            tables = [OCRTable(rows=table_rows) for table_rows in item_tables or []]
+            ocr_response = _worker_service.extract_all(raw_text, verbose=False, tables=tables)
+            results.append((invoice_id, {
+                "invoice_code": ocr_response.invoice_code,
+                "payment_date": ocr_response.payment_date,
+                "total_amount": ocr_response.total_amount,
+                "items": [
+                    (item.item_name, item.quantity, item.unit_price, item.total_price)
+                    for item in ocr_response.items
+                ],
+            }, None))
+        except Exception as e:
+            results.append((invoice_id, None, str(e)))
+    return results
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, tuple):
+        return [_jsonable(v) for v in value]
+    if value is None or isinstance(value, (int, str, bool)):
+        return value
+    return str(value)
+
+
+class ReextractionService:
+    """Re-run ExtractionService over stored raw_text and write back changed fields and items"""
+
+    def __init__(
+        self,
+        engine: Engine,
+        workers: Optional[int] = None,
+        batch_size: int = 500,
+        dry_run: bool = True,
+        max_diffs: int = 100,
+    ):
+        self.engine = engine
+        self.session_factory = sessionmaker(bind=engine, autoflush=False)
+        self.workers = workers or max(multiprocessing.cpu_count() - 1, 1)
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.max_diffs = max_diffs
+
+    def _iter_batches(self, limit: Optional[int]):
+        """Stream (id, raw_text, item_tables) rows through a server-side cursor in batches"""
+        query = select(Invoice.id, Invoice.raw_text, Invoice.item_tables).where(Invoice.raw_text.isnot(None)).order_by(Invoice.id)
+        if limit:
+            query = query.limit(limit)
+        with self.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=self.batch_size).execute(query)
+            for partition in result.partitions():
+                yield [(row.id, row.raw_text, row.item_tables) for row in partition]
+
+    def _diff(self, invoice: Invoice, extracted: Dict[str, Any]) -> Dict[str, List[Any]]:
+        changes = {}
+        for field in FIELDS:
+            old, new = getattr(invoice, field), extracted[field]
+            if old != new:
+                changes[field] = [old, new]
+
+        old_items = [
+            (item.item_name, item.quantity, item.unit_price, item.total_price)
+            for item in sorted(invoice.items, key=lambda item: item.id)
+        ]
+        if old_items != extracted["items"]:
+            changes["items"] = [old_items, extracted["items"]]
+        return changes
+
+    def _apply(self, session, changed: List[Tuple[Invoice, Dict[str, Any], Dict[str, List[Any]]]]) -> None:
+        """Write back one batch of changes in a single transaction"""
+        field_updates = []
+        item_invoice_ids = []
+        new_items = []
+        revenue_deltas = {}
+        for invoice, extracted, changes in changed:
+            if any(field in changes for field in FIELDS):
+                field_updates.append({"id": invoice.id, **{field: extracted[field] for field in FIELDS}})
+            if "payment_date" in changes or "total_amount" in changes:
+                # Move the invoice between days / amounts in the rollup
+                add_revenue_delta(revenue_deltas, invoice.payment_date, invoice.total_amount, sign=-1)
+                add_revenue_delta(revenue_deltas, extracted["payment_date"], extracted["total_amount"])
+            if "items" in changes:
+                item_invoice_ids.append(invoice.id)
+                new_items.extend(
+                    {
+                        "invoice_id": invoice.id,
+                        "item_name": name,
+                        "quantity": quantity,
+                        "unit_price": unit_price,
+                        "total_price": total_price,
+                    }
+                    for name, quantity, unit_price, total_price in extracted["items"]
+                )
+
+        if field_updates:
+            session.execute(update(Invoice), field_updates)
+        if item_invoice_ids:
+            session.execute(delete(InvoiceItem).where(InvoiceItem.invoice_id.in_(item_invoice_ids)))
+        if new_items:
+            session.execute(insert(InvoiceItem), new_items)
+        DatabaseService(session).adjust_daily_revenue(revenue_deltas)
+        session.commit()
+
+    def _handle_results(self, results, report: Dict[str, Any]) -> None:
+        extracted_by_id = {}
+        for invoice_id, extracted, error in results:
+            if error is not None:
+                report["failed"] += 1
+                if len(report["errors"]) < self.max_diffs:
+                    report["errors"].append({"invoice_id": invoice_id, "error": error})
+            else:
+                extracted_by_id[invoice_id] = extracted
+
+        with self.session_factory() as session:
+            invoices = (
+                session.query(Invoice)
+                .options(selectinload(Invoice.items))
+                .filter(Invoice.id.in_(list(extracted_by_id)))
+                .all()
+            )
+            changed = []
+            for invoice in invoices:
+                extracted = extracted_by_id[invoice.id]
+                changes = self._diff(invoice, extracted)
+                if not changes:
+                    report["unchanged"] += 1
+                    continue
+                report["changed"] += 1
+                for field in changes:
+                    report["changed_fields"][field] = report["changed_fields"].get(field, 0) + 1
+                if len(report["diffs"]) < self.max_diffs:
+                    report["diffs"].append({"invoice_id": invoice.id, "changes": _jsonable(changes)})
+                changed.append((invoice, extracted, changes))
+
+            if changed and not self.dry_run:
+                self._apply(session, changed)
+
+        report["processed"] += len(results)
+
+    def run(self, limit: Optional[int] = None, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Re-extract every stored invoice and return a summary report"""
+        report = {
+            "dry_run": self.dry_run,
+            "processed": 0,
+            "changed": 0,
+            "unchanged": 0,
+            "failed": 0,
+            "changed_fields": {},
+            "diffs": [],
+            "errors": [],
+        }
+        start_time = time.time()
+        max_in_flight = self.workers * 2
+
+        print(f"🔁 Re-extracting invoices with {self.workers} workers (dry_run={self.dry_run})")
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            in_flight = []
+            for batch in self._iter_batches(limit):
+                in_flight.append(pool.submit(_extract_chunk, batch))
+                # Bound memory: never hold more than a few batches in flight
+                while len(in_flight) >= max_in_flight:
+                    self._handle_results(in_flight.pop(0).result(), report)
+                    self._report_progress(report, start_time, progress)
+            for future in in_flight:
+                self._handle_results(future.result(), report)
+                self._report_progress(report, start_time, progress)
+
+        report["seconds"] = round(time.time() - start_time, 2)
+        report["rate_per_second"] = round(report["processed"] / report["seconds"], 1) if report["seconds"] else None
+        print(f"✅ Re-extraction done: {report['processed']} processed, {report['changed']} changed in {report['seconds']}s")
+        return report
+
+    def _report_progress(self, report: Dict[str, Any], start_time: float, progress) -> None:
+        elapsed = time.time() - start_time
+        rate = report["processed"] / elapsed if elapsed else 0.0
+        if progress:
+            progress({**report, "seconds": round(elapsed, 2), "rate_per_second": round(rate, 1)})
+        else:
+            print(f"  {report['processed']} processed, {report['changed']} changed, {rate:.0f} invoices/s")
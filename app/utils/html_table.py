@@ -0,0 +1,92 @@
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+
+class _TableHTMLParser(HTMLParser):
+    """Collect table rows as cell text plus rowspan/colspan, ignoring nested tables"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows: List[List[Tuple[str, int, int]]] = []
+        self._depth = 0
+        self._cell: Optional[List[str]] = None
+        self._span = (1, 1)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            self._depth += 1
+        if self._depth != 1:
+            # Nested table text stays in the outer cell, one space between its cells
+            if self._cell is not None:
+                self._cell.append(' ')
+            return
+        if tag == 'table':
+            return
+        if tag == 'tr':
+            self._close_cell()
+            self.rows.append([])
+        elif tag in ('td', 'th'):
+            self._close_cell()  # HTML allows omitting </td>
+            attributes = dict(attrs)
+            self._cell = []
+            self._span = (_span(attributes, 'rowspan'), _span(attributes, 'colspan'))
+        elif tag == 'br' and self._cell is not None:
+            # A cell that wraps over several lines is still one cell
+            self._cell.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag == 'table':
+            if self._depth == 1:
+                self._close_cell()
+            self._depth -= 1
+        elif self._depth == 1 and tag in ('td', 'th'):
+            self._close_cell()
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def _close_cell(self):
+        if self._cell is None:
+            return
+        if not self.rows:
+            self.rows.append([])
+        text = ' '.join(''.join(self._cell).split())
+        self.rows[-1].append((text, *self._span))
+        self._cell = None
+
+
+def _span(attributes: Dict[str, Optional[str]], name: str) -> int:
+    try:
+        return max(1, int(attributes.get(name) or 1))
+    except ValueError:
+        return 1
+
+
+def parse_html_table(html: str) -> List[List[str]]:
+    """Parse an HTML table into a rectangular grid of cell text, copying spanned cells into every slot they cover"""
+    parser = _TableHTMLParser()
+    parser.feed(html)
+    parser.close()
+
+    grid: List[List[Optional[str]]] = []
+    for row_index, row in enumerate(parser.rows):
+        while len(grid) <= row_index:
+            grid.append([])
+        column = 0
+        for text, rowspan, colspan in row:
+            # Skip slots already filled by a rowspan from an earlier row
+            while column < len(grid[row_index]) and grid[row_index][column] is not None:
+                column += 1
+            for spanned_row in range(row_index, row_index + rowspan):
+                while len(grid) <= spanned_row:
+                    grid.append([])
+                cells = grid[spanned_row]
+                while len(cells) < column + colspan:
+                    cells.append(None)
+                for spanned_column in range(column, column + colspan):
+                    cells[spanned_column] = text
+            column += colspan
+
+    width = max((len(row) for row in grid), default=0)
+    return [[cell or '' for cell in row] + [''] * (width - len(row)) for row in grid if any(row)]
@@ -0,0 +1,46 @@
+import re
+from typing import Optional, Tuple
+
+# Stored images never change: a new upload is a new row with a new hash
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+def strong_etag(content_hash: Optional[str]) -> Optional[str]:
+    """Strong ETag from a content hash, so identical bytes always validate"""
+    return f'"{content_hash}"' if content_hash else None
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison, as RFC 9110 requires for it)"""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range "bytes=" header into an inclusive (start, end)
+
+    Returns None when the header is absent or unsupported (multiple ranges, other units),
+    in which case the full body is served. Raises ValueError when the range cannot be satisfied.
+    """
+    if not range_header:
+        return None
+    match = _RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
@@ -0,0 +1,99 @@
+import asyncio
+import io
+import queue
+import threading
+from typing import AsyncIterator, BinaryIO, Callable, Optional
+
+_DONE = object()
+
+
+class StreamClosed(Exception):
+    """Raised inside the producer thread once the client has gone away"""
+
+
+class QueueWriter(io.RawIOBase):
+    """Write-only, unseekable file object that hands fixed-size chunks to the event loop through a bounded queue"""
+
+    def __init__(self, chunk_size: int = 64 * 1024, max_chunks: int = 16):
+        super().__init__()
+        # A bounded queue is the backpressure: a slow client blocks the producer instead of growing memory
+        self.chunks = queue.Queue(maxsize=max_chunks)
+        self.chunk_size = chunk_size
+        self.reader_closed = threading.Event()
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self.reader_closed.is_set():
+            raise StreamClosed("Client disconnected")
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_size:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+        return len(data)
+
+    def flush(self) -> None:
+        pass  # Chunks are handed over by size; finish() sends the tail
+
+    def _put(self, item) -> None:
+        while True:
+            if self.reader_closed.is_set():
+                raise StreamClosed("Client disconnected")
+            try:
+                self.chunks.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        try:
+            if self._buffer and error is None:
+                self._put(bytes(self._buffer))
+                self._buffer.clear()
+            self._put(error if error is not None else _DONE)
+        except StreamClosed:
+            pass
+
+
+async def stream_from_thread(
+    produce: Callable[[BinaryIO], None], chunk_size: int = 64 * 1024, max_chunks: int = 16
+) -> AsyncIterator[bytes]:
+    """Run produce(file) in a worker thread and yield what it writes as it writes it
+
+    The producer never touches the event loop, and stops at its next write once the
+    consumer is closed (client disconnect).
+    """
+    writer = QueueWriter(chunk_size, max_chunks)
+
+    def run():
+        try:
+            produce(writer)
+        except StreamClosed:
+            return
+        except BaseException as e:
+            print(f"❌ Streaming producer failed: {str(e)}")
+            writer.finish(e)
+            return
+        writer.finish()
+
+    def next_chunk():
+        try:
+            return writer.chunks.get(timeout=1.0)
+        except queue.Empty:
+            return None
+
+    threading.Thread(target=run, name="stream-producer", daemon=True).start()
+    try:
+        while True:
+            item = await asyncio.to_thread(next_chunk)
+            if item is None:
+                continue
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        writer.reader_closed.set()
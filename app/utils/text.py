@@ -0,0 +1,17 @@
+import re
+import unicodedata
+
+# đ/Đ are separate letters, not d plus a combining mark, so NFD leaves them alone
+_EXTRA_FOLDS = str.maketrans({'đ': 'd', 'Đ': 'D'})
+# Every Vietnamese tone and vowel mark decomposes into this combining block
+_COMBINING_MARKS_RE = re.compile(r'[\u0300-\u036f]')
+
+def strip_accents(text: str) -> str:
+    """Remove Vietnamese diacritics so 'Phí' and an OCR-mangled 'Phi' compare equal"""
+    if text.isascii():
+        return text
+    return _COMBINING_MARKS_RE.sub('', unicodedata.normalize('NFD', text.translate(_EXTRA_FOLDS)))
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents, for accent-insensitive keyword matching"""
+    return strip_accents(text).lower()
@@ -3,13 +3,24 @@
 -- Create extension for UUID generation if needed
 -- CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Accent-insensitive full-text and fuzzy search
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- IMMUTABLE wrapper so unaccent can be used in generated columns and indexes
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
 -- Create images table
 CREATE TABLE IF NOT EXISTS images (
     id SERIAL PRIMARY KEY,
     filename VARCHAR(255) NOT NULL,
     content_type VARCHAR(100) NOT NULL,
-    image_data BYTEA NOT NULL,
+    image_data BYTEA,  -- Legacy inline bytes; new images live in the blob store
+    storage_path VARCHAR(255),
     file_size INTEGER NOT NULL,
+    content_hash VARCHAR(64),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -21,7 +32,12 @@ CREATE TABLE IF NOT EXISTS invoices (
     total_amount DECIMAL(12,2),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     image_id INTEGER REFERENCES images(id) ON DELETE SET NULL,
-    raw_text TEXT
+    raw_text TEXT,
+    item_tables JSONB,  -- Marker table grids the items were parsed from, for re-extraction
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', f_unaccent(coalesce(invoice_code, ''))), 'A') ||
+        setweight(to_tsvector('simple', f_unaccent(coalesce(raw_text, ''))), 'B')
+    ) STORED
 );
 
 -- Create invoice_items table
@@ -31,16 +47,49 @@ CREATE TABLE IF NOT EXISTS invoice_items (
     item_name VARCHAR(255),
     quantity INTEGER,
     unit_price DECIMAL(10,2),
-    total_price DECIMAL(10,2)
+    total_price DECIMAL(10,2),
+    search_vector TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', f_unaccent(coalesce(item_name, '')))) STORED
+);
+
+-- Create daily_revenue rollup (maintained by the application on every invoice write)
+CREATE TABLE IF NOT EXISTS daily_revenue (
+    day DATE PRIMARY KEY,
+    invoice_count INTEGER NOT NULL DEFAULT 0,
+    total_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create ocr_jobs table
+CREATE TABLE IF NOT EXISTS ocr_jobs (
+    id SERIAL PRIMARY KEY,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    filename VARCHAR(255),
+    image_id INTEGER REFERENCES images(id) ON DELETE SET NULL,
+    invoice_id INTEGER REFERENCES invoices(id) ON DELETE SET NULL,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    queue_seconds DOUBLE PRECISION,
+    ocr_seconds DOUBLE PRECISION,
+    extraction_seconds DOUBLE PRECISION,
+    save_seconds DOUBLE PRECISION
 );
 
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_images_created_at ON images(created_at);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_images_content_hash ON images(content_hash);
 CREATE INDEX IF NOT EXISTS idx_invoices_payment_date ON invoices(payment_date);
 CREATE INDEX IF NOT EXISTS idx_invoices_invoice_code ON invoices(invoice_code);
-CREATE INDEX IF NOT EXISTS idx_invoices_created_at ON invoices(created_at);
+CREATE INDEX IF NOT EXISTS idx_invoices_created_at_id ON invoices(created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_invoices_image_id ON invoices(image_id);
 CREATE INDEX IF NOT EXISTS idx_invoice_items_invoice_id ON invoice_items(invoice_id);
+CREATE INDEX IF NOT EXISTS idx_invoices_search_vector ON invoices USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS idx_invoice_items_search_vector ON invoice_items USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS idx_invoices_invoice_code_trgm ON invoices USING gin (lower(invoice_code) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_invoices_invoice_code_trgm_count ON invoices ((array_length(show_trgm(lower(invoice_code)), 1)));
+CREATE INDEX IF NOT EXISTS idx_ocr_jobs_status ON ocr_jobs(status, id);
 
 -- Insert sample data (optional)
 -- INSERT INTO invoices (invoice_code, payment_date, total_amount, image_path, raw_text)
@@ -0,0 +1,22 @@
+-- Migration: Add ocr_jobs table for asynchronous OCR processing
+-- Created: 2026-10-17
+
+CREATE TABLE IF NOT EXISTS ocr_jobs (
+    id SERIAL PRIMARY KEY,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    filename VARCHAR(255),
+    image_id INTEGER REFERENCES images(id) ON DELETE SET NULL,
+    invoice_id INTEGER REFERENCES invoices(id) ON DELETE SET NULL,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    queue_seconds DOUBLE PRECISION,
+    ocr_seconds DOUBLE PRECISION,
+    extraction_seconds DOUBLE PRECISION,
+    save_seconds DOUBLE PRECISION
+);
+
+-- Workers poll for the oldest queued job
+CREATE INDEX IF NOT EXISTS idx_ocr_jobs_status ON ocr_jobs(status, id);
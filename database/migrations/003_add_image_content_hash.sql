@@ -0,0 +1,22 @@
+-- Migration: Content-hash deduplication of uploaded images
+-- Created: 2026-10-17
+
+ALTER TABLE images ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+
+-- Backfill SHA-256 hashes. When the same content was uploaded several times,
+-- only the oldest row gets the hash so the unique index can be built without
+-- touching invoices that point at the later copies.
+UPDATE images i
+SET content_hash = h.content_hash
+FROM (
+    SELECT id,
+           encode(sha256(image_data), 'hex') AS content_hash,
+           row_number() OVER (PARTITION BY sha256(image_data) ORDER BY id) AS rn
+    FROM images
+    WHERE content_hash IS NULL
+) h
+WHERE i.id = h.id
+  AND h.rn = 1
+  AND NOT EXISTS (SELECT 1 FROM images x WHERE x.content_hash = h.content_hash);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_images_content_hash ON images(content_hash);
@@ -0,0 +1,12 @@
+-- Migration: Move image bytes out of Postgres into the blob store
+-- Created: 2026-10-17
+
+-- Images now record where their bytes live; image_data stays only until
+-- scripts/migrate_image_blobs.py has copied each row out and cleared it.
+ALTER TABLE images ADD COLUMN IF NOT EXISTS storage_path VARCHAR(255);
+ALTER TABLE images ALTER COLUMN image_data DROP NOT NULL;
+
+-- After the migration script reports no remaining rows, reclaim the space:
+--   VACUUM FULL images;
+-- and, once no deployment reads image_data anymore:
+--   ALTER TABLE images DROP COLUMN image_data;
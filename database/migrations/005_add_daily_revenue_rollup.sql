@@ -0,0 +1,24 @@
+-- Migration: Daily revenue rollup for GET /invoice/summary
+-- Created: 2026-10-17
+
+-- One row per payment day. DatabaseService.create_invoice_from_ocr / delete_invoice
+-- and the re-extraction backfill apply +/- deltas in the same transaction as the
+-- invoice change, so the summary never has to scan invoices.
+CREATE TABLE IF NOT EXISTS daily_revenue (
+    day DATE PRIMARY KEY,
+    invoice_count INTEGER NOT NULL DEFAULT 0,
+    total_amount DECIMAL(14,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Backfill from existing invoices. The lock keeps concurrent inserts from being
+-- counted twice (once here, once by their own delta) while this runs.
+BEGIN;
+LOCK TABLE invoices IN SHARE MODE;
+DELETE FROM daily_revenue;
+INSERT INTO daily_revenue (day, invoice_count, total_amount)
+SELECT payment_date::date, COUNT(*), COALESCE(SUM(total_amount), 0)
+FROM invoices
+WHERE payment_date IS NOT NULL
+GROUP BY payment_date::date;
+COMMIT;
@@ -0,0 +1,10 @@
+-- Migration: Composite index for keyset pagination of GET /invoice
+-- Created: 2026-10-17
+
+-- Pages are read newest first with WHERE (created_at, id) < (:created_at, :id),
+-- which this index answers as a range scan no matter how deep the page is.
+-- CONCURRENTLY keeps inserts running during the build; run outside a transaction.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_invoices_created_at_id ON invoices (created_at DESC, id DESC);
+
+-- The single-column index is a prefix of the new one
+DROP INDEX CONCURRENTLY IF EXISTS idx_invoices_created_at;
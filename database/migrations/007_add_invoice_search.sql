@@ -0,0 +1,32 @@
+-- Migration: Full-text and fuzzy search over invoices (GET /invoice/search)
+-- Created: 2026-10-17
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- unaccent() is only STABLE because its dictionary could be swapped at runtime,
+-- which generated columns and index expressions refuse. Naming the dictionary
+-- explicitly makes the wrapper safe to declare IMMUTABLE. unaccent also folds đ/Đ.
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+-- Accent-folded search documents maintained by Postgres on every insert/update.
+-- The 'simple' configuration only lowercases: Vietnamese has no stemmer and no
+-- stop words worth dropping. Adding a stored column rewrites each table once.
+ALTER TABLE invoices ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', f_unaccent(coalesce(invoice_code, ''))), 'A') ||
+        setweight(to_tsvector('simple', f_unaccent(coalesce(raw_text, ''))), 'B')
+    ) STORED;
+ALTER TABLE invoice_items ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple', f_unaccent(coalesce(item_name, '')))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_invoices_search_vector ON invoices USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS idx_invoice_items_search_vector ON invoice_items USING gin (search_vector);
+
+-- Fuzzy and partial invoice-code lookup (similarity %, ILIKE '%...%')
+CREATE INDEX IF NOT EXISTS idx_invoices_invoice_code_trgm ON invoices USING gin (lower(invoice_code) gin_trgm_ops);
+-- Trigram count of each code: similarity can only reach the threshold for codes of
+-- comparable size, and this range narrows queries whose trigrams every code shares
+CREATE INDEX IF NOT EXISTS idx_invoices_invoice_code_trgm_count ON invoices ((array_length(show_trgm(lower(invoice_code)), 1)));
@@ -0,0 +1,7 @@
+-- Migration: Keep the Marker table grids each invoice's items were parsed from
+-- Created: 2026-10-17
+
+-- Rows of cell text per table block, as ExtractionService received them, so the
+-- re-extraction backfill parses items from the same tables instead of from raw_text.
+-- NULL for invoices stored before this column; those are re-extracted from text.
+ALTER TABLE invoices ADD COLUMN IF NOT EXISTS item_tables JSONB;
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Benchmark single-image OCR calls against one batched Marker pass
+"""
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.model_registry import model_registry
+from app.services.ocr_service import OCRService
+
+DEFAULT_IMAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample", "Sample Invoice.png")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--image", default=DEFAULT_IMAGE, help="Invoice image to replicate")
+    parser.add_argument("--count", type=int, default=50, help="Number of invoices in the batch")
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        image_bytes = f.read()
+    images = [image_bytes] * args.count
+
+    print("📦 Loading Marker models...")
+    model_registry.load()
+    ocr_service = OCRService(model_registry)
+
+    print(f"🐢 Running {args.count} single calls...")
+    start_time = time.time()
+    for image_data in images:
+        ocr_service.extract_text(image_data)
+    single_seconds = time.time() - start_time
+
+    print(f"🚀 Running one batch of {args.count}...")
+    start_time = time.time()
+    ocr_service.extract_text_batch(images)
+    batch_seconds = time.time() - start_time
+
+    cpus = os.cpu_count() or 1
+    print(f"Single calls: {single_seconds:.2f}s ({args.count / single_seconds / cpus:.3f} invoices/s/core)")
+    print(f"Batch:        {batch_seconds:.2f}s ({args.count / batch_seconds / cpus:.3f} invoices/s/core)")
+    print(f"Speedup:      {single_seconds / batch_seconds:.2f}x")
+
+if __name__ == "__main__":
+    main()
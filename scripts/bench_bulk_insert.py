@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Compare invoice + item insert throughput of the previous per-invoice ORM path (add, flush,
+one add per item, commit, refresh) against DatabaseService.bulk_create_invoices with
+multi-row INSERTs and with COPY for the items
+
+Every run deletes the invoices it created and takes their amounts back out of daily_revenue.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.invoice import Invoice, InvoiceItem
+from app.schemas.invoice import InvoiceItemCreate, OCRResponse
+from app.services.database_service import DatabaseService, add_revenue_delta
+
+def synthetic_invoices(count: int, max_items: int, seed: int = 0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    invoices = []
+    for number in range(count):
+        items = []
+        for line in range(rng.randint(1, max_items)):
+            quantity = rng.randint(1, 5)
+            unit_price = Decimal(rng.randrange(5, 500) * 1000)
+            items.append(InvoiceItemCreate(
+                item_name=f"Cà phê sữa đá {line}", quantity=quantity,
+                unit_price=unit_price, total_price=unit_price * quantity
+            ))
+        invoices.append(OCRResponse(
+            invoice_code=f"BENCH{number:08d}",
+            payment_date=start + timedelta(days=rng.randrange(365), minutes=rng.randrange(1440)),
+            total_amount=sum(item.total_price for item in items),
+            items=items,
+            raw_text=f"HÓA ĐƠN BENCH{number:08d}\n" + "\n".join(item.item_name for item in items),
+        ))
+    return invoices
+
+def legacy_create(db, ocr_response: OCRResponse) -> int:
+    """The previous create_invoice_from_ocr"""
+    db_invoice = Invoice(
+        invoice_code=ocr_response.invoice_code,
+        payment_date=ocr_response.payment_date,
+        total_amount=ocr_response.total_amount,
+        raw_text=ocr_response.raw_text
+    )
+    db.add(db_invoice)
+    db.flush()
+    for item in ocr_response.items:
+        db.add(InvoiceItem(
+            invoice_id=db_invoice.id, item_name=item.item_name, quantity=item.quantity,
+            unit_price=item.unit_price, total_price=item.total_price
+        ))
+    deltas = {}
+    add_revenue_delta(deltas, db_invoice.payment_date, db_invoice.total_amount)
+    DatabaseService(db).adjust_daily_revenue(deltas)
+    db.commit()
+    db.refresh(db_invoice)
+    return db_invoice.id
+
+def run_legacy(invoices, batch_size: int):
+    with SessionLocal() as db:
+        return [legacy_create(db, ocr_response) for ocr_response in invoices]
+
+def run_bulk(invoices, batch_size: int):
+    invoice_ids = []
+    with SessionLocal() as db:
+        service = DatabaseService(db)
+        for offset in range(0, len(invoices), batch_size):
+            batch = invoices[offset:offset + batch_size]
+            invoice_ids += service.bulk_create_invoices([(ocr_response, None) for ocr_response in batch])
+    return invoice_ids
+
+def cleanup(invoice_ids, invoices) -> None:
+    with SessionLocal() as db:
+        db.execute(delete(InvoiceItem).where(InvoiceItem.invoice_id.in_(invoice_ids)))
+        db.execute(delete(Invoice).where(Invoice.id.in_(invoice_ids)))
+        deltas = {}
+        for ocr_response in invoices:
+            add_revenue_delta(deltas, ocr_response.payment_date, ocr_response.total_amount, sign=-1)
+        DatabaseService(db).adjust_daily_revenue(deltas)
+        db.commit()
+
+def measure(label: str, func, invoices, batch_size: int) -> None:
+    rows = len(invoices) + sum(len(ocr_response.items) for ocr_response in invoices)
+    start_time = time.perf_counter()
+    invoice_ids = func(invoices, batch_size)
+    elapsed = time.perf_counter() - start_time
+    cleanup(invoice_ids, invoices)
+    assert len(invoice_ids) == len(invoices)
+    print(f"  {label}: {rows} rows in {elapsed:.2f}s, {rows / elapsed:,.0f} rows/s, {len(invoices) / elapsed:,.0f} invoices/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invoices", type=int, default=10000, help="Synthetic invoices to insert")
+    parser.add_argument("--max-items", type=int, default=6, help="Items per invoice, 1 to this many")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Invoices per bulk_create_invoices call")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only run the bulk paths")
+    args = parser.parse_args()
+
+    invoices = synthetic_invoices(args.invoices, args.max_items)
+    items = sum(len(ocr_response.items) for ocr_response in invoices)
+    print(f"{len(invoices)} invoices + {items} items over the configured database, bulk batches of {args.batch_size}")
+    if not args.skip_legacy:
+        measure("per-invoice ORM", run_legacy, invoices, args.batch_size)
+    settings.BULK_COPY_MIN_ROWS = sys.maxsize
+    measure("bulk INSERT    ", run_bulk, invoices, args.batch_size)
+    settings.BULK_COPY_MIN_ROWS = 0
+    measure("bulk COPY items", run_bulk, invoices, args.batch_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Measure request latency of a running API under mixed OCR upload + database query load
+
+OCR workers keep uploading the sample invoice (a fresh nonce per upload, so dedup and the
+OCR cache never short-circuit), query workers read invoice pages, searches and single
+invoices, and a probe hits /health at a fixed interval. While the event loop is blocked
+by a query, the probe latency shows it.
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+DEFAULT_IMAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample", "Sample Invoice.png")
+SEARCH_TERMS = ["phi dich vu", "cafe", "hoang long", "thanh toan", "1C23TDM"]
+
+def unique_png(image: Image.Image) -> bytes:
+    """Same pixels, different bytes: a random text chunk changes the content hash"""
+    info = PngInfo()
+    info.add_text("nonce", uuid.uuid4().hex)
+    output = io.BytesIO()
+    image.save(output, format="PNG", pnginfo=info)
+    return output.getvalue()
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    async def timed(self, label: str, request):
+        start_time = time.perf_counter()
+        try:
+            response = await request
+            ok = response.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        elapsed = (time.perf_counter() - start_time) * 1000
+        self.latencies.setdefault(label, []).append(elapsed)
+        if not ok:
+            self.errors[label] = self.errors.get(label, 0) + 1
+
+    def report(self, duration: float) -> None:
+        print(f"{'request':<10} {'count':>6} {'errors':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for label, values in sorted(self.latencies.items()):
+            print(
+                f"{label:<10} {len(values):>6} {self.errors.get(label, 0):>6} {len(values) / duration:>7.1f} "
+                f"{statistics.median(values):>8.1f} {percentile(values, 0.95):>8.1f} "
+                f"{percentile(values, 0.99):>8.1f} {max(values):>8.1f}"
+            )
+
+async def run(args) -> None:
+    image = Image.open(args.image)
+    image.load()
+    recorder = Recorder()
+    deadline = time.monotonic() + args.duration
+    limits = httpx.Limits(max_connections=args.ocr_concurrency + args.query_concurrency + 4)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        page = (await client.get("/invoice", params={"limit": 100})).json().get("invoices", [])
+        invoice_ids = [invoice["id"] for invoice in page] or [1]
+
+        async def ocr_worker():
+            while time.monotonic() < deadline:
+                files = {"file": ("bench.png", unique_png(image), "image/png")}
+                await recorder.timed("ocr", client.post("/invoice/extract", files=files))
+
+        async def query_worker():
+            while time.monotonic() < deadline:
+                kind = random.choice(["list", "search", "get"])
+                if kind == "list":
+                    request = client.get("/invoice", params={"limit": 100, "fields": "id,invoice_code,total_amount,items"})
+                elif kind == "search":
+                    request = client.get("/invoice/search", params={"q": random.choice(SEARCH_TERMS)})
+                else:
+                    request = client.get(f"/invoice/{random.choice(invoice_ids)}")
+                await recorder.timed(kind, request)
+
+        async def probe():
+            while time.monotonic() < deadline:
+                await recorder.timed("health", client.get("/health"))
+                await asyncio.sleep(args.probe_interval)
+
+        workers = [ocr_worker() for _ in range(args.ocr_concurrency)]
+        workers += [query_worker() for _ in range(args.query_concurrency)]
+        await asyncio.gather(probe(), *workers)
+
+    print(f"Mixed load against {args.url}: {args.ocr_concurrency} OCR + {args.query_concurrency} query workers, {args.duration:.0f}s")
+    recorder.report(args.duration)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL of the running API")
+    parser.add_argument("--image", default=DEFAULT_IMAGE, help="Invoice image to upload")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds of load")
+    parser.add_argument("--ocr-concurrency", type=int, default=2, help="Concurrent OCR uploads")
+    parser.add_argument("--query-concurrency", type=int, default=16, help="Concurrent query requests")
+    parser.add_argument("--probe-interval", type=float, default=0.1, help="Seconds between /health probes")
+    parser.add_argument("--timeout", type=float, default=300, help="Per-request timeout in seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Compare time and peak Python memory of the previous Detailed Invoices export (ORM objects
+with lazy-loaded items into a pandas DataFrame) against the streaming write-only export
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from app.core.database import SessionLocal
+from app.services.database_service import DatabaseService
+from app.services.export_service import DETAIL_COLUMNS, ExportService, detail_rows
+
+class CountingSink(io.RawIOBase):
+    """Unseekable output that only counts bytes, like a client socket"""
+
+    def __init__(self):
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.size += len(data)
+        return len(data)
+
+def legacy_export(output) -> int:
+    """The previous summary export: every invoice in memory, then one DataFrame"""
+    with SessionLocal() as db:
+        invoices = DatabaseService(db).get_invoices_by_date_range()
+        detailed_data = [dict(zip(DETAIL_COLUMNS, row)) for invoice in invoices for row in detail_rows(invoice)]
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            pd.DataFrame(detailed_data).to_excel(writer, sheet_name='Detailed Invoices', index=False)
+        return len(detailed_data)
+
+def measure(label: str, func) -> None:
+    sink = CountingSink()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    rows = func(sink)
+    elapsed = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label}: {rows} rows, {sink.size / 1024:.0f} KiB, {elapsed:.2f}s, peak {peak / 2**20:.1f} MiB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=500, help="Invoices per server-side cursor batch")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only run the streaming export")
+    args = parser.parse_args()
+
+    service = ExportService(SessionLocal, batch_size=args.batch_size)
+    print("Detailed Invoices export over the configured database")
+    if not args.skip_legacy:
+        measure("legacy pandas ", legacy_export)
+    measure("streaming     ", service.write_excel)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Check the precompiled extraction engine against the previous per-field implementation
+and measure the speedup on large raw texts
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.extraction_service import ExtractionService, PATTERNS
+
+class LegacyExtractor:
+    """The previous header-field extraction, kept verbatim as the reference"""
+
+    def __init__(self):
+        self.patterns = PATTERNS
+
+    def clean_text(self, text):
+        text = re.sub(r'\s+', ' ', text)
+        return text.lower().strip()
+
+    def extract_invoice_code(self, text):
+        clean_text = self.clean_text(text)
+        for pattern in self.patterns['invoice_code']:
+            match = re.search(pattern, clean_text, re.IGNORECASE)
+            if match:
+                try:
+                    return match.group(1).upper()
+                except IndexError:
+                    return match.group(0).upper()
+        return None
+
+    def extract_date(self, text):
+        clean_text = self.clean_text(text)
+        vn_date_match = re.search(r'ngày\s*(\d{1,2})\s*tháng\s*(\d{1,2})\s*năm\s*(\d{4})', clean_text, re.IGNORECASE)
+        if vn_date_match:
+            try:
+                day, month, year = vn_date_match.groups()
+                return datetime(int(year), int(month), int(day))
+            except ValueError:
+                pass
+        for pattern in self.patterns['date']:
+            match = re.search(pattern, clean_text)
+            if match:
+                if len(match.groups()) == 3:
+                    continue
+                date_str = match.group(1)
+                for fmt in ['%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y', '%m-%d-%Y']:
+                    try:
+                        return datetime.strptime(date_str, fmt)
+                    except ValueError:
+                        continue
+        return None
+
+    def extract_total_amount(self, text):
+        clean_text = self.clean_text(text)
+        for pattern in self.patterns['total_amount']:
+            match = re.search(pattern, clean_text)
+            if match:
+                try:
+                    amount_str = match.group(1)
+                except IndexError:
+                    amount_str = match.group(0)
+                amount_str = re.sub(r'[,.](?=\d{3})', '', amount_str)
+                amount_str = amount_str.replace(',', '.')
+                try:
+                    return Decimal(amount_str)
+                except:
+                    continue
+        return None
+
+    def extract_headers(self, text):
+        return self.extract_invoice_code(text), self.extract_date(text), self.extract_total_amount(text)
+
+FRAGMENTS = [
+    "HÓA ĐƠN GIÁ TRỊ GIA TĂNG", "Ký hiệu (Serial): 1C23TDM", "Ký hiệu: AB/23E", "Serial) : C24TAA",
+    "Số (No.): 0001234", "Number: 77", "Ngày 25 tháng 01 năm 2024", "Ngày 31 tháng 02 năm 2024",
+    "Ngày: 25/01/2024", "Date: 01-13-2024", "12/05/2023", "Tổng tiền thanh toán (Total payment): 450.000",
+    "Grand total): 1,200,000", "Tổng cộng thanh toán: 99.000", "Tổng cộng: 130.000", "Total: 5,000",
+    "Phí dịch vụ vệ sinh sofa", "Chiếc", "450,000", "Mã tra cứu: ANCF8E1SW3", "1.234.567 đồng",
+    "Đơn vị bán hàng: Công ty TNHH ABC", "STT | Tên hàng | ĐVT | Số lượng | Đơn giá | Thành tiền",
+]
+
+def synthetic_texts(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        lines = rng.sample(FRAGMENTS, rng.randint(0, len(FRAGMENTS)))
+        yield "\n".join(rng.choice([line, line.upper(), line.lower()]) for line in lines)
+
+def timed(func, texts):
+    start_time = time.perf_counter()
+    for text in texts:
+        func(text)
+    return time.perf_counter() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cases", type=int, default=5000, help="Synthetic texts for the equivalence check")
+    parser.add_argument("--large-lines", type=int, default=20000, help="Lines in each large text")
+    parser.add_argument("--runs", type=int, default=20, help="Timing iterations over the large texts")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    legacy = LegacyExtractor()
+    service = ExtractionService()
+
+    def engine_headers(text):
+        result = service.extract_all(text, verbose=False)
+        return result.invoice_code, result.payment_date, result.total_amount
+
+    mismatches = 0
+    for text in synthetic_texts(args.cases, args.seed):
+        expected = legacy.extract_headers(text)
+        if engine_headers(text) != expected or (
+            service.extract_invoice_code(text), service.extract_date(text), service.extract_total_amount(text)
+        ) != expected:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"❌ Mismatch on:\n{text}\n  legacy={expected}\n  engine={engine_headers(text)}")
+    print(f"Equivalence: {args.cases - mismatches}/{args.cases} identical")
+
+    rng = random.Random(args.seed)
+    large_texts = [
+        "\n".join(rng.choice(FRAGMENTS[16:]) for _ in range(args.large_lines)) + "\nTổng cộng: 130.000",
+        "\n".join(rng.choice(FRAGMENTS) for _ in range(args.large_lines)),
+        # No labelled total: falls through to the end-anchored last-resort pattern
+        "\n".join(rng.choice(FRAGMENTS[16:]) for _ in range(args.large_lines)) + "\n1.234.567 đồng",
+    ] * args.runs
+    legacy_seconds = timed(legacy.extract_headers, large_texts)
+
+    def engine_only(text):
+        clean_text = service.clean_text(text)
+        return (
+            service._invoice_code_from(clean_text),
+            service._date_from(clean_text),
+            service._total_amount_from(clean_text),
+        )
+
+    engine_seconds = timed(engine_only, large_texts)
+    print(f"Large texts ({args.large_lines} lines x {len(large_texts)}):")
+    print(f"  legacy: {legacy_seconds * 1000 / len(large_texts):.1f} ms/text")
+    print(f"  engine: {engine_seconds * 1000 / len(large_texts):.1f} ms/text")
+    print(f"  speedup: {legacy_seconds / engine_seconds:.2f}x")
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark the image hand-off to Marker: PIL -> PDF temp file versus the raw image on tmpfs
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+DEFAULT_IMAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample", "Sample Invoice.png")
+
+def legacy_image_to_pdf(image_data: bytes) -> str:
+    """The previous hand-off: decode, re-encode as a quality-95 PDF on disk"""
+    image = Image.open(io.BytesIO(image_data))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_pdf:
+        image.save(temp_pdf.name, format='PDF', quality=95, optimize=True)
+        return temp_pdf.name
+
+def time_handoff(prepare, image_data: bytes, runs: int, converter=None) -> float:
+    """Average milliseconds per invoice for prepare (+ conversion when a converter is given)"""
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        path = prepare(image_data)
+        try:
+            if converter is not None:
+                converter(path)
+        finally:
+            os.unlink(path)
+    return (time.perf_counter() - start_time) * 1000 / runs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--image", default=DEFAULT_IMAGE, help="Invoice image to hand off")
+    parser.add_argument("--runs", type=int, default=20, help="Iterations per variant")
+    parser.add_argument("--with-marker", action="store_true", help="Include the Marker conversion itself")
+    args = parser.parse_args()
+
+    from app.services.ocr_service import OCRService
+    from app.services.model_registry import model_registry
+
+    with open(args.image, "rb") as f:
+        image_bytes = f.read()
+
+    ocr_service = OCRService(model_registry)
+    converter = None
+    if args.with_marker:
+        print("📦 Loading Marker models...")
+        converter = model_registry.load()
+
+    legacy_ms = time_handoff(legacy_image_to_pdf, image_bytes, args.runs, converter)
+    direct_ms = time_handoff(ocr_service._prepare_document, image_bytes, args.runs, converter)
+
+    scope = "hand-off + Marker" if args.with_marker else "hand-off only"
+    print(f"Legacy PDF temp file ({scope}): {legacy_ms:.1f} ms/invoice")
+    print(f"Direct image on tmpfs ({scope}): {direct_ms:.1f} ms/invoice")
+    print(f"Saved: {legacy_ms - direct_ms:.1f} ms/invoice")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Check the single-pass line item parser against the previous look-ahead implementation
+and time both on long and pathological OCR output
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from decimal import Decimal
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.item_parser import ItemTableParser, parse_price
+
+HEADER_WORDS = ['stt', 'description', 'unit', 'quantity', 'price', 'amount', 'tên hàng', 'dvt']
+
+class LegacyItemExtractor:
+    """The item extraction logic as it was before the item parser, kept for comparison"""
+
+    def _clean_price(self, price_str):
+        return parse_price(price_str)
+
+    def extract_items_from_marker_table(self, text):
+        items = []
+        lines = text.split('\n')
+        i = 0
+        while i < len(lines):
+            line = lines[i].strip()
+            if (re.match(r'^\d+$', line) or re.match(r'^\\math.*[a-zA-Z].*$', line)) and i + 4 < len(lines):
+                name_line = lines[i + 1].strip()
+                if (any(word in name_line.lower() for word in HEADER_WORDS) or
+                    len(name_line) < 5 or not 'phí' in name_line.lower()):
+                    i += 1
+                    continue
+                unit_price = None
+                total_price = None
+                qty = 1
+                if i + 5 < len(lines):
+                    line3 = lines[i + 3].strip()
+                    line4 = lines[i + 4].strip()
+                    line5 = lines[i + 5].strip()
+                    if line3.isdigit() and self._clean_price(line4) and self._clean_price(line5):
+                        qty = int(line3)
+                        unit_price = self._clean_price(line4)
+                        total_price = self._clean_price(line5)
+                if not unit_price and i + 4 < len(lines):
+                    line3 = lines[i + 3].strip()
+                    line4 = lines[i + 4].strip()
+                    unit_price = self._clean_price(line3)
+                    total_price = self._clean_price(line4)
+                    qty = 1
+                if (name_line and len(name_line) >= 5 and
+                    unit_price and total_price and
+                    unit_price > 0 and total_price > 0 and
+                    'phí' in name_line.lower()):
+                    items.append((name_line, qty, unit_price, total_price))
+                    i += 6 if qty > 1 and i + 5 < len(lines) else 5
+                else:
+                    i += 1
+            else:
+                i += 1
+        return items
+
+    def extract_items_fallback(self, text):
+        items = []
+        item_matches = re.findall(
+            r'(\d+)\s*\|\s*([^|]+?)\s*\|\s*[^|]*\s*\|\s*([^|]*?)\s*\|\s*([^|]*?)\s*\|\s*([0-9.,]+)\s*\|\s*([0-9.,]+)',
+            text
+        )
+        for stt, name, unit, empty, unit_price_str, total_str in item_matches:
+            name = re.sub(r'<[^>]+>', '', name).strip()
+            if len(name) < 3 or 'phi' not in name.lower():
+                continue
+            unit_price = self._clean_price(unit_price_str)
+            total_price = self._clean_price(total_str)
+            if unit_price and total_price:
+                items.append((name, 1, unit_price, total_price))
+        return items
+
+    def extract_items(self, text):
+        return self.extract_items_from_marker_table(text) or self.extract_items_fallback(text)
+
+NAMES = ["Phí dịch vụ vệ sinh sofa", "Phí vận chuyển", "PHÍ LẮP ĐẶT", "Phí bảo trì định kỳ"]
+NOISE = ["HÓA ĐƠN GIÁ TRỊ GIA TĂNG", "Đơn vị bán hàng: Công ty TNHH ABC", "Cộng tiền hàng", "Ghi chú", "Chiếc"]
+
+def price(rng):
+    return f"{rng.randint(1, 999) * 1000:,}"
+
+def line_invoice(rng):
+    """Marker output with one table cell per line"""
+    lines = rng.sample(NOISE, 2) + ["STT", "Tên hàng hóa, dịch vụ", "ĐVT", "Số lượng", "Đơn giá", "Thành tiền"]
+    for index in range(1, rng.randint(1, 6) + 1):
+        row = [str(index), rng.choice(NAMES), rng.choice(["Chiếc", "Lần", "Bộ"])]
+        if rng.random() < 0.5:
+            row.append(str(rng.randint(2, 9)))
+        row += [price(rng), price(rng)]
+        lines += row
+    return "\n".join(lines + rng.sample(NOISE, 2))
+
+def pipe_invoice(rng):
+    """Marker output with markdown table rows; unaccented names so the old 'phi' filter accepts them"""
+    lines = ["| STT | Tên hàng | | ĐVT | | Đơn giá | Thành tiền |", "|---|---|---|---|---|---|---|"]
+    for index in range(1, rng.randint(1, 6) + 1):
+        name = rng.choice(["Phi dich vu", "Phi van chuyen<br>", "Phi bao tri"])
+        lines.append(f"| {index} | {name} | | Chiếc | | {price(rng)} | {price(rng)} |")
+    return "\n".join(rng.sample(NOISE, 2) + lines)
+
+def as_tuples(items):
+    return [(item.item_name, item.quantity, item.unit_price, item.total_price) for item in items]
+
+def timed(func, text, runs):
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        func(text)
+    return (time.perf_counter() - start_time) * 1000 / runs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cases", type=int, default=3000, help="Generated invoices for the equivalence check")
+    parser.add_argument("--lines", type=int, default=5000, help="Lines in the long text")
+    parser.add_argument("--padding", type=int, default=50, help="Spaces per cell in the pathological row")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    legacy = LegacyItemExtractor()
+    # Same vocabulary as the old hardcoded filter, except header words also catch "ĐVT"
+    item_parser = ItemTableParser(name_keywords=["phí"], header_words=HEADER_WORDS)
+
+    def parse(text):
+        return as_tuples(item_parser.parse_lines(text) or item_parser.parse_pipe_rows(text))
+
+    rng = random.Random(args.seed)
+    mismatches = 0
+    for case in range(args.cases):
+        text = line_invoice(rng) if case % 2 else pipe_invoice(rng)
+        expected, actual = legacy.extract_items(text), parse(text)
+        if expected != actual:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"❌ Mismatch on:\n{text}\n  legacy={expected}\n  parser={actual}")
+    print(f"Equivalence: {args.cases - mismatches}/{args.cases} identical")
+
+    long_text = "\n".join(line_invoice(rng) for _ in range(args.lines // 30))
+    # Space-padded cells and no price cell: the old fallback regex tries every way to split the padding
+    pathological = "1 |" + ("a" + " " * args.padding + "|") * 6 + " x"
+    for label, text in (("long invoice text", long_text), ("pathological pipe row", pathological)):
+        runs = 1 if label.startswith("pathological") else args.runs
+        legacy_ms = timed(legacy.extract_items, text, runs)
+        parser_ms = timed(parse, text, runs)
+        print(f"{label} ({len(text)} chars): legacy {legacy_ms:.1f} ms, parser {parser_ms:.1f} ms")
+
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark the Marker output walker: the previous recursive closure with inline
+re.sub calls versus the iterative generator in app/services/marker_output.py
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.marker_output import iter_text_chunks
+
+def legacy_extract_text(document) -> str:
+    """The previous OCRService._extract_text_from_json_output, kept for comparison"""
+    text_content = []
+
+    def extract_from_block(block):
+        if hasattr(block, 'children') and block.children:
+            for child in block.children:
+                extract_from_block(child)
+        elif hasattr(block, 'html') and block.html:
+            clean_text = re.sub(r'<[^>]+>', ' ', block.html)
+            clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+            if clean_text:
+                text_content.append(clean_text)
+    extract_from_block(document)
+    return '\n'.join(text_content)
+
+def walker_extract_text(document) -> str:
+    return '\n'.join(chunk.text for chunk in iter_text_chunks(document))
+
+CELL_HTML = [
+    "<td>Phí dịch vụ vệ sinh sofa</td>", "<th colspan=\"2\">Đơn giá<br>(Unit price)</th>", "<td>450,000</td>",
+    "<p>Ký hiệu (Serial): <b>1C23TDM</b></p>", "<td>  </td>", "<td></td>", "<p>Ngày 25 tháng 01 năm 2024</p>",
+]
+
+def block(block_type, html="", children=None):
+    return SimpleNamespace(
+        id=f"/page/0/{block_type}/{random.randint(0, 10**6)}", block_type=block_type,
+        html=html, bbox=[0.0, 0.0, 10.0, 10.0], children=children,
+    )
+
+def dense_document(pages: int, tables: int, rows: int, columns: int, rng: random.Random):
+    """A document tree shaped like Marker's: pages -> text/table groups -> tables -> cells"""
+    page_blocks = []
+    for _ in range(pages):
+        children = [block("Text", rng.choice(CELL_HTML)) for _ in range(20)]
+        for _ in range(tables):
+            cells = [block("TableCell", rng.choice(CELL_HTML)) for _ in range(rows * columns)]
+            children.append(block("TableGroup", children=[block("Table", "<content-ref/>", cells)]))
+        page_blocks.append(block("Page", "<content-ref/>", children))
+    return block("Document", children=page_blocks)
+
+def timed(func, document, runs: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        func(document)
+    return (time.perf_counter() - start_time) * 1000 / runs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--tables", type=int, default=3, help="Tables per page")
+    parser.add_argument("--rows", type=int, default=60)
+    parser.add_argument("--columns", type=int, default=7)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    document = dense_document(args.pages, args.tables, args.rows, args.columns, rng)
+    leaves = args.pages * (20 + args.tables * args.rows * args.columns)
+
+    if legacy_extract_text(document) != walker_extract_text(document):
+        print("❌ Walker output differs from the previous implementation")
+        sys.exit(1)
+
+    legacy_ms = timed(legacy_extract_text, document, args.runs)
+    walker_ms = timed(walker_extract_text, document, args.runs)
+    print(f"Document with {leaves} leaf blocks, {args.runs} runs (identical output)")
+    print(f"  legacy recursive: {legacy_ms:.2f} ms")
+    print(f"  iterative walker: {walker_ms:.2f} ms")
+    print(f"  speedup: {legacy_ms / walker_ms:.2f}x")
+
+if __name__ == "__main__":
+    main()
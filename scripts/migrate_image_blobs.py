@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Move image bytes still stored in the images.image_data BYTEA column into the blob store
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select, update
+from app.core.database import engine
+from app.models.invoice import Image
+from app.services.blob_store import blob_store
+
+def pending_filter():
+    return Image.storage_path.is_(None), Image.image_data.isnot(None)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=50, help="Rows fetched and committed at a time")
+    parser.add_argument("--keep-data", action="store_true", help="Copy blobs but leave image_data in place")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after N rows")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        remaining = conn.execute(select(func.count()).select_from(Image).where(*pending_filter())).scalar()
+    print(f"🚚 {remaining} images to move into the blob store ({type(blob_store).__name__})")
+
+    moved, mismatched, last_id = 0, 0, 0
+    start_time = time.time()
+    while args.limit is None or moved < args.limit:
+        batch_size = args.batch_size if args.limit is None else min(args.batch_size, args.limit - moved)
+        # Keyset batches: only batch_size blobs are in memory, and a rerun resumes where it stopped
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(Image.id, Image.content_hash, Image.image_data)
+                .where(*pending_filter(), Image.id > last_id)
+                .order_by(Image.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            for row in rows:
+                last_id = row.id
+                data = bytes(row.image_data)
+                content_hash = hashlib.sha256(data).hexdigest()
+                if row.content_hash and row.content_hash != content_hash:
+                    # Keys must match the bytes; leave such rows for manual inspection
+                    mismatched += 1
+                    print(f"⚠️ Image {row.id}: stored hash {row.content_hash[:12]} does not match its bytes, skipped")
+                    continue
+
+                values = {"storage_path": blob_store.put(content_hash, data)}
+                if not args.keep_data:
+                    values["image_data"] = None
+                conn.execute(update(Image).where(Image.id == row.id).values(**values))
+                moved += 1
+
+        elapsed = time.time() - start_time
+        print(f"  {moved}/{remaining} moved, {moved / elapsed if elapsed else 0:.0f} images/s")
+
+    print(f"✅ Moved {moved} images in {time.time() - start_time:.1f}s, {mismatched} skipped")
+    if moved and not args.keep_data:
+        print("💡 Run VACUUM FULL images; to return the freed space to the OS")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Report how each preprocessing step affects OCR latency and extracted fields on a sample set
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.extraction_service import ExtractionService
+from app.services.model_registry import model_registry
+from app.services.ocr_cache import OCRCache
+from app.services.ocr_service import OCRService
+from app.services.preprocessing_service import ImagePreprocessor
+
+DEFAULT_SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample")
+IMAGE_PATTERNS = ("*.png", "*.jpg", "*.jpeg", "*.tiff", "*.bmp")
+
+def variants(target_dpi):
+    """Baseline, each step on its own, then the full pipeline"""
+    yield "none", ImagePreprocessor([], target_dpi=target_dpi)
+    for step in ImagePreprocessor.AVAILABLE_STEPS:
+        yield step, ImagePreprocessor([step], target_dpi=target_dpi)
+    yield "all", ImagePreprocessor(list(ImagePreprocessor.AVAILABLE_STEPS), target_dpi=target_dpi)
+
+def fields(ocr_response):
+    return {
+        "invoice_code": ocr_response.invoice_code,
+        "payment_date": ocr_response.payment_date,
+        "total_amount": ocr_response.total_amount,
+        "items": len(ocr_response.items),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", default=DEFAULT_SAMPLES, help="Directory of invoice images")
+    parser.add_argument("--target-dpi", type=int, default=200, help="DPI used by the downscale step")
+    args = parser.parse_args()
+
+    paths = sorted(path for pattern in IMAGE_PATTERNS for path in glob.glob(os.path.join(args.samples, pattern)))
+    if not paths:
+        print(f"❌ No images found in {args.samples}")
+        sys.exit(1)
+
+    print("📦 Loading Marker models...")
+    model_registry.load()
+    extraction_service = ExtractionService()
+    no_cache = OCRCache(root="", max_bytes=0, enabled=False)
+
+    baseline = {}
+    print(f"{'variant':<10} {'image':<30} {'prep ms':>8} {'ocr s':>7} {'size':>11}  fields vs baseline")
+    for name, preprocessor in variants(args.target_dpi):
+        ocr_service = OCRService(model_registry, cache=no_cache, preprocessor=preprocessor)
+        for path in paths:
+            with open(path, "rb") as f:
+                image_data = f.read()
+
+            prep_ms, size = 0.0, "-"
+            if preprocessor.enabled:
+                _, report = preprocessor.process_bytes(image_data)
+                prep_ms = sum(report["steps_ms"].values())
+                size = "x".join(str(v) for v in report["output_size"])
+
+            start_time = time.time()
+            document = ocr_service.extract_document(image_data)
+            ocr_seconds = time.time() - start_time
+            result = fields(extraction_service.extract_all(document.text, verbose=False, tables=document.tables))
+
+            if name == "none":
+                baseline[path] = result
+                comparison = "baseline"
+            else:
+                changed = [key for key, value in result.items() if value != baseline[path][key]]
+                comparison = "same" if not changed else f"changed: {', '.join(changed)}"
+            print(f"{name:<10} {os.path.basename(path)[:30]:<30} {prep_ms:>8.1f} {ocr_seconds:>7.2f} {size:>11}  {comparison}")
+
+if __name__ == "__main__":
+    main()
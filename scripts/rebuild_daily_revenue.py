@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Check the daily_revenue rollup against a GROUP BY over invoices, and rebuild it on drift
+"""
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import session_scope
+from app.services.database_service import DatabaseService
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the rollup even when it matches")
+    args = parser.parse_args()
+
+    with session_scope() as db:
+        db_service = DatabaseService(db)
+        expected = {day: (count, amount) for day, count, amount in db_service.compute_daily_revenue()}
+        actual = {row.day: (row.invoice_count, row.total_amount) for row in db_service.get_daily_revenue()}
+
+        drifted = sorted(day for day in expected.keys() | actual.keys() if expected.get(day) != actual.get(day))
+        for day in drifted[:20]:
+            print(f"⚠️ {day}: rollup {actual.get(day)} != invoices {expected.get(day)}")
+        print(f"📊 {len(expected)} days in invoices, {len(drifted)} drifted")
+
+        if drifted or args.rebuild:
+            days = db_service.rebuild_daily_revenue()
+            print(f"✅ Rebuilt daily_revenue: {days} days")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Re-run invoice field extraction over stored raw_text after the patterns change
+"""
+import argparse
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import engine
+from app.services.reextraction_service import ReextractionService
+
+def print_progress(report):
+    print(
+        f"⏳ {report['processed']} processed, {report['changed']} changed, "
+        f"{report['failed']} failed, {report['rate_per_second']} invoices/s"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--apply", action="store_true", help="Write changes back (default is a dry run)")
+    parser.add_argument("--limit", type=int, default=None, help="Only process the first N invoices")
+    parser.add_argument("--batch-size", type=int, default=500, help="Invoices per batch/transaction")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPUs - 1)")
+    parser.add_argument("--max-diffs", type=int, default=100, help="Diffs kept in the report")
+    parser.add_argument("--report", default=None, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    service = ReextractionService(
+        engine,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        dry_run=not args.apply,
+        max_diffs=args.max_diffs,
+    )
+    report = service.run(limit=args.limit, progress=print_progress)
+
+    print(f"📊 Changed fields: {report['changed_fields']}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📝 Report written to {args.report}")
+    else:
+        for diff in report["diffs"]:
+            print(json.dumps(diff, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import random
+import re
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.services.extraction_service import PATTERNS, ExtractionService
+
+
+class LegacyExtractor:
+    """Header-field extraction before patterns were precompiled, the reference for equivalence"""
+
+    def clean_text(self, text):
+        text = re.sub(r'\s+', ' ', text)
+        return text.lower().strip()
+
+    def extract_invoice_code(self, text):
+        clean_text = self.clean_text(text)
+        for pattern in PATTERNS['invoice_code']:
+            match = re.search(pattern, clean_text, re.IGNORECASE)
+            if match:
+                try:
+                    return match.group(1).upper()
+                except IndexError:
+                    return match.group(0).upper()
+        return None
+
+    def extract_date(self, text):
+        clean_text = self.clean_text(text)
+        vn_date_match = re.search(r'ngày\s*(\d{1,2})\s*tháng\s*(\d{1,2})\s*năm\s*(\d{4})', clean_text, re.IGNORECASE)
+        if vn_date_match:
+            try:
+                day, month, year = vn_date_match.groups()
+                return datetime(int(year), int(month), int(day))
+            except ValueError:
+                pass
+        for pattern in PATTERNS['date']:
+            match = re.search(pattern, clean_text)
+            if match:
+                if len(match.groups()) == 3:
+                    continue
+                date_str = match.group(1)
+                for fmt in ['%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y', '%m-%d-%Y']:
+                    try:
+                        return datetime.strptime(date_str, fmt)
+                    except ValueError:
+                        continue
+        return None
+
+    def extract_total_amount(self, text):
+        clean_text = self.clean_text(text)
+        for pattern in PATTERNS['total_amount']:
+            match = re.search(pattern, clean_text)
+            if match:
+                try:
+                    amount_str = match.group(1)
+                except IndexError:
+                    amount_str = match.group(0)
+                amount_str = re.sub(r'[,.](?=\d{3})', '', amount_str)
+                amount_str = amount_str.replace(',', '.')
+                try:
+                    return Decimal(amount_str)
+                except Exception:
+                    continue
+        return None
+
+    def headers(self, text):
+        return self.extract_invoice_code(text), self.extract_date(text), self.extract_total_amount(text)
+
+
+FRAGMENTS = [
+    "HÓA ĐƠN GIÁ TRỊ GIA TĂNG", "Ký hiệu (Serial): 1C23TDM", "Ký hiệu: AB/23E", "Serial) : C24TAA",
+    "Số (No.): 0001234", "Number: 77", "Ngày 25 tháng 01 năm 2024", "Ngày 31 tháng 02 năm 2024",
+    "Ngày: 25/01/2024", "Date: 01-13-2024", "12/05/2023", "Tổng tiền thanh toán (Total payment): 450.000",
+    "Grand total): 1,200,000", "Tổng cộng thanh toán: 99.000", "Tổng cộng: 130.000", "Total: 5,000",
+    "Phí dịch vụ vệ sinh sofa", "Chiếc", "450,000", "Mã tra cứu: ANCF8E1SW3", "1.234.567 đồng",
+    "Đơn vị bán hàng: Công ty TNHH ABC", "STT | Tên hàng | ĐVT | Số lượng | Đơn giá | Thành tiền",
+]
+# Fragments without a labelled total, so long texts fall through to the end-anchored pattern
+UNLABELLED = FRAGMENTS[16:20] + FRAGMENTS[21:]
+
+
+def synthetic_texts(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        lines = rng.sample(FRAGMENTS, rng.randint(0, len(FRAGMENTS)))
+        separator = rng.choice(["\n", "\r\n", "\n\n", " \t", "\xa0\n"])
+        yield separator.join(rng.choice([line, line.upper(), line.lower()]) for line in lines)
+
+
+@pytest.fixture(scope="module")
+def service():
+    return ExtractionService()
+
+
+@pytest.fixture(scope="module")
+def legacy():
+    return LegacyExtractor()
+
+
+def extract_all_headers(service, text):
+    result = service.extract_all(text, verbose=False)
+    return result.invoice_code, result.payment_date, result.total_amount
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_extract_all_matches_legacy_on_synthetic_texts(service, legacy, seed):
+    for text in synthetic_texts(250, seed):
+        expected = legacy.headers(text)
+        assert extract_all_headers(service, text) == expected, text
+        assert (
+            service.extract_invoice_code(text), service.extract_date(text), service.extract_total_amount(text)
+        ) == expected, text
+
+
+@pytest.mark.parametrize("text", [
+    "  Tổng cộng:\t130.000 \n",
+    "a b c　d\x0be\x0cf\r\ng",
+    "x\x1cy\x1dz\x1ew\x1fv\x85u t s",
+    "",
+    " \n\t ",
+])
+def test_clean_text_matches_regex_whitespace_collapse(service, legacy, text):
+    assert service.clean_text(text) == legacy.clean_text(text)
+
+
+@pytest.mark.parametrize("ending", [
+    "\n1.234.567 đồng",
+    "\n1.234.567 vnd",
+    "\n1.234.567",
+    "\n1.234.567   ",
+    "\nsố tiền 12.000.000 đồng  ",
+    "\n450,000",
+    "\n99.00",
+    "\ncảm ơn quý khách",
+    "\nvnd",
+    "\n. . 1 .",
+])
+def test_end_anchored_total_on_long_text(service, legacy, ending):
+    rng = random.Random(7)
+    text = "\n".join(rng.choice(UNLABELLED) for _ in range(5000)) + ending
+    assert extract_all_headers(service, text) == legacy.headers(text)
+
+
+def test_end_anchored_total_on_random_tails(service, legacy):
+    # The tail scan only considers TAIL_CHARS, so fuzz with those and a few others mixed in
+    rng = random.Random(11)
+    alphabet = "0123456789. đồngvnd,x\n"
+    prefix = "\n".join(rng.choice(UNLABELLED) for _ in range(200)) + "\n"
+    for _ in range(500):
+        text = prefix + "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        assert service.extract_total_amount(text) == legacy.extract_total_amount(text), repr(text[-30:])
+
+
+def test_extract_all_reads_header_fields(service):
+    result = service.extract_all(
+        "HÓA ĐƠN\nKý hiệu (Serial): 1C23TDM\nNgày 25 tháng 01 năm 2024\n"
+        "Tổng tiền thanh toán (Total payment): 450.000",
+        verbose=False,
+    )
+    assert result.invoice_code == "1C23TDM"
+    assert result.payment_date == datetime(2024, 1, 25)
+    assert result.total_amount == Decimal("450000")
+
+
+def test_long_text_total_comes_from_end_anchored_pattern(service):
+    rng = random.Random(7)
+    text = "\n".join(rng.choice(UNLABELLED) for _ in range(5000)) + "\n1.234.567 đồng"
+    assert service.extract_total_amount(text) == Decimal("1234567")
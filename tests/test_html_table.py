@@ -0,0 +1,46 @@
+from app.utils.html_table import parse_html_table
+
+
+def test_colspan_is_copied_into_every_covered_column():
+    html = "<table><tr><th colspan='2'>Hàng hóa</th><th>Tiền</th></tr><tr><td>A</td><td>B</td><td>1</td></tr></table>"
+
+    assert parse_html_table(html) == [["Hàng hóa", "Hàng hóa", "Tiền"], ["A", "B", "1"]]
+
+
+def test_rowspan_fills_the_same_column_of_following_rows():
+    html = (
+        "<table>"
+        "<tr><td rowspan='3'>Phí</td><td>1</td></tr>"
+        "<tr><td>2</td></tr>"
+        "<tr><td>3</td></tr>"
+        "</table>"
+    )
+
+    assert parse_html_table(html) == [["Phí", "1"], ["Phí", "2"], ["Phí", "3"]]
+
+
+def test_rowspan_and_colspan_together():
+    html = (
+        "<table>"
+        "<tr><td rowspan='2' colspan='2'>X</td><td>a</td></tr>"
+        "<tr><td>b</td></tr>"
+        "<tr><td>c</td><td>d</td><td>e</td></tr>"
+        "</table>"
+    )
+
+    assert parse_html_table(html) == [["X", "X", "a"], ["X", "X", "b"], ["c", "d", "e"]]
+
+
+def test_short_rows_are_padded_and_invalid_spans_count_as_one():
+    html = "<table><tr><td colspan='abc'>a</td><td>b</td><td>c</td></tr><tr><td colspan='0'>d</td></tr></table>"
+
+    assert parse_html_table(html) == [["a", "b", "c"], ["d", "", ""]]
+
+
+def test_cell_text_is_collapsed_and_nested_tables_stay_in_their_cell():
+    html = (
+        "<table><tr><td>Phí<br>dịch   vụ</td>"
+        "<td><table><tr><td>in</td><td>ner</td></tr></table></td></tr></table>"
+    )
+
+    assert parse_html_table(html) == [["Phí dịch vụ", "in ner"]]
@@ -0,0 +1,45 @@
+import pytest
+
+from app.utils.http_cache import etag_matches, parse_range, strong_etag
+
+ETAG = strong_etag("abc123")
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),  # 206 for the first 100 bytes
+    ("bytes=100-", (100, 999)),  # Open-ended
+    ("bytes=-100", (900, 999)),  # Suffix: the last 100 bytes
+    ("bytes=-5000", (0, 999)),  # Suffix longer than the body is the whole body
+    ("bytes=900-5000", (900, 999)),  # End past the body is clamped
+    (" bytes=0-0 ", (0, 0)),
+])
+def test_parse_range_satisfiable(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [None, "", "bytes=-", "bytes=0-1,5-9", "items=0-9", "bytes=a-b"])
+def test_parse_range_unsupported_serves_full_body(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-2000", "bytes=50-10", "bytes=-0"])
+def test_parse_range_unsatisfiable_raises_for_416(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
+
+
+def test_strong_etag_quotes_content_hash():
+    assert ETAG == '"abc123"'
+    assert strong_etag(None) is None
+
+
+@pytest.mark.parametrize("if_none_match", [ETAG, f"W/{ETAG}", f'"other", {ETAG}', "*", f"  {ETAG}  "])
+def test_etag_matches_for_304(if_none_match):
+    assert etag_matches(if_none_match, ETAG)
+
+
+@pytest.mark.parametrize("if_none_match, etag", [
+    (None, ETAG), ("", ETAG), ('"other"', ETAG), ("abc123", ETAG), (ETAG, None), ("*", None),
+])
+def test_etag_does_not_match(if_none_match, etag):
+    assert not etag_matches(if_none_match, etag)
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+import pytest
+
+from app.services.item_parser import ItemTableParser
+
+VN_HEADER = ["STT", "Tên hàng hóa, dịch vụ", "ĐVT", "Số lượng", "Đơn giá", "Thành tiền (Total price)"]
+
+
+@pytest.mark.parametrize("header", [
+    VN_HEADER,
+    ["No.", "Description", "Unit", "Quantity", "Unit price", "Amount"],
+    ["STT (No.)", "Tên hàng hóa, dịch vụ (Name)", "Đơn vị tính (Unit)", "Số lượng (Quantity)",
+     "Đơn giá (Unit price)", "Thành tiền (Total)"],
+])
+def test_map_columns_gives_each_column_its_most_specific_field(header):
+    assert ItemTableParser.map_columns(header) == {
+        "index": 0, "item_name": 1, "unit": 2, "quantity": 3, "unit_price": 4, "total_price": 5,
+    }
+
+
+def test_printed_line_total_is_used_not_recomputed():
+    parser = ItemTableParser()
+    rows = [VN_HEADER, ["1", "Phí vận chuyển", "Chuyến", "3", "100.000", "270.000"]]
+
+    [item] = parser.parse_tables([rows])
+
+    assert (item.quantity, item.unit_price, item.total_price) == (3, Decimal("100000"), Decimal("270000"))
+
+
+def test_parse_tables_skips_noise_rows_and_fills_missing_prices():
+    parser = ItemTableParser()
+    rows = [
+        ["STT", "Tên hàng hóa, dịch vụ", "Số lượng", "Thành tiền"],
+        ["1", "Phí dịch vụ vệ sinh sofa", "2", "900.000"],
+        ["", "Cộng tiền hàng", "", "900.000"],  # Subtotal row: no item keyword
+        ["2", "Phí", "1", "50.000"],  # Too short to be an item name
+        ["3", "Phí gửi xe tháng 10", "", "120.000"],
+    ]
+
+    items = parser.parse_tables([rows])
+
+    assert [(item.item_name, item.quantity, item.unit_price, item.total_price) for item in items] == [
+        ("Phí dịch vụ vệ sinh sofa", 2, Decimal("450000"), Decimal("900000")),
+        ("Phí gửi xe tháng 10", 1, Decimal("120000"), Decimal("120000")),
+    ]
+
+
+def test_parse_tables_merges_header_split_over_two_rows():
+    parser = ItemTableParser()
+    rows = [
+        ["STT", "Tên hàng hóa, dịch vụ", "Số lượng", "Đơn giá", "Thành tiền"],
+        ["No.", "Description", "Quantity", "Unit price", "Amount"],
+        ["1", "Phí vận chuyển", "2", "100.000", "200.000"],
+    ]
+
+    [item] = parser.parse_tables([rows])
+
+    assert (item.item_name, item.quantity, item.total_price) == ("Phí vận chuyển", 2, Decimal("200000"))
+
+
+def test_parse_tables_ignores_tables_without_item_header():
+    parser = ItemTableParser()
+    signature_table = [["Người mua hàng", "Người bán hàng"], ["Phí dịch vụ khác", "450.000"]]
+    item_table = [["Tên hàng", "Đơn giá"], ["Phí giao hàng nhanh", "30.000"]]
+
+    [item] = parser.parse_tables([signature_table, item_table])
+
+    assert (item.item_name, item.quantity, item.unit_price, item.total_price) == (
+        "Phí giao hàng nhanh", 1, Decimal("30000"), Decimal("30000"),
+    )
+
+
+@pytest.mark.parametrize("total_cell", ["450,000", "450,000 VND", "450,000đ"])
+def test_parse_pipe_rows_reads_leading_amount_of_total_cell(total_cell):
+    parser = ItemTableParser()
+
+    [item] = parser.parse_pipe_rows(f"1 | Phi dich vu ve sinh sofa | | Chiếc | | 450,000 | {total_cell}")
+
+    assert (item.item_name, item.unit_price, item.total_price) == (
+        "Phi dich vu ve sinh sofa", Decimal("450000"), Decimal("450000"),
+    )
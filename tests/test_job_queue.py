@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import database
+from app.core.database import session_scope
+from app.models.invoice import OCRJob
+from app.services.database_service import DatabaseService
+
+
+@pytest.fixture
+def sqlite_sessions(monkeypatch):
+    engine = create_engine("sqlite://")
+    OCRJob.__table__.create(engine)
+    # Same session settings as the app (expire_on_commit stays on), only the database differs
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    yield
+    engine.dispose()
+
+
+def test_claimed_job_is_usable_after_the_session_closes(sqlite_sessions):
+    with session_scope() as db:
+        DatabaseService(db).create_job(image_id=7, filename="a.png")
+
+    with session_scope() as db:
+        job = DatabaseService(db).claim_next_job()
+
+    # The worker reads these after _with_db has closed the session
+    assert (job.id, job.image_id, job.status, job.attempts) == (1, 7, "running", 1)
+    assert job.queue_seconds is not None and job.queue_seconds >= 0
+
+
+def test_claim_returns_none_when_queue_is_empty(sqlite_sessions):
+    with session_scope() as db:
+        assert DatabaseService(db).claim_next_job() is None
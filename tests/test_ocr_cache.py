@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from app.services.ocr_cache import OCRCache
+
+FINGERPRINT = "f" * 64
+
+
+def content_hash(number: int) -> str:
+    return f"{number:064x}"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    # Each entry is about 100 bytes; room for three of them
+    return OCRCache(root=str(tmp_path), max_bytes=350)
+
+
+def put(cache: OCRCache, number: int) -> None:
+    cache.put(FINGERPRINT, content_hash(number), {"text": "x" * 80})
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    for number in range(3):
+        put(cache, number)
+    assert cache.get(FINGERPRINT, content_hash(0)) is not None  # 0 becomes most recent
+
+    put(cache, 3)
+
+    assert cache.get(FINGERPRINT, content_hash(1)) is None
+    for number in (0, 2, 3):
+        assert cache.get(FINGERPRINT, content_hash(number)) == {"text": "x" * 80}
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 3
+    assert cache.stats()["bytes"] <= 350
+
+
+def test_rewriting_an_entry_does_not_double_count(cache):
+    for _ in range(5):
+        put(cache, 0)
+
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["evictions"] == 0
+
+
+def test_recency_survives_a_restart(cache, tmp_path):
+    for number in range(3):
+        put(cache, number)
+        path = cache._path(FINGERPRINT, content_hash(number), "")
+        os.utime(path, (1000 + number, 1000 + number))  # Distinct mtimes for the index rebuild
+    os.utime(cache._path(FINGERPRINT, content_hash(0), ""), (2000, 2000))
+
+    restarted = OCRCache(root=str(tmp_path), max_bytes=350)
+    put(restarted, 3)
+
+    assert restarted.get(FINGERPRINT, content_hash(1)) is None
+    assert restarted.get(FINGERPRINT, content_hash(0)) is not None
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = OCRCache(root=str(tmp_path), max_bytes=1000, enabled=False)
+    put(cache, 0)
+
+    assert cache.get(FINGERPRINT, content_hash(0)) is None
+    assert os.listdir(tmp_path) == []
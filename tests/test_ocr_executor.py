@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.ocr_executor import OCRExecutor, OCRQueueFullError
+
+
+@pytest.fixture
+def executor():
+    executor = OCRExecutor(max_workers=1, max_queue=1, retry_after=7)
+    yield executor
+    executor.shutdown()
+
+
+def test_admits_workers_plus_queue_then_rejects(executor):
+    release = threading.Event()
+    running = executor.submit(release.wait)
+    queued = executor.submit(lambda: "queued")
+
+    with pytest.raises(OCRQueueFullError) as error:
+        executor.submit(lambda: "rejected")
+    assert error.value.retry_after == 7
+    assert executor.stats()["rejected"] == 1
+    assert executor.stats()["running"] + executor.stats()["queue_depth"] == 2
+
+    release.set()
+    running.result(timeout=5)
+    assert queued.result(timeout=5) == "queued"
+
+
+def test_slot_is_freed_after_completion_and_failure(executor):
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        executor.submit(fail).result(timeout=5)
+    assert executor.submit(lambda: 42).result(timeout=5) == 42
+
+    stats = executor.stats()
+    assert (stats["completed"], stats["failed"], stats["running"], stats["queue_depth"]) == (1, 1, 0, 0)
+
+
+def test_cancelled_queued_job_frees_its_slot(executor):
+    release = threading.Event()
+    running = executor.submit(release.wait)
+    queued = executor.submit(lambda: "never")
+
+    assert queued.cancel()
+    assert executor.stats()["queue_depth"] == 0
+    executor.submit(lambda: "admitted")
+    release.set()
+    running.result(timeout=5)
+
+
+def test_run_awaits_the_result(executor):
+    assert asyncio.run(executor.run(lambda value: value * 2, 21, timeout=5)) == 42
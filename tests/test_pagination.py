@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import pytest
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("created_at, invoice_id", [
+    (datetime(2024, 1, 25, 9, 30, 15, 123456), 1),
+    (datetime(2024, 12, 31, 23, 59, 59), 2_147_483_647),
+    (datetime(2000, 1, 1), 0),
+])
+def test_cursor_round_trip(created_at, invoice_id):
+    cursor = encode_cursor(created_at, invoice_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, invoice_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "e30", encode_cursor(datetime(2024, 1, 1), 1)[:-3]])
+def test_decode_cursor_rejects_foreign_values(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
@@ -0,0 +1,57 @@
+import io
+from unittest import mock
+
+import cv2
+from PIL import Image
+
+from app.services.preprocessing_service import ImagePreprocessor
+
+
+def encoded(width: int, height: int, format: str = "JPEG") -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), "white").save(output, format=format)
+    return output.getvalue()
+
+
+def test_image_within_max_side_is_returned_without_decoding():
+    preprocessor = ImagePreprocessor(steps=["downscale"], target_dpi=100, page_long_side_inches=10)
+    image_data = encoded(800, 600)
+
+    with mock.patch.object(cv2, "imdecode") as imdecode:
+        processed, report = preprocessor.process_bytes(image_data)
+
+    imdecode.assert_not_called()
+    assert processed is image_data
+    assert report["changed"] is False
+    assert report["output_size"] == [800, 600]
+
+
+def test_large_image_is_downscaled_and_reencoded():
+    preprocessor = ImagePreprocessor(steps=["downscale"], target_dpi=100, page_long_side_inches=10)
+
+    processed, report = preprocessor.process_bytes(encoded(2000, 1000))
+
+    assert report["changed"] is True
+    assert Image.open(io.BytesIO(processed)).format == "PNG"
+    assert Image.open(io.BytesIO(processed)).size == (1000, 500)
+
+
+def test_noop_steps_return_original_bytes():
+    # Deskew finds nothing to rotate on a blank page, downscale nothing to shrink
+    preprocessor = ImagePreprocessor(steps=["deskew", "downscale"], target_dpi=100, page_long_side_inches=10)
+    image_data = encoded(800, 600)
+
+    processed, report = preprocessor.process_bytes(image_data)
+
+    assert processed is image_data
+    assert report["changed"] is False
+    assert set(report["steps_ms"]) == {"deskew", "downscale"}
+
+
+def test_grayscale_always_changes_the_image():
+    preprocessor = ImagePreprocessor(steps=["grayscale", "downscale"], target_dpi=100, page_long_side_inches=10)
+
+    processed, report = preprocessor.process_bytes(encoded(800, 600))
+
+    assert report["changed"] is True
+    assert Image.open(io.BytesIO(processed)).mode == "L"
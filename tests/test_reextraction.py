@@ -0,0 +1,73 @@
+from datetime import datetime
+from decimal import Decimal
+
+from app.models.invoice import Invoice, InvoiceItem
+from app.services.extraction_service import ExtractionService
+from app.schemas.invoice import OCRTable
+from app.services.reextraction_service import ReextractionService, _extract_chunk
+
+RAW_TEXT = """HÓA ĐƠN GIÁ TRỊ GIA TĂNG
+Ký hiệu (Serial): 1C23TDM
+Ngày 05 tháng 10 năm 2024
+| STT | Tên hàng hóa, dịch vụ | ĐVT | Số lượng | Đơn giá | Thành tiền |
+Tổng tiền thanh toán (Total payment): 900.000
+"""
+
+TABLE_ROWS = [
+    ["STT", "Tên hàng hóa, dịch vụ", "ĐVT", "Số lượng", "Đơn giá", "Thành tiền"],
+    ["1", "Phí dịch vụ tháng 10", "Tháng", "2", "300.000", "600.000"],
+    ["2", "Phí quản lý", "Tháng", "1", "300.000", "300.000"],
+]
+
+
+def stored_invoice(ocr_response) -> Invoice:
+    """The invoice as the upload path would have saved it"""
+    return Invoice(
+        id=1,
+        invoice_code=ocr_response.invoice_code,
+        payment_date=ocr_response.payment_date,
+        total_amount=ocr_response.total_amount,
+        raw_text=ocr_response.raw_text,
+        item_tables=[table.rows for table in ocr_response.tables],
+        items=[
+            InvoiceItem(
+                id=position,
+                item_name=item.item_name,
+                quantity=item.quantity,
+                unit_price=item.unit_price,
+                total_price=item.total_price,
+            )
+            for position, item in enumerate(ocr_response.items, start=1)
+        ],
+    )
+
+
+def test_table_sourced_items_differ_from_text_path():
+    service = ExtractionService()
+    from_table = service.extract_all(RAW_TEXT, verbose=False, tables=[OCRTable(rows=TABLE_ROWS)])
+    from_text = service.extract_all(RAW_TEXT, verbose=False)
+
+    assert [item.item_name for item in from_table.items] == ["Phí dịch vụ tháng 10", "Phí quản lý"]
+    assert from_text.items != from_table.items
+
+
+def test_reextracting_table_sourced_invoice_is_noop():
+    ocr_response = ExtractionService().extract_all(RAW_TEXT, verbose=False, tables=[OCRTable(rows=TABLE_ROWS)])
+    invoice = stored_invoice(ocr_response)
+
+    [(invoice_id, extracted, error)] = _extract_chunk([(invoice.id, invoice.raw_text, invoice.item_tables)])
+
+    assert (invoice_id, error) == (1, None)
+    assert ReextractionService(engine=None, workers=1)._diff(invoice, extracted) == {}
+
+
+def test_invoice_without_stored_tables_is_reextracted_from_text():
+    ocr_response = ExtractionService().extract_all(RAW_TEXT, verbose=False)
+    invoice = stored_invoice(ocr_response)
+    invoice.total_amount = Decimal("1")
+
+    [(_, extracted, _)] = _extract_chunk([(invoice.id, invoice.raw_text, None)])
+    changes = ReextractionService(engine=None, workers=1)._diff(invoice, extracted)
+
+    assert changes == {"total_amount": [Decimal("1"), Decimal("900000")]}
+    assert extracted["payment_date"] == datetime(2024, 10, 5)